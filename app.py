@@ -1,33 +1,117 @@
-from datetime import datetime
-import mysql.connector
+from datetime import datetime, timedelta
 from dotenv import dotenv_values
-from mysql.connector import Error
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from mysql.connector import Error, IntegrityError, errorcode
+from flask import Flask, has_request_context, request, jsonify, render_template, session, redirect, url_for, Response, stream_template, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
-from random import randint
+import click
 import logging
 import os
 from functools import wraps
-import qrcode
+from itertools import groupby
+from db_pool import ConnectionPool
+from sqlite_backend import SqlitePool
+from seat_holds import SeatHoldRegistry
+from seat_events import SeatEventBroker
+from seat_availability import SeatAvailabilityCache, ShowAvailability
+from hall_layouts import HallLayout, HallLayoutRegistry
+from id_allocator import IdAllocator
+from hall_schedule import HallDay, HallScheduleIndex, time_to_minutes
+from catalog import CatalogCache
+from qr_codes import QRCodeCache
+from offload import run_cpu_bound
+from cache_sync import CacheSync
+from metrics import Metrics
+from slow_queries import SlowQueryLog
+from migrations import migrate, pending_migrations, check_query_plans
+from archival import Archiver
+from scheduler import Scheduler
+import threading
+import uuid
+import json
+import hashlib
+import csv
 import io
-import base64
 
 
 logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 
-app.secret_key = os.urandom(24)
-
 config = dotenv_values(".env")
 
+app.secret_key = config.get('SECRET_KEY')
+if not app.secret_key:
+    logging.warning("SECRET_KEY is not set; using a random per-process key, so sessions won't survive restarts or span workers.")
+    app.secret_key = os.urandom(24)
+
+DB_BACKEND = config.get('DB_BACKEND', 'mysql')
+SQLITE_PATH = config.get('SQLITE_PATH', 'tms.sqlite3')
 DB_HOST = 'localhost'
 DB_DATABASE = config.get('DB_DATABASE', 'your_default_db_name')
 DB_USER = config.get('DB_USER', 'your_default_user')
 DB_PASSWORD = config.get('DB_PASSWORD', 'your_default_password')
+DB_POOL_SIZE = int(config.get('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(config.get('DB_POOL_TIMEOUT', 5))
+SEAT_HOLD_TTL = int(config.get('SEAT_HOLD_TTL', 300))
 
 GOLD_SEAT_THRESHOLD = 1000
 SEATS_PER_ROW = 10
+ID_BLOCK_SIZE = int(config.get('ID_BLOCK_SIZE', 100))
+QR_CACHE_SIZE = int(config.get('QR_CACHE_SIZE', 1000))
+QR_WORKERS = int(config.get('QR_WORKERS', 2))
+MAX_PRINT_BATCH = 500
+MAX_SCHEDULE_DAYS = 62
+MAX_REPORT_DAYS = 366
+MAX_IMPORT_ROWS = 5000
+SSE_MAX_STREAMS = int(config.get('SSE_MAX_STREAMS', 500))
+SSE_HEARTBEAT = float(config.get('SSE_HEARTBEAT', 15))
+CACHE_SYNC_INTERVAL = float(config.get('CACHE_SYNC_INTERVAL', 2))
+METRICS_TOKEN = config.get('METRICS_TOKEN')
+SLOW_QUERY_MS = float(config.get('SLOW_QUERY_MS', 200))
+SLOW_QUERY_LOG = config.get('SLOW_QUERY_LOG', 'slow_queries.log')
+ARCHIVE_AFTER_DAYS = int(config.get('ARCHIVE_AFTER_DAYS', 0))
+ARCHIVE_BATCH_SIZE = int(config.get('ARCHIVE_BATCH_SIZE', 20))
+ARCHIVE_PAUSE_MS = float(config.get('ARCHIVE_PAUSE_MS', 200))
+ARCHIVE_MAX_SECONDS = float(config.get('ARCHIVE_MAX_SECONDS', 300))
+SCHEDULER_ENABLED = config.get('SCHEDULER_ENABLED', '1') == '1'
+ARCHIVE_CRON = config.get('ARCHIVE_CRON', '30 3 * * *')
+PREWARM_CRON = config.get('PREWARM_CRON', '0 22 * * *')
+CATALOG_REFRESH_SECONDS = float(config.get('CATALOG_REFRESH_SECONDS', 900))
+
+def current_route():
+    if has_request_context() and request.url_rule:
+        return request.url_rule.rule
+    return 'background'
+
+metrics = Metrics()
+slow_queries = SlowQueryLog(lambda query, params: db_pool.explain(query, params), current_route, threshold_ms=SLOW_QUERY_MS, log_path=SLOW_QUERY_LOG)
+
+if DB_BACKEND == 'sqlite':
+    db_pool = SqlitePool(
+        SQLITE_PATH,
+        pool_size=DB_POOL_SIZE,
+        acquire_timeout=DB_POOL_TIMEOUT,
+        observers=(metrics, slow_queries)
+    )
+else:
+    db_pool = ConnectionPool(
+        pool_size=DB_POOL_SIZE,
+        acquire_timeout=DB_POOL_TIMEOUT,
+        observers=(metrics, slow_queries),
+        host=DB_HOST,
+        database=DB_DATABASE,
+        user=DB_USER,
+        password=DB_PASSWORD
+    )
+
+id_allocator = IdAllocator(db_pool, block_size=ID_BLOCK_SIZE)
+archiver = Archiver(db_pool, batch_size=ARCHIVE_BATCH_SIZE, pause=ARCHIVE_PAUSE_MS / 1000, max_seconds=ARCHIVE_MAX_SECONDS)
+seat_events = SeatEventBroker(max_streams=SSE_MAX_STREAMS)
+
+def publish_holds(show_id, owner, seat_nos):
+    cache_sync.publish('holds', show_id, f"{owner}:{','.join(str(seat_no) for seat_no in seat_nos)}")
+
+seat_holds = SeatHoldRegistry(ttl_seconds=SEAT_HOLD_TTL, listener=seat_events.publish, publisher=publish_holds)
 
 def format_time_tuple(time_int):
     if time_int is None:
@@ -41,34 +125,279 @@ def format_time_tuple(time_int):
         logging.warning(f"Could not format time from input: {time_int}")
         return (None, None)
     
-def generate_id():
-    return randint(1_000_000, 9_999_999)
+class BookingError(Exception):
+    pass
+
+class ScheduleConflict(Exception):
+    pass
+
+def parse_show_date(date_str):
+    for fmt in ('%Y/%m/%d', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date: {date_str}")
+
+def is_duplicate_key(error, key_name):
+    return error.errno == errorcode.ER_DUP_ENTRY and key_name in str(error.msg)
+
+def load_movies():
+    query = "SELECT movie_id, movie_name, length, language, show_start, show_end FROM movies"
+    results = runQuery(query)
+    return None if results is None else {row[0]: row for row in results}
+
+def load_types():
+    query = "SELECT movie_id, type1, type2, type3 FROM types"
+    results = runQuery(query)
+    if results is None:
+        return None
+    return {row[0]: [t for t in row[1:] if t and t.strip() and t.upper() != 'NUL'] for row in results}
+
+def load_halls():
+    results = runQuery("SELECT hall_id, hall_name FROM halls ORDER BY hall_id")
+    return None if results is None else [(row[0], row[1]) for row in results]
+
+def load_price_listing():
+    results = runQuery("SELECT price_id, type, day, price FROM price_listing")
+    return None if results is None else {row[0]: row for row in results}
+
+catalog = CatalogCache({
+    'movies': load_movies,
+    'types': load_types,
+    'halls': load_halls,
+    'price_listing': load_price_listing,
+})
+
+def show_base_price(show_id):
+    result = runQuery("SELECT price_id FROM shows WHERE show_id = %s", (show_id,), fetch_one=True)
+    prices = catalog.get('price_listing')
+    if result is None or prices is None:
+        return None, False
+    price_row = prices.get(result[0])
+    return (price_row[3] if price_row else None), True
+
+def load_hall_layout(hall_id):
+    query = "SELECT class, no_of_seats FROM hall_classes WHERE hall_id = %s"
+    results = runQuery(query, (hall_id,))
+    if results is None:
+        return None
+    total_gold = 0
+    total_standard = 0
+    for seat_class, num_seats in results:
+        if seat_class and seat_class.lower() == 'gold':
+            total_gold = num_seats if num_seats else 0
+        elif seat_class and seat_class.lower() == 'standard':
+            total_standard = num_seats if num_seats else 0
+    logging.info(f"Built seat layout for hall {hall_id} ({total_gold} gold, {total_standard} standard).")
+    return HallLayout(hall_id, total_gold, total_standard, SEATS_PER_ROW, GOLD_SEAT_THRESHOLD)
+
+hall_layouts = HallLayoutRegistry(load_hall_layout)
+
+def load_show_availability(show_id):
+    query_hall = "SELECT hall_id FROM shows WHERE show_id = %s"
+    query_booked = """
+        SELECT seat_no FROM booked_tickets
+        WHERE show_id = %s
+    """
+    # Fetch as a list so a missing show ([]) is told apart from a database error (None), which must not look like an empty hall.
+    hall_result = runQuery(query_hall, (show_id,))
+    if hall_result is None:
+        return None
+    if not hall_result:
+        return ShowAvailability(None, 0, 0, GOLD_SEAT_THRESHOLD)
+    layout = hall_layouts.get(hall_result[0][0])
+    booked_results = runQuery(query_booked, (show_id,))
+    if layout is None or booked_results is None:
+        return None
+
+    logging.info(f"Loaded seat availability for show {show_id} ({len(booked_results)} booked).")
+    return ShowAvailability(layout.hall_id, layout.gold_seats, layout.standard_seats, GOLD_SEAT_THRESHOLD, (row[0] for row in booked_results))
+
+seat_availability = SeatAvailabilityCache(load_show_availability)
+
+def build_qr_payload(booking_ref, rows):
+    # rows follow TICKET_DETAILS_QUERY: ticket_no, seat_no, ..., Date at 5, show_id at 8, hall_id at 11.
+    layout = hall_layouts.get(rows[0][11])
+    show_date = rows[0][5]
+    qr_code_content_list = []
+    for row in rows:
+        ticket_no, seat_db_no = row[0], row[1]
+        seat_code_display = layout.seat_code(seat_db_no) if layout else db_no_to_seat_code(seat_db_no)
+        seat_class = 'Gold' if seat_db_no > GOLD_SEAT_THRESHOLD else 'Standard'
+        qr_code_content_list.append(f"T{ticket_no}:S-{seat_code_display}({seat_class[0]})")
+    qr_data_string = f"Ref:{booking_ref}\n"
+    qr_data_string += f"Show:{rows[0][8]}\n"
+    qr_data_string += f"Date:{show_date.strftime('%Y-%m-%d') if show_date else 'N/A'}\n"
+    qr_data_string += ";".join(qr_code_content_list)
+    return qr_data_string
+
+def load_qr_payload(booking_ref):
+    query = TICKET_DETAILS_QUERY + """
+        WHERE bt.booking_ref = %s
+        ORDER BY bt.seat_no
+    """
+    results = runQuery(query, (booking_ref,))
+    if not results:
+        return None
+    return build_qr_payload(booking_ref, results)
+
+def load_hall_schedule(show_date):
+    shows_query = """
+        SELECT s.hall_id, s.time, m.length
+        FROM shows s
+        JOIN movies m ON s.movie_id = m.movie_id
+        WHERE s.Date = %s
+    """
+    halls = catalog.get('halls')
+    shows = runQuery(shows_query, (show_date,))
+    if halls is None or shows is None:
+        return None
+    intervals = [
+        (hall_id, time_to_minutes(time_int), time_to_minutes(time_int) + int(length))
+        for hall_id, time_int, length in shows
+        if time_int is not None and length is not None
+    ]
+    return halls, intervals
+
+hall_schedule = HallScheduleIndex(load_hall_schedule)
+
+def lock_hall(tx, hall_id):
+    # Serialises schedule changes per hall (all days) across workers until the transaction ends.
+    if tx.fetch_one("SELECT hall_id FROM halls WHERE hall_id = %s FOR UPDATE", (hall_id,)) is None:
+        raise ScheduleConflict(f'Hall {hall_id} does not exist.')
+
+def hall_intervals(tx, hall_id, show_date):
+    query = """
+        SELECT s.time, m.length
+        FROM shows s
+        JOIN movies m ON s.movie_id = m.movie_id
+        WHERE s.hall_id = %s AND s.Date = %s
+        LOCK IN SHARE MODE
+    """
+    # A locking read always sees the latest committed shows, whatever snapshot the transaction holds.
+    return [
+        (time_to_minutes(time_int), time_to_minutes(time_int) + int(length))
+        for time_int, length in tx.fetch_all(query, (hall_id, show_date))
+        if time_int is not None and length is not None
+    ]
+
+qr_cache = QRCodeCache(load_qr_payload, max_entries=QR_CACHE_SIZE, workers=QR_WORKERS)
+
+def refresh_hall_layouts(hall_id=None):
+    hall_layouts.invalidate(hall_id)
+    seat_availability.invalidate()
+
+def apply_booked_event(show_id_str, seat_nos_str):
+    show_id = int(show_id_str)
+    seat_nos = [int(seat_no) for seat_no in seat_nos_str.split(',') if seat_no]
+    seat_availability.mark_booked(show_id, seat_nos)
+    seat_events.publish(show_id, 'booked', seat_nos)
+
+def apply_holds_event(show_id_str, detail):
+    owner, _, seat_nos_str = detail.partition(':')
+    seat_holds.apply_remote(int(show_id_str), owner, [int(seat_no) for seat_no in seat_nos_str.split(',') if seat_no])
+
+cache_sync = CacheSync(db_pool, interval=CACHE_SYNC_INTERVAL)
+cache_sync.on('catalog', lambda names, _: catalog.invalidate(*names.split(',')))
+cache_sync.on('halls', lambda hall_id, _: refresh_hall_layouts(int(hall_id) if hall_id else None))
+cache_sync.on('availability', lambda show_id, _: seat_availability.invalidate(int(show_id)))
+cache_sync.on('hall_schedule', lambda show_date, _: hall_schedule.invalidate(parse_show_date(show_date)))
+cache_sync.on('booked', apply_booked_event)
+cache_sync.on('holds', apply_holds_event)
+
+PREWARM_SHOWS_QUERY = "SELECT show_id, hall_id FROM shows WHERE Date = %s"
+PREWARM_BOOKINGS_QUERY = "SELECT booking_ref FROM booking_sales WHERE show_date = %s"
+
+def prewarm_day(show_date):
+    for name in catalog.loaders:
+        catalog.get(name)
+    shows = runQuery(PREWARM_SHOWS_QUERY, (show_date,))
+    booking_refs = runQuery(PREWARM_BOOKINGS_QUERY, (show_date,))
+    if shows is None or booking_refs is None or not hall_schedule.warm(show_date):
+        raise RuntimeError(f"Could not load the schedule for {show_date}.")
+    for show_id, hall_id in shows:
+        hall_layouts.get(hall_id)
+        seat_availability.get(show_id)
+    # Leave room in the QR cache for the bookings made on the day itself.
+    booking_refs = booking_refs[:QR_CACHE_SIZE // 2]
+    for (booking_ref,) in booking_refs:
+        qr_cache.prefetch(booking_ref)
+    logging.info(f"Pre-warmed {show_date}: {len(shows)} show(s), {len(booking_refs)} QR code(s).")
+    return {"date": show_date.isoformat(), "shows": len(shows), "qrCodes": len(booking_refs)}
+
+def prewarm_tomorrow():
+    tomorrow = datetime.now().date() + timedelta(days=1)
+    report = prewarm_day(tomorrow)
+    # Every worker keeps its own caches, so the others warm theirs when they see the event.
+    cache_sync.publish('prewarm', tomorrow.isoformat())
+    return report
+
+def refresh_catalog():
+    catalog.invalidate()
+    loaded = [name for name in catalog.loaders if catalog.get(name) is not None]
+    cache_sync.publish('catalog', ','.join(catalog.loaders))
+    return {"tables": loaded}
+
+def apply_prewarm_event(show_date_str, _):
+    show_date = parse_show_date(show_date_str)
+
+    def warm():
+        try:
+            prewarm_day(show_date)
+        except Exception as e:
+            logging.error(f"Prewarming {show_date} failed: {e}")
+
+    # Warming takes seconds; the poller thread must keep applying invalidations meanwhile.
+    threading.Thread(target=warm, name='prewarm', daemon=True).start()
+
+cache_sync.on('prewarm', apply_prewarm_event)
+
+scheduler = Scheduler(db_pool, metrics=metrics, enabled=SCHEDULER_ENABLED)
+if ARCHIVE_CRON:
+    scheduler.cron('archive', ARCHIVE_CRON, lambda: archive_old_records())
+if PREWARM_CRON:
+    scheduler.cron('prewarm', PREWARM_CRON, prewarm_tomorrow)
+if CATALOG_REFRESH_SECONDS > 0:
+    scheduler.every('catalog_refresh', CATALOG_REFRESH_SECONDS, refresh_catalog)
+
+metrics.add_cache_source('catalog', catalog.stats)
+metrics.add_cache_source('seat_availability', lambda: {"shows": seat_availability.stats()})
+metrics.add_cache_source('qr_codes', lambda: {"tickets": qr_cache.stats()})
+
+@app.before_request
+def startBackgroundWork():
+    cache_sync.start()
+    scheduler.start()
+    metrics.begin_request()
+
+@app.after_request
+def recordRequestMetrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.end_request(route, request.method, response.status_code)
+    return response
+
+def hold_owner():
+    if 'hold_token' not in session:
+        session['hold_token'] = uuid.uuid4().hex
+    return session['hold_token']
 
 def runQuery(query, params=None, fetch_one=False, last_row_id=False):
     results = None
-    connection = None
-    cursor = None
     try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            database=DB_DATABASE,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        if connection.is_connected():
-            cursor = connection.cursor(buffered=True)
-            logging.info(f"Executing query: {cursor.statement}")
-            cursor.execute(query, params or ())
+        with db_pool.connection() as connection:
+            logging.info(f"Executing query: {' '.join(query.split())[:100]}")
+            result = connection.run(query, params or ())
             if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE', 'CALL')):
                 connection.commit()
                 logging.info("Query committed.")
-            if cursor.description:
+            if result.description:
                 if fetch_one:
-                    results = cursor.fetchone()
+                    results = result.rows[0] if result.rows else None
                 elif last_row_id:
-                    results = cursor.lastrowid
+                    results = result.lastrowid
                 else:
-                    results = cursor.fetchall()
+                    results = result.rows
                 logging.info(f"Query yielded results: {'Yes' if results else 'No'}")
             else:
                 results = []
@@ -80,12 +409,9 @@ def runQuery(query, params=None, fetch_one=False, last_row_id=False):
     except Exception as e:
         logging.error(f"General Error during query execution: {e}")
         return None
-    finally:
-        if cursor:
-            cursor.close()
-        if connection and connection.is_connected():
-            connection.close()
-            logging.info("MySQL connection closed.")
+
+def transaction():
+    return db_pool.transaction()
 
 def render_bulma_notification(message, level='is-danger', size=''):
     return f'<div class="notification {level} {size} p-3 my-4 mx-4"> {message} </div>'
@@ -133,7 +459,7 @@ def verifyAndRenderRespective():
 
     if user_data:
         user_id, db_username, db_password_hash, user_role = user_data
-        if check_password_hash(db_password_hash, password):
+        if run_cpu_bound(check_password_hash, db_password_hash, password):
             session.clear()
             session['user_id'] = user_id
             session['username'] = db_username
@@ -151,24 +477,27 @@ def verifyAndRenderRespective():
 @app.route('/logout')
 @login_required(role="any")
 def logout():
+    if 'hold_token' in session:
+        seat_holds.release_owner(session.pop('hold_token'))
     session.pop('user_id', None)
     session.pop('user_role', None)
     session.pop('username', None)
     return redirect(url_for('renderLoginOrIndex'))
 
+MOVIES_ON_DATE_QUERY = """
+    SELECT DISTINCT m.movie_id, m.movie_name, s.type
+    FROM movies m
+    JOIN shows s ON m.movie_id = s.movie_id
+    WHERE s.Date = %s
+"""
+
 @app.route('/getMoviesShowingOnDate', methods=['POST'])
 @login_required(role="cashier")
 def moviesOnDate():
     show_date = request.form.get('date')
     if not show_date:
         return render_bulma_notification('Invalid date provided.', 'is-warning')
-    query = """
-        SELECT DISTINCT m.movie_id, m.movie_name, s.type
-        FROM movies m
-        JOIN shows s ON m.movie_id = s.movie_id
-        WHERE s.Date = %s
-    """
-    results = runQuery(query, (show_date,))
+    results = runQuery(MOVIES_ON_DATE_QUERY, (show_date,))
     if results is None:
         return render_bulma_notification('Error retrieving movie data. Please try again later.', 'is-danger')
     if not results:
@@ -176,6 +505,12 @@ def moviesOnDate():
     else:
         return render_template('movies.html', movies=results)
 
+TIMINGS_QUERY = """
+    SELECT time FROM shows
+    WHERE Date = %s AND movie_id = %s AND type = %s
+    ORDER BY time
+"""
+
 @app.route('/getTimings', methods=['POST'])
 @login_required(role="cashier")
 def timingsForMovie():
@@ -184,13 +519,8 @@ def timingsForMovie():
     movie_type = request.form.get('type')
     if not all([show_date, movie_id, movie_type]):
         return render_bulma_notification('Missing required information (date, movieID, or type).', 'is-warning')
-    query = """
-        SELECT time FROM shows
-        WHERE Date = %s AND movie_id = %s AND type = %s
-        ORDER BY time
-    """
     try:
-        results = runQuery(query, (show_date, int(movie_id), movie_type))
+        results = runQuery(TIMINGS_QUERY, (show_date, int(movie_id), movie_type))
     except ValueError:
         return render_bulma_notification('Invalid Movie ID format.', 'is-danger')
     if results is None:
@@ -203,6 +533,11 @@ def timingsForMovie():
             timings_list.append((time_int, hour, minute_str))
     return render_template('timings.html', timings=timings_list)
 
+SHOW_ID_QUERY = """
+    SELECT show_id FROM shows
+    WHERE Date = %s AND movie_id = %s AND type = %s AND time = %s
+"""
+
 @app.route('/getShowID', methods=['POST'])
 @login_required(role="cashier")
 def getShowID():
@@ -212,13 +547,9 @@ def getShowID():
     time_str = request.form.get('time')
     if not all([show_date, movie_id, movie_type, time_str]):
         return jsonify({"error": "Missing required information."}), 400
-    query = """
-        SELECT show_id FROM shows
-        WHERE Date = %s AND movie_id = %s AND type = %s AND time = %s
-    """
     try:
         params = (show_date, int(movie_id), movie_type, int(time_str))
-        result = runQuery(query, params, fetch_one=True)
+        result = runQuery(SHOW_ID_QUERY, params, fetch_one=True)
     except ValueError:
         return jsonify({"error": "Invalid numeric input for movie ID or time."}), 400
     if result:
@@ -228,6 +559,65 @@ def getShowID():
     else:
         return jsonify({"error": "Show not found for the given details."}), 404
 
+DAY_SCHEDULE_QUERY = """
+    SELECT s.show_id, s.movie_id, m.movie_name, s.type, s.time, s.hall_id, h.hall_name, COUNT(bt.ticket_no)
+    FROM shows s
+    JOIN movies m ON s.movie_id = m.movie_id
+    JOIN halls h ON s.hall_id = h.hall_id
+    LEFT JOIN booked_tickets bt ON bt.show_id = s.show_id
+    WHERE s.Date = %s
+    GROUP BY s.show_id, s.movie_id, m.movie_name, s.type, s.time, s.hall_id, h.hall_name
+    ORDER BY m.movie_name, s.type, s.time
+"""
+
+@app.route('/getDaySchedule', methods=['GET'])
+@login_required(role="cashier")
+def getDaySchedule():
+    show_date = request.args.get('date')
+    try:
+        show_date_obj = parse_show_date(show_date or '')
+    except ValueError:
+        return jsonify({"error": "Invalid date provided."}), 400
+    results = runQuery(DAY_SCHEDULE_QUERY, (show_date_obj,))
+    if results is None:
+        return jsonify({"error": "Error retrieving schedule. Please try again later."}), 500
+
+    movies = {}
+    for show_id, movie_id, movie_name, show_type, time_int, hall_id, hall_name, booked_count in results:
+        hour, minute_str = format_time_tuple(time_int)
+        if hour is None:
+            continue
+        availability = seat_availability.peek(show_id)
+        layout = hall_layouts.get(hall_id)
+        if availability is not None:
+            remaining = availability.available_gold + availability.available_standard
+        elif layout is not None:
+            remaining = layout.capacity - booked_count
+        else:
+            remaining = None
+        movie = movies.setdefault(movie_id, {"id": movie_id, "name": movie_name, "formats": {}})
+        movie["formats"].setdefault(show_type, []).append({
+            "showID": show_id,
+            "time": time_int,
+            "label": f"{hour}:{minute_str}",
+            "hall": hall_name,
+            "remaining": remaining
+        })
+
+    schedule = {
+        "date": show_date_obj.strftime('%Y-%m-%d'),
+        "movies": [
+            {"id": m["id"], "name": m["name"], "formats": [{"type": t, "shows": shows} for t, shows in m["formats"].items()]}
+            for m in movies.values()
+        ]
+    }
+    body = json.dumps(schedule, separators=(',', ':'))
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body.encode('utf-8')).hexdigest())
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/getAvailableSeats', methods=['POST'])
 @login_required(role="cashier")
 def getSeating():
@@ -235,69 +625,58 @@ def getSeating():
     if not show_id_str:
         return render_bulma_notification('Missing Show ID.', 'is-warning')
 
-    query_hall_info = """
-        SELECT hc.class, hc.no_of_seats
-        FROM shows s
-        JOIN hall_classes hc ON s.hall_id = hc.hall_id
-        WHERE s.show_id = %s
-    """
-    
-    query_booked = """
-        SELECT seat_no FROM booked_tickets
-        WHERE show_id = %s
-    """
     try:
         show_id = int(show_id_str)
-        hall_results = runQuery(query_hall_info, (show_id,))
-        booked_results = runQuery(query_booked, (show_id,))
     except ValueError:
         return render_bulma_notification('Invalid Show ID format.', 'is-danger')
 
-    if hall_results is None or booked_results is None:
+    availability = seat_availability.get(show_id)
+    if availability is None:
         return render_bulma_notification('Error retrieving seating information.', 'is-danger')
-    if not hall_results:
+    if not availability.capacity:
         return render_bulma_notification('Hall information not found for this show.', 'is-info')
 
-    total_gold = 0
-    total_standard = 0
-    for row in hall_results:
-        seat_class, num_seats = row
-        if seat_class and seat_class.lower() == 'gold':
-            total_gold = num_seats if num_seats else 0
-        elif seat_class and seat_class.lower() == 'standard':
-            total_standard = num_seats if num_seats else 0
+    layout = hall_layouts.get(availability.hall_id)
+    if layout is None:
+        return render_bulma_notification('Error retrieving seating information.', 'is-danger')
+    owner = hold_owner()
+
+    def seat_status(db_no):
+        if availability.is_booked(db_no):
+            return 'booked'
+        if seat_holds.is_held_by_other(show_id, db_no, owner):
+            return 'held'
+        return 'available'
+
+    return render_template('seating.html', goldLayout=layout.gold_rows, standardLayout=layout.standard_rows, seat_status=seat_status)
+
+@app.route('/seatEvents/<int:show_id>')
+@login_required(role="cashier")
+def seatEvents(show_id):
+    stream = seat_events.subscribe(show_id, hold_owner())
+    if stream is None:
+        logging.warning(f"Refused live seat stream for show {show_id}: {SSE_MAX_STREAMS} streams already open.")
+        return jsonify({"error": "Too many live seat views are open. Please try again later."}), 503
 
-    booked_seat_nos = {row[0] for row in booked_results}
-
-    def generate_seat_layout(total_seats, start_db_no, seat_class):
-        rows_data = []
-        if total_seats <= 0:
-            return rows_data
-        num_rows = (total_seats + SEATS_PER_ROW - 1) // SEATS_PER_ROW
-        seat_counter = 0
-        for r in range(num_rows):
-            row_letter = chr(ord('A') + r)
-            row_seats = []
-            for s in range(SEATS_PER_ROW):
-                seat_counter += 1
-                if seat_counter > total_seats:
-                    break
-                display_code = f"{row_letter}{s + 1}"
-                db_no = start_db_no + seat_counter -1
-                status = 'booked' if db_no in booked_seat_nos else 'available'
-                row_seats.append({
-                    "code": display_code,
-                    "db_no": db_no,
-                    "status": status,
-                    "class": seat_class
-                })
-            rows_data.append({"letter": row_letter, "seats": row_seats})
-        return rows_data
-
-    gold_layout = generate_seat_layout(total_gold, 1 + GOLD_SEAT_THRESHOLD, 'gold')
-    standard_layout = generate_seat_layout(total_standard, 1, 'standard')
-
-    return render_template('seating.html', goldLayout=gold_layout, standardLayout=standard_layout)
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while not stream.overflowed:
+                event = stream.get(SSE_HEARTBEAT)
+                if event is None:
+                    seat_holds.purge_expired()
+                    yield ": keepalive\n\n"
+                    continue
+                event_id, kind, seat_nos = event
+                yield f"id: {event_id}\nevent: {kind}\ndata: {json.dumps({'seats': seat_nos})}\n\n"
+            yield "event: resync\ndata: {}\n\n"
+        finally:
+            seat_events.unsubscribe(stream)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/getPrice', methods=['POST'])
 @login_required(role="cashier")
@@ -306,23 +685,17 @@ def getPriceForClass():
     seat_class = request.form.get('seatClass')
     if not all([show_id_str, seat_class]):
         return render_bulma_notification('Missing Show ID or Seat Class.', 'is-warning')
-    query = """
-        SELECT pl.price
-        FROM shows s
-        LEFT JOIN price_listing pl ON s.price_id = pl.price_id
-        WHERE s.show_id = %s
-    """
     try:
         show_id = int(show_id_str)
-        result = runQuery(query, (show_id,), fetch_one=True)
     except ValueError:
         return render_bulma_notification('Invalid Show ID format.', 'is-danger')
-    if result is None:
+    base_price, found = show_base_price(show_id)
+    if not found:
         return render_bulma_notification('Error retrieving price information.', 'is-danger')
-    if not result or result[0] is None:
+    if base_price is None:
         return render_bulma_notification('Prices have not been assigned to this show yet. Please check later.', 'is-info')
     try:
-        base_price = int(result[0])
+        base_price = int(base_price)
         price = base_price
         if seat_class.lower() == 'gold':
             price = int(base_price * 1.5)
@@ -356,93 +729,73 @@ def createBooking():
     if not all([show_id_str, selected_seats, customer_name, customer_phone]):
         return render_bulma_notification('Missing booking information (Show ID or Selected Seats).', 'is-warning')
     
-    customer_id = None
-    
     try:
-        customer_query = "SELECT customer_id FROM customers WHERE customer_phone = %s"
-        customer_result = runQuery(customer_query, (customer_phone,), fetch_one=True)
-
-        if customer_result:
-            customer_id = customer_result[0]
-            update_customer_query = "UPDATE customers SET customer_name = %s WHERE customer_id = %s AND customer_name != %s"
-            runQuery(update_customer_query, (customer_name, customer_id, customer_name))
-            logging.info(f"Found existing customer ID: {customer_id} for phone {customer_phone}")
-        else:
-            insert_customer_query = "INSERT INTO customers (customer_name, customer_phone) VALUES (%s, %s)"
-            runQuery(insert_customer_query, (customer_name, customer_phone))
-            customer_id_query = "SELECT customer_id FROM customers WHERE customer_phone = %s"
-            customer_id_result = runQuery(customer_id_query, (customer_phone,), fetch_one=True)
-            if customer_id_query:
-                customer_id = customer_id_result[0]
-                logging.info(f"Created new customer ID: {customer_id} for {customer_name}, {customer_phone}")
-            else:
-                return render_bulma_notification(f'Failed to retrieve customer ID after inserting customer with phone {customer_phone}.', 'is-warning')
-
-        booking_ref = str(generate_id())
+        show_id = int(show_id_str)
+        seats = [(int(seat.get('db_no')), seat.get('code'), seat.get('class', '').lower()) for seat in selected_seats]
+    except (TypeError, ValueError):
+        return render_bulma_notification('Invalid numeric input for Show ID or Seat Number.', 'is-danger')
 
-        attempts = 0
-        max_attempts = 5
-        while attempts < max_attempts:
-            check_booking_query = "SELECT booking_ref FROM bookings WHERE booking_ref = %s"
-            result = runQuery(check_booking_query, (booking_ref,), fetch_one=True)
-            if not result:
-                break
-            logging.warning(f"Booking reference collision for {booking_ref}, retrying...")
-            attempts += 1
-        else:
-            return render_bulma_notification('Failed ro generate unique booking reference.', 'is-error')
-        
-        insert_booking_query = "INSERT INTO bookings (booking_ref, customer_id) VALUES (%s, %s)"
-        runQuery(insert_booking_query, (booking_ref, customer_id))
-        logging.info(f"Created booking record with ref: {booking_ref} for customer ID: {customer_id}")
+    owner = hold_owner()
+    conflicts = seat_holds.sync(show_id, owner, [seat_db_no for seat_db_no, _, _ in seats])
+    if conflicts:
+        held_codes = ", ".join(seat_code for seat_db_no, seat_code, _ in seats if seat_db_no in conflicts)
+        return render_bulma_notification(f'Booking Failed. Seat(s) {held_codes} are currently held at another counter.', 'is-danger')
 
-        booked_ticket_details = []
-        show_id = int(show_id_str)
+    upsert_customer_query = """
+        INSERT INTO customers (customer_name, customer_phone) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE customer_name = VALUES(customer_name), customer_id = LAST_INSERT_ID(customer_id)
+    """
+    # The base price is stored with the booking so tickets, exports and rollup rebuilds keep the price charged.
+    insert_booking_query = """
+        INSERT INTO bookings (booking_ref, customer_id, base_price)
+        SELECT %s, %s, p.price
+        FROM shows s
+        LEFT JOIN price_listing p ON s.price_id = p.price_id
+        WHERE s.show_id = %s
+    """
+    insert_tickets_query = """
+        INSERT INTO booked_tickets
+        (ticket_no, show_id, seat_no, booking_ref)
+        VALUES (%s, %s, %s, %s)
+    """
 
-        query = """
-            INSERT INTO booked_tickets
-            (ticket_no, show_id, seat_no, booking_ref)
-            VALUES (%s, %s, %s, %s)
-        """
+    try:
+        booking_ref = str(id_allocator.next_id('booking'))
+        ticket_nos = id_allocator.take('ticket', len(seats))
+
+        with transaction() as tx:
+            tx.execute(upsert_customer_query, (customer_name, customer_phone))
+            customer_id = tx.last_row_id
+            logging.info(f"Upserted customer ID: {customer_id} for phone {customer_phone}")
+
+            if not tx.execute(insert_booking_query, (booking_ref, customer_id, show_id)):
+                raise BookingError(f'Booking Failed. Show {show_id} was not found.')
+            logging.info(f"Created booking record with ref: {booking_ref} for customer ID: {customer_id}")
+
+            params = [(ticket_no, show_id, seat_db_no, booking_ref) for ticket_no, (seat_db_no, _, _) in zip(ticket_nos, seats)]
+            try:
+                tx.execute_many(insert_tickets_query, params)
+            except IntegrityError as e:
+                if is_duplicate_key(e, 'unique_show_seat'):
+                    seat_availability.invalidate(show_id)
+                    cache_sync.publish('availability', show_id)
+                    raise BookingError('Booking Failed. The seat might have just been taken, or a database error occurred.')
+                raise
+
+            record_booking_sales(tx, booking_ref, show_id, customer_name, customer_phone, [seat_db_no for seat_db_no, _, _ in seats])
+
+        seat_availability.mark_booked(show_id, [seat_db_no for seat_db_no, _, _ in seats])
+        seat_events.publish(show_id, 'booked', [seat_db_no for seat_db_no, _, _ in seats], owner)
+        cache_sync.publish('booked', show_id, ','.join(str(seat_db_no) for seat_db_no, _, _ in seats))
+        seat_holds.release(show_id, owner)
+        qr_cache.prefetch(booking_ref)
+
+        booked_ticket_details = [
+            {"ticket_no": ticket_no, "seat_display": f"{seat_code} ({seat_class.capitalize()})"}
+            for ticket_no, (_, seat_code, seat_class) in zip(ticket_nos, seats)
+        ]
+        logging.info(f"Booked {len(booked_ticket_details)} ticket(s) for show {show_id} under booking {booking_ref}")
 
-        for seat in selected_seats:
-            seat_db_no = seat.get('db_no')
-            seat_code = seat.get('code')
-            seat_class = seat.get('class', '').lower()
-
-            ticket_no = None
-            attempts = 0
-            max_attempts = 5
-            while attempts < max_attempts:
-                ticket_no = generate_id()
-                check_query = "SELECT ticket_no FROM booked_tickets WHERE ticket_no = %s"
-                existing = runQuery(check_query, (ticket_no,), fetch_one=True)
-                if not existing:
-                    break
-                logging.warning(f"Ticket number collision for {ticket_no}, retrying...")
-                attempts += 1
-            else:
-                logging.error("Failed to generate a unique ticket number after multiple attempts.")
-                return render_bulma_notification('Error generating ticket number. Please try booking again.', 'is-danger')
-            
-            params = (
-                    ticket_no,
-                    show_id,
-                    seat_db_no,
-                    booking_ref
-            )
-            logging.info(f"Attempting to insert ticket: {params}")
-            result = runQuery(query, params)
-
-            if isinstance(result, list) and not result:
-                booked_ticket_details.append({
-                    "ticket_no": ticket_no,
-                    "seat_display": f"{seat_code} ({seat_class.capitalize()})"
-                })
-            else:
-                logging.error(f"Booking insertion potentially failed for show {show_id}, seat {seat_db_no}. runQuery returned: {result}")
-                return render_bulma_notification('Booking Failed. The seat might have just been taken, or a database error occurred.', 'is-danger')
-        
         seats_booked_str = ", ".join([t["seat_display"] for t in booked_ticket_details])
         ticket_url = url_for('show_ticket', booking_ref=booking_ref, _external=True)
 
@@ -458,8 +811,12 @@ def createBooking():
         '''
 
         return success_html
-    except ValueError:
-        return render_bulma_notification('Invalid numeric input for Show ID or Seat Number.', 'is-danger')
+    except BookingError as e:
+        logging.error(f"Booking for show {show_id} rolled back: {e}")
+        return render_bulma_notification(str(e), 'is-danger')
+    except Error as e:
+        logging.error(f"MySQL Error during booking insertion, rolled back: {e}")
+        return render_bulma_notification('Booking Failed. The seat might have just been taken, or a database error occurred.', 'is-danger')
     except Exception as e:
         logging.error(f"Error during booking insertion: {e}")
         return render_bulma_notification('An unexpected error occurred during booking.', 'is-danger')
@@ -475,27 +832,28 @@ def get_total_price():
     if not show_id_str or not selected_seats:
         return jsonify({"error": "Missing Show ID or selected seats."}), 400
 
-    query = """
-        SELECT pl.price
-        FROM shows s
-        JOIN price_listing pl ON s.price_id = pl.price_id
-        WHERE s.show_id = %s
-    """
     try:
         show_id = int(show_id_str)
-        result = runQuery(query, (show_id,), fetch_one=True)
     except ValueError:
          return jsonify({"error": "Invalid Show ID."}), 400
 
-    if result is None or not result or result[0] is None:
+    base_price, _ = show_base_price(show_id)
+    if base_price is None:
         return jsonify({"error": "Price not found for this show."}), 404
 
-    base_price = int(result[0])
+    try:
+        held_seat_nos = [int(seat['dbNo']) for seat in selected_seats if seat.get('dbNo') is not None]
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid seat number."}), 400
+    conflicts = seat_holds.sync(show_id, hold_owner(), held_seat_nos)
+    if conflicts:
+        taken = ", ".join(seat.get('seatCode') or str(seat['dbNo']) for seat in selected_seats if seat.get('dbNo') is not None and int(seat['dbNo']) in conflicts)
+        return jsonify({"error": f"Seat(s) {taken} are currently held at another counter.", "heldSeats": sorted(conflicts)}), 409
+
+    base_price = int(base_price)
     total_price = 0
     seat_details_html = ""
 
-    print(selected_seats)
-
     for seat in selected_seats:
         seat_class = seat.get('seatClass', '').lower()
         seat_code = seat.get('seatCode')
@@ -561,20 +919,32 @@ def get_total_price():
 </div>
     '''
 
+@app.route('/releaseHolds', methods=['POST'])
+@login_required(role="cashier")
+def releaseHolds():
+    data = request.get_json(silent=True) or {}
+    try:
+        show_id = int(data.get('showID'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid Show ID."}), 400
+    seat_holds.release(show_id, hold_owner())
+    return jsonify({"released": True})
+
+SHOWS_ON_DATE_QUERY = """
+    SELECT s.show_id, m.movie_name, s.type, s.time
+    FROM shows s
+    JOIN movies m ON s.movie_id = m.movie_id
+    WHERE s.Date = %s
+    ORDER BY s.time, m.movie_name
+"""
+
 @app.route('/getShowsShowingOnDate', methods=['POST'])
 @login_required(role="manager")
 def getShowsOnDate():
     show_date = request.form.get('date')
     if not show_date:
         return render_bulma_notification('Invalid date provided.', 'is-warning')
-    query = """
-        SELECT s.show_id, m.movie_name, s.type, s.time
-        FROM shows s
-        JOIN movies m ON s.movie_id = m.movie_id
-        WHERE s.Date = %s
-        ORDER BY s.time, m.movie_name
-    """
-    results = runQuery(query, (show_date,))
+    results = runQuery(SHOWS_ON_DATE_QUERY, (show_date,))
     if results is None:
         return render_bulma_notification('Error retrieving show data. Please try again later.', 'is-danger')
     if not results:
@@ -594,10 +964,11 @@ def getBookedTickets():
     if not show_id_str:
         return render_bulma_notification('Missing Show ID.', 'is-warning')
     query = """
-        SELECT ticket_no, seat_no
-        FROM booked_tickets
-        WHERE show_id = %s
-        ORDER BY seat_no
+        SELECT bt.ticket_no, bt.seat_no, s.hall_id
+        FROM booked_tickets bt
+        JOIN shows s ON bt.show_id = s.show_id
+        WHERE bt.show_id = %s
+        ORDER BY bt.seat_no
     """
     try:
         show_id = int(show_id_str)
@@ -608,17 +979,14 @@ def getBookedTickets():
         return render_bulma_notification('Error retrieving booking data.', 'is-danger')
     if not results:
         return render_bulma_notification('No Bookings Found for this Show', 'is-info')
+    layout = hall_layouts.get(results[0][2])
     tickets_formatted = []
     for row in results:
-        ticket_no, seat_db_no = row
-        if seat_db_no > GOLD_SEAT_THRESHOLD:
-            seat_display_no = seat_db_no - GOLD_SEAT_THRESHOLD
-            seat_class = 'Gold'
-        else:
-            seat_display_no = seat_db_no
-            seat_class = 'Standard'
+        ticket_no, seat_db_no, _ = row
+        seat_display_no = layout.seat_code(seat_db_no) if layout else db_no_to_seat_code(seat_db_no)
+        seat_class = 'Gold' if seat_db_no > GOLD_SEAT_THRESHOLD else 'Standard'
         tickets_formatted.append([ticket_no, seat_display_no, seat_class])
-    return render_template('bookedTickets.html', tickets=tickets_formatted)
+    return render_template('bookedTickets.html', tickets=tickets_formatted, show_id=show_id)
 
 @app.route('/fetchMovieInsertForm', methods=['GET'])
 @login_required(role="manager")
@@ -645,17 +1013,10 @@ def insertMovie():
         if movie_len <= 0: raise ValueError("Movie length must be positive.")
     except ValueError as e:
         return render_bulma_notification(f'Invalid movie length: {e}', 'is-danger')
-    movie_id = None
-    attempts = 0
-    max_attempts = 10
-    while attempts < max_attempts:
-        movie_id = generate_id()
-        check_id_query = "SELECT movie_id FROM movies WHERE movie_id = %s"
-        id_exists = runQuery(check_id_query, (movie_id,), fetch_one=True)
-        if not id_exists: break
-        attempts += 1
-    else:
-        logging.error("Failed to generate a unique movie ID.")
+    try:
+        movie_id = id_allocator.next_id('movie')
+    except Error as e:
+        logging.error(f"Failed to allocate a movie ID: {e}")
         return render_bulma_notification('Error generating unique movie ID. Please try again.', 'is-danger')
     insert_movie_query = """
         INSERT INTO movies (movie_id, movie_name, length, language, show_start, show_end)
@@ -675,6 +1036,8 @@ def insertMovie():
     """
     types_params = (movie_id,) + type_params_tuple
     types_insert_result = runQuery(insert_types_query, types_params)
+    catalog.invalidate('movies', 'types')
+    cache_sync.publish('catalog', 'movies,types')
     if isinstance(types_insert_result, list):
         return f'''
             <div class="notification is-success is-light has-text-centered">
@@ -692,26 +1055,24 @@ def validMovies():
     show_date = request.form.get('showDate')
     if not show_date:
         return render_bulma_notification('Missing show date.', 'is-warning')
-    movies_query = """
-        SELECT m.movie_id, m.movie_name, m.length, m.language
-        FROM movies m
-        WHERE m.show_start <= %s AND m.show_end >= %s
-    """
-    valid_movies_results = runQuery(movies_query, (show_date, show_date))
-    if valid_movies_results is None:
+    try:
+        show_date_obj = parse_show_date(show_date)
+    except ValueError:
+        return render_bulma_notification('Invalid show date.', 'is-danger')
+    movies = catalog.get('movies')
+    types = catalog.get('types')
+    if movies is None or types is None:
         return render_bulma_notification('Error retrieving movie data.', 'is-danger')
-    if not valid_movies_results:
+    valid_movies = [
+        movie for movie in movies.values()
+        if movie[4] and movie[5] and movie[4] <= show_date_obj <= movie[5]
+    ]
+    if not valid_movies:
         return render_bulma_notification('No Movies Available for Showing On Selected Date', 'is-info')
     movies_with_types = []
-    types_query = "SELECT type1, type2, type3 FROM types WHERE movie_id = %s"
-    for movie_row in valid_movies_results:
-        movie_id, movie_name, length, language = movie_row
-        types_result = runQuery(types_query, (movie_id,), fetch_one=True)
-        type_str = "N/A"
-        if types_result:
-            valid_types = [t for t in types_result if t and t.strip() and t.upper() != 'NUL']
-            if valid_types:
-                type_str = ' '.join(valid_types)
+    for movie_id, movie_name, length, language, _, _ in valid_movies:
+        valid_types = types.get(movie_id)
+        type_str = ' '.join(valid_types) if valid_types else "N/A"
         movies_with_types.append((movie_id, movie_name, type_str, length, language))
     return render_template('validMovies.html', movies=movies_with_types)
 
@@ -726,46 +1087,23 @@ def getHalls():
     try:
         movie_id = int(movie_id_str)
         new_show_time_int = int(show_time_str)
+        show_date_obj = parse_show_date(show_date)
         len_query = "SELECT length FROM movies WHERE movie_id = %s"
         len_result = runQuery(len_query, (movie_id,), fetch_one=True)
         if not len_result or len_result[0] is None:
             return render_bulma_notification(f'Could not find movie length for ID {movie_id}.', 'is-danger')
-        movie_len_min = int(len_result[0])
-        new_start_min = (new_show_time_int // 100) * 60 + (new_show_time_int % 100)
-        new_end_min = new_start_min + movie_len_min
-        existing_shows_query = """
-            SELECT s.hall_id, m.length, s.time
-            FROM shows s
-            JOIN movies m ON s.movie_id = m.movie_id
-            WHERE s.Date = %s
-        """
-        existing_shows = runQuery(existing_shows_query, (show_date,))
-        if existing_shows is None:
+        new_start_min = time_to_minutes(new_show_time_int)
+        new_end_min = new_start_min + int(len_result[0])
+        free_halls = hall_schedule.free_halls(show_date_obj, new_start_min, new_end_min)
+        if free_halls is None:
             return render_bulma_notification('Error retrieving existing show schedule.', 'is-danger')
-        unavailable_halls = set()
-        for hall_id, existing_len_min, existing_time_int in existing_shows:
-            if existing_len_min is None or existing_time_int is None: continue
-            existing_start_min = (existing_time_int // 100) * 60 + (existing_time_int % 100)
-            existing_end_min = existing_start_min + int(existing_len_min)
-            if new_start_min < existing_end_min and new_end_min > existing_start_min:
-                unavailable_halls.add(hall_id)
-        all_halls_query = "SELECT DISTINCT hall_id, hall_name FROM halls"
-        all_halls_results = runQuery(all_halls_query)
-        if all_halls_results is None:
-            return render_bulma_notification('Error retrieving list of halls.', 'is-danger')
-        all_halls = { (row[0], row[1]) for row in all_halls_results }
-        available_halls_data = []
-        for hall_id, hall_name in all_halls:
-            if hall_id not in unavailable_halls:
-                available_halls_data.append({"id": hall_id, "name": hall_name})
-
-        if not available_halls_data:
+        if not free_halls:
             return render_bulma_notification('No Halls Available On Given Date And Time Slot', 'is-info')
-        
-        sorted_available_halls = sorted(available_halls_data, key=lambda x: x['id'])
-        return render_template('availableHalls.html', halls=sorted_available_halls)
+
+        available_halls_data = [{"id": hall_id, "name": hall_name} for hall_id, hall_name in free_halls]
+        return render_template('availableHalls.html', halls=available_halls_data)
     except ValueError:
-        return render_bulma_notification('Invalid numeric input for Movie ID or Time.', 'is-danger')
+        return render_bulma_notification('Invalid numeric input for Movie ID, Date or Time.', 'is-danger')
     except Exception as e:
         logging.error(f"Error getting available halls: {e}")
         return render_bulma_notification('An unexpected error occurred while checking hall availability.', 'is-danger')
@@ -784,48 +1122,399 @@ def insertShow():
         hall_id = int(hall_id_str)
         movie_id = int(movie_id_str)
         show_time = int(show_time_str)
-        show_id = None
-        attempts = 0
-        max_attempts = 10
-        while attempts < max_attempts:
-            show_id = generate_id()
-            check_id_query = "SELECT show_id FROM shows WHERE show_id = %s"
-            id_exists = runQuery(check_id_query, (show_id,), fetch_one=True)
-            if not id_exists: break
-            attempts += 1
-        else:
-            logging.error("Failed to generate a unique show ID.")
+        show_date_obj = parse_show_date(show_date)
+        try:
+            show_id = id_allocator.next_id('show')
+        except Error as e:
+            logging.error(f"Failed to allocate a show ID: {e}")
             return render_bulma_notification('Error generating unique show ID. Please try again.', 'is-danger')
         assigned_price_id = None
         insert_query = """
             INSERT INTO shows (show_id, movie_id, hall_id, type, time, Date, price_id)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        params = (show_id, movie_id, hall_id, movie_type, show_time, show_date, assigned_price_id)
-        insert_result = runQuery(insert_query, params)
-        if isinstance(insert_result, list):
-            return f'''
-                <div class="notification is-success is-light has-text-centered">
-                    <p class="is-size-5 has-text-weight-semibold mb-1">Show Successfully Scheduled</p>
-                    <p class="is-size-6">Show ID: <strong>{show_id}</strong></p>
-                </div>
-            '''
-        else:
-            logging.error(f"Show insertion failed for movie {movie_id} in hall {hall_id}. runQuery returned: {insert_result}")
-            return render_bulma_notification('Failed to schedule show. A database error occurred or there might be a conflict.', 'is-danger')
+        with transaction() as tx:
+            # The hall lock must be the first read: under REPEATABLE READ an earlier plain read would pin a snapshot
+            # taken before the previous holder committed its show.
+            lock_hall(tx, hall_id)
+            len_result = tx.fetch_one("SELECT length FROM movies WHERE movie_id = %s", (movie_id,))
+            if not len_result or len_result[0] is None:
+                raise ScheduleConflict(f'Could not find movie length for ID {movie_id}.')
+            new_start_min = time_to_minutes(show_time)
+            new_end_min = new_start_min + int(len_result[0])
+            hall_day = HallDay.from_intervals(hall_intervals(tx, hall_id, show_date_obj))
+            if hall_day.overlaps(new_start_min, new_end_min):
+                raise ScheduleConflict('This hall already has a show overlapping the selected time slot.')
+            params = (show_id, movie_id, hall_id, movie_type, show_time, show_date_obj, assigned_price_id)
+            tx.execute(insert_query, params)
+        hall_schedule.add_show(show_date_obj, hall_id, new_start_min, new_end_min)
+        cache_sync.publish('hall_schedule', show_date_obj.isoformat())
+        return f'''
+            <div class="notification is-success is-light has-text-centered">
+                <p class="is-size-5 has-text-weight-semibold mb-1">Show Successfully Scheduled</p>
+                <p class="is-size-6">Show ID: <strong>{show_id}</strong></p>
+            </div>
+        '''
+    except ScheduleConflict as e:
+        logging.warning(f"Show insertion rejected for movie {movie_id_str} in hall {hall_id_str}: {e}")
+        return render_bulma_notification(str(e), 'is-danger')
     except ValueError:
-        return render_bulma_notification('Invalid numeric input for Hall ID, Movie ID, or Time.', 'is-danger')
+        return render_bulma_notification('Invalid numeric input for Hall ID, Movie ID, Date or Time.', 'is-danger')
+    except Error as e:
+        logging.error(f"Show insertion failed for movie {movie_id_str} in hall {hall_id_str}: {e}")
+        return render_bulma_notification('Failed to schedule show. A database error occurred or there might be a conflict.', 'is-danger')
     except Exception as e:
         logging.error(f"Error during show insertion: {e}")
         return render_bulma_notification('An unexpected error occurred during show scheduling.', 'is-danger')
 
+INSERT_SHOW_QUERY = """
+    INSERT INTO shows (show_id, movie_id, hall_id, type, time, Date, price_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+def load_schedulable_movies(tx, movie_ids):
+    if not movie_ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(movie_ids))
+    query = f"""
+        SELECT m.movie_id, m.length, m.show_start, m.show_end, t.type1, t.type2, t.type3
+        FROM movies m
+        LEFT JOIN types t ON m.movie_id = t.movie_id
+        WHERE m.movie_id IN ({placeholders})
+    """
+    return {row[0]: row for row in tx.fetch_all(query, tuple(movie_ids))}
+
+def lock_hall_days(tx, hall_ids, start_date, end_date):
+    if not hall_ids:
+        return set(), {}
+    placeholders = ", ".join(["%s"] * len(hall_ids))
+    lock_halls_query = f"SELECT hall_id FROM halls WHERE hall_id IN ({placeholders}) ORDER BY hall_id FOR UPDATE"
+    existing_query = f"""
+        SELECT s.hall_id, s.Date, s.time, m.length
+        FROM shows s
+        JOIN movies m ON s.movie_id = m.movie_id
+        WHERE s.hall_id IN ({placeholders}) AND s.Date BETWEEN %s AND %s
+        LOCK IN SHARE MODE
+    """
+    # Callers take these locks before any other read, and the shows are read with a lock too, so the overlap
+    # check sees every show committed by the previous lock holder rather than an older snapshot.
+    locked_halls = {row[0] for row in tx.fetch_all(lock_halls_query, tuple(hall_ids))}
+    intervals = {}
+    for hall_id, show_date, time_int, length in tx.fetch_all(existing_query, tuple(hall_ids) + (start_date, end_date)):
+        if time_int is not None and length is not None:
+            intervals.setdefault((hall_id, show_date), []).append((time_to_minutes(time_int), time_to_minutes(time_int) + int(length)))
+    return locked_halls, {key: HallDay.from_intervals(iv) for key, iv in intervals.items()}
+
+def place_show(hall_days, locked_halls, movie, show_type, show_date, hall_id, time_int):
+    # movie follows load_schedulable_movies: movie_id, length, show_start, show_end, type1..type3.
+    if movie is None or movie[1] is None:
+        raise ScheduleConflict("Unknown movie.")
+    _, length, show_start, show_end, *types = movie
+    if show_type not in {t for t in types if t}:
+        raise ScheduleConflict(f"Movie is not available in {show_type}.")
+    if (show_start and show_date < show_start) or (show_end and show_date > show_end):
+        raise ScheduleConflict("Movie is not showing on this date.")
+    if hall_id not in locked_halls:
+        raise ScheduleConflict("Unknown hall.")
+    if not 0 <= time_int < 2400 or time_int % 100 >= 60:
+        raise ScheduleConflict("Invalid time.")
+    start_min = time_to_minutes(time_int)
+    end_min = start_min + int(length)
+    hall_day = hall_days.setdefault((hall_id, show_date), HallDay())
+    if hall_day.overlaps(start_min, end_min):
+        raise ScheduleConflict("Hall is already booked for this time slot.")
+    hall_day.add(start_min, end_min)
+    return start_min, end_min
+
+@app.route('/bulkSchedule', methods=['POST'])
+@login_required(role="manager")
+def bulkSchedule():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Invalid request format. JSON expected."}), 400
+    try:
+        start_date = parse_show_date(str(data.get('startDate', '')))
+        end_date = parse_show_date(str(data.get('endDate', '')))
+        slots = [
+            {"movie_id": int(slot['movieID']), "type": str(slot['type']).upper(), "hall_id": int(slot['hallID']), "time": int(slot['time'])}
+            for slot in data.get('slots') or []
+        ]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Expected startDate, endDate and slots of {movieID, type, hallID, time}."}), 400
+    if not slots:
+        return jsonify({"error": "No slots provided."}), 400
+    if end_date < start_date or (end_date - start_date).days >= MAX_SCHEDULE_DAYS:
+        return jsonify({"error": f"Date range must be ordered and at most {MAX_SCHEDULE_DAYS} days."}), 400
+
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    movie_ids = sorted({slot['movie_id'] for slot in slots})
+    hall_ids = sorted({slot['hall_id'] for slot in slots})
+
+    report = []
+    created = []
+    # Reserve IDs before taking the write lock: the allocator commits on its own connection, which SQLite would block.
+    show_ids = id_allocator.take('show', len(dates) * len(slots))
+    try:
+        with transaction() as tx:
+            locked_halls, hall_days = lock_hall_days(tx, hall_ids, start_date, end_date)
+            movies = load_schedulable_movies(tx, movie_ids)
+
+            for show_date in dates:
+                for slot in slots:
+                    entry = {"date": show_date.strftime('%Y-%m-%d'), "movieID": slot['movie_id'], "type": slot['type'], "hallID": slot['hall_id'], "time": slot['time']}
+                    report.append(entry)
+                    try:
+                        start_min, end_min = place_show(hall_days, locked_halls, movies.get(slot['movie_id']), slot['type'], show_date, slot['hall_id'], slot['time'])
+                    except ScheduleConflict as e:
+                        entry["status"], entry["reason"] = "rejected", str(e)
+                        continue
+                    created.append((entry, show_date, start_min, end_min))
+
+            rows = []
+            for show_id, (entry, show_date, _, _) in zip(show_ids, created):
+                entry["status"], entry["showID"] = "created", show_id
+                rows.append((show_id, entry["movieID"], entry["hallID"], entry["type"], entry["time"], show_date, None))
+            tx.execute_many(INSERT_SHOW_QUERY, rows)
+    except Error as e:
+        logging.error(f"Bulk scheduling failed and was rolled back: {e}")
+        return jsonify({"error": "Bulk scheduling failed due to a database error. No shows were created."}), 500
+
+    for entry, show_date, start_min, end_min in created:
+        hall_schedule.add_show(show_date, entry["hallID"], start_min, end_min)
+    for show_date in sorted({show_date for _, show_date, _, _ in created}):
+        cache_sync.publish('hall_schedule', show_date.isoformat())
+    logging.info(f"Bulk schedule created {len(created)} show(s), rejected {len(report) - len(created)}.")
+    return jsonify({"created": len(created), "rejected": len(report) - len(created), "slots": report})
+
+INSERT_MOVIE_QUERY = """
+    INSERT INTO movies (movie_id, movie_name, length, language, show_start, show_end)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+INSERT_TYPES_QUERY = "INSERT INTO types (movie_id, type1, type2, type3) VALUES (%s, %s, %s, %s)"
+
+class ImportRowError(Exception):
+    pass
+
+def import_cell(row, column):
+    return (row.get(column) or '').strip()
+
+def import_int(row, column):
+    try:
+        return int(import_cell(row, column))
+    except ValueError:
+        raise ImportRowError(f"{column} must be a whole number.")
+
+def import_date(row, column):
+    try:
+        return parse_show_date(import_cell(row, column))
+    except ValueError:
+        raise ImportRowError(f"{column} must be a date like 2025-05-01.")
+
+def parse_import_movie(row, known_formats):
+    name = import_cell(row, 'movie_name')
+    language = import_cell(row, 'language')
+    if not name or len(name) > 40:
+        raise ImportRowError("movie_name is required and must be at most 40 characters.")
+    if not language or len(language) > 10:
+        raise ImportRowError("language is required and must be at most 10 characters.")
+    length = import_int(row, 'length')
+    if length <= 0:
+        raise ImportRowError("length must be positive.")
+    formats = [f.upper() for f in import_cell(row, 'formats').replace(',', ' ').split()]
+    if not formats or len(formats) > 3:
+        raise ImportRowError("formats must list one to three formats, e.g. '2D 3D'.")
+    unknown = [f for f in formats if f not in known_formats]
+    if unknown:
+        raise ImportRowError(f"Unknown format(s): {', '.join(unknown)}.")
+    show_start = import_date(row, 'show_start')
+    show_end = import_date(row, 'show_end')
+    if show_end < show_start:
+        raise ImportRowError("show_end is before show_start.")
+    return {"name": name, "length": length, "language": language, "formats": tuple(formats), "show_start": show_start, "show_end": show_end}
+
+def import_schedule(stream, dry_run=False):
+    reader = csv.DictReader(stream)
+    columns = set(reader.fieldnames or ())
+    if not columns & {'movie_name', 'movie_id'}:
+        raise ValueError("The CSV needs a header row with a movie_name or movie_id column.")
+    movies = catalog.get('movies')
+    prices = catalog.get('price_listing')
+    if movies is None or prices is None:
+        raise ValueError("Could not load the movie catalog.")
+    known_formats = {row[1] for row in prices.values()}
+    existing_by_name = {}
+    for movie_id, movie_name, *_ in movies.values():
+        existing_by_name.setdefault(movie_name.strip().lower(), []).append(movie_id)
+
+    errors = []
+    new_movies = {}
+    show_rows = []
+    for row in reader:
+        if reader.line_num - 1 > MAX_IMPORT_ROWS:
+            raise ValueError(f"Imports are limited to {MAX_IMPORT_ROWS} rows.")
+        try:
+            defines_movie = bool(import_cell(row, 'length'))
+            has_show = bool(import_cell(row, 'date'))
+            if not defines_movie and not has_show:
+                raise ImportRowError("Row needs movie details (length, language, formats, show_start, show_end) or a show (date, time, hall_id, format).")
+            if defines_movie:
+                movie = parse_import_movie(row, known_formats)
+                key = movie["name"].lower()
+                if key in existing_by_name:
+                    raise ImportRowError(f"Movie '{movie['name']}' already exists (ID {existing_by_name[key][0]}); schedule it by movie_id instead.")
+                if new_movies.setdefault(key, movie) != movie:
+                    raise ImportRowError(f"Movie '{movie['name']}' is defined twice with different details.")
+            if has_show:
+                if import_cell(row, 'movie_id'):
+                    movie_ref = import_int(row, 'movie_id')
+                else:
+                    movie_ref = import_cell(row, 'movie_name').lower()
+                    if not movie_ref:
+                        raise ImportRowError("A show needs a movie_name or movie_id.")
+                show_rows.append((reader.line_num, movie_ref, import_date(row, 'date'), import_int(row, 'time'),
+                                  import_int(row, 'hall_id'), import_cell(row, 'format').upper()))
+        except ImportRowError as e:
+            errors.append({"row": reader.line_num, "error": str(e)})
+
+    existing_ids = set()
+    resolved_shows = []
+    for line, movie_ref, show_date, time_int, hall_id, show_type in show_rows:
+        if isinstance(movie_ref, str) and movie_ref not in new_movies:
+            matches = existing_by_name.get(movie_ref, [])
+            if len(matches) != 1:
+                reason = "No movie with this name." if not matches else "Several movies share this name; use movie_id."
+                errors.append({"row": line, "error": reason})
+                continue
+            movie_ref = matches[0]
+        if isinstance(movie_ref, int):
+            existing_ids.add(movie_ref)
+        resolved_shows.append((line, movie_ref, show_date, time_int, hall_id, show_type))
+
+    report = {"movies": len(new_movies), "shows": 0, "errors": errors, "dryRun": dry_run, "imported": False}
+    created_shows = []
+    # As in bulkSchedule, IDs are reserved before the transaction; rejected shows just leave gaps.
+    reserve = not dry_run and not errors
+    movie_ids = dict(zip(new_movies, id_allocator.take('movie', len(new_movies)))) if reserve and new_movies else {}
+    show_ids = id_allocator.take('show', len(resolved_shows)) if reserve and resolved_shows else []
+    with transaction() as tx:
+        # Hall locks come first, as in bulkSchedule, so no earlier read pins a stale snapshot of the schedule.
+        locked_halls, hall_days = set(), {}
+        if resolved_shows:
+            dates = [show_date for _, _, show_date, _, _, _ in resolved_shows]
+            hall_ids = sorted({hall_id for _, _, _, _, hall_id, _ in resolved_shows})
+            locked_halls, hall_days = lock_hall_days(tx, hall_ids, min(dates), max(dates))
+        schedulable = load_schedulable_movies(tx, sorted(existing_ids))
+        for key, movie in new_movies.items():
+            schedulable[key] = (None, movie["length"], movie["show_start"], movie["show_end"], *movie["formats"])
+        for line, movie_ref, show_date, time_int, hall_id, show_type in resolved_shows:
+            try:
+                start_min, end_min = place_show(hall_days, locked_halls, schedulable.get(movie_ref), show_type, show_date, hall_id, time_int)
+            except ScheduleConflict as e:
+                errors.append({"row": line, "error": str(e)})
+                continue
+            created_shows.append((movie_ref, show_date, time_int, hall_id, show_type, start_min, end_min))
+        report["shows"] = len(created_shows)
+        errors.sort(key=lambda error: error["row"])
+        if errors or dry_run:
+            return report
+
+        tx.execute_many(INSERT_MOVIE_QUERY, [
+            (movie_ids[key], m["name"], m["length"], m["language"], m["show_start"], m["show_end"])
+            for key, m in new_movies.items()
+        ])
+        tx.execute_many(INSERT_TYPES_QUERY, [
+            (movie_ids[key],) + tuple(m["formats"]) + (None,) * (3 - len(m["formats"]))
+            for key, m in new_movies.items()
+        ])
+        tx.execute_many(INSERT_SHOW_QUERY, [
+            (show_id, movie_ids.get(movie_ref, movie_ref), hall_id, show_type, time_int, show_date, None)
+            for show_id, (movie_ref, show_date, time_int, hall_id, show_type, _, _) in zip(show_ids, created_shows)
+        ])
+
+    report["imported"] = True
+    if new_movies:
+        catalog.invalidate('movies', 'types')
+        cache_sync.publish('catalog', 'movies,types')
+    for _, show_date, _, hall_id, _, start_min, end_min in created_shows:
+        hall_schedule.add_show(show_date, hall_id, start_min, end_min)
+    for show_date in sorted({show_date for _, show_date, _, _, _, _, _ in created_shows}):
+        cache_sync.publish('hall_schedule', show_date.isoformat())
+    report["movieIDs"] = {new_movies[key]["name"]: movie_id for key, movie_id in movie_ids.items()}
+    logging.info(f"Imported {len(new_movies)} movie(s) and {len(created_shows)} show(s).")
+    return report
+
+@app.route('/importSchedule', methods=['POST'])
+@login_required(role="manager")
+def importSchedule():
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8-sig') if upload else request.get_data(as_text=True)
+    if not text.strip():
+        return jsonify({"error": "Upload a CSV file as 'file' or send it as the request body."}), 400
+    try:
+        report = import_schedule(io.StringIO(text), dry_run=request.args.get('dryRun') == '1')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Error as e:
+        logging.error(f"Schedule import failed and was rolled back: {e}")
+        return jsonify({"error": "Import failed due to a database error. Nothing was imported."}), 500
+    return jsonify(report), (200 if not report["errors"] else 422)
+
+@app.route('/cacheStats', methods=['GET'])
+@login_required(role="manager")
+def cacheStats():
+    return jsonify({
+        "catalog": catalog.stats(),
+        "seat_availability": seat_availability.stats(),
+        "qr_codes": qr_cache.stats()
+    })
+
+@app.route('/slowQueries', methods=['GET'])
+@login_required(role="manager")
+def slowQueries():
+    return render_template('slowQueries.html', queries=slow_queries.top(), threshold=SLOW_QUERY_MS, dropped=slow_queries.dropped())
+
+@app.route('/jobs', methods=['GET'])
+@login_required(role="manager")
+def jobRuns():
+    try:
+        leader = scheduler.leader()
+        runs = scheduler.recent_runs()
+    except Error as e:
+        logging.error(f"Could not load job runs: {e}")
+        return render_bulma_notification('Error retrieving job history.', 'is-danger')
+    jobs = [
+        {"name": job.name, "schedule": str(job.schedule), "running": job.running,
+         "next_run": job.next_run.strftime('%Y-%m-%d %H:%M') if scheduler.is_leader and job.next_run else None}
+        for job in scheduler.jobs.values()
+    ]
+    return render_template('jobs.html', jobs=jobs, runs=runs, leader=leader, enabled=scheduler.enabled, is_leader=scheduler.is_leader)
+
+@app.route('/metrics', methods=['GET'])
+def metricsEndpoint():
+    token_ok = METRICS_TOKEN and request.headers.get('Authorization') == f"Bearer {METRICS_TOKEN}"
+    if not token_ok and session.get('user_role') != 'manager':
+        return "Access Denied: You do not have permission to access this page.", 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/refreshHalls', methods=['POST'])
+@login_required(role="manager")
+def refreshHalls():
+    hall_id_str = request.form.get('hallID')
+    try:
+        hall_id = int(hall_id_str) if hall_id_str else None
+    except ValueError:
+        return render_bulma_notification('Invalid Hall ID format.', 'is-danger')
+    refresh_hall_layouts(hall_id)
+    cache_sync.publish('halls', hall_id or '')
+    return render_bulma_notification('Hall seat layouts will be rebuilt on next use.', 'is-success')
+
 @app.route('/getPriceList', methods=['GET'])
 @login_required(role="manager")
 def priceList():
-    query = "SELECT price_id, type, day, price FROM price_listing"
-    results = runQuery(query)
-    if results is None:
+    prices = catalog.get('price_listing')
+    if prices is None:
         return render_bulma_notification('Error retrieving price list.', 'is-danger')
+    results = list(prices.values())
     day_order = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
     sorted_results = []
     try:
@@ -849,6 +1538,8 @@ def setPrice():
             return render_bulma_notification('Price cannot be negative.', 'is-danger')
         update_query = "UPDATE price_listing SET price = %s WHERE price_id = %s"
         update_result = runQuery(update_query, (new_price, price_id))
+        catalog.invalidate('price_listing')
+        cache_sync.publish('catalog', 'price_listing')
         if isinstance(update_result, list):
             gold_price = int(new_price * 1.5)
             return f'''
@@ -867,6 +1558,13 @@ def setPrice():
         logging.error(f"Error updating price {price_id_str}: {e}")
         return render_bulma_notification('An unexpected error occurred while updating the price.', 'is-danger')
     
+BOOKINGS_BY_DATE_QUERY = """
+    SELECT booking_ref, customer_name, customer_phone, movie_name, show_time, show_id, hall_name, tickets
+    FROM booking_sales
+    WHERE show_date = %s
+    ORDER BY show_time, booking_ref
+"""
+
 @app.route('/getBookingsByDate', methods=['POST'])
 @login_required(role="manager")
 def getBookingsByDate():
@@ -885,28 +1583,7 @@ def getBookingsByDate():
         logging.error(f"Invalid date format received for booking lookup: {show_date_str}")
         return render_bulma_notification('Invalid date format. Please use YYYY/MM/DD or YYYY-MM-DD.', 'is-danger')
 
-    query = """
-        SELECT
-            b.booking_ref,         
-            c.customer_name,      
-            c.customer_phone,     
-            m.movie_name,          
-            s.time,                
-            s.show_id,             
-            h.hall_name,           
-            COUNT(DISTINCT bt.ticket_no) as num_tickets 
-        FROM bookings b            
-        JOIN customers c ON b.customer_id = c.customer_id 
-        JOIN booked_tickets bt ON b.booking_ref = bt.booking_ref 
-        JOIN shows s ON bt.show_id = s.show_id         
-        JOIN movies m ON s.movie_id = m.movie_id         
-        JOIN halls h ON s.hall_id = h.hall_id            
-        WHERE s.Date = %s         
-        GROUP BY b.booking_ref, c.customer_name, c.customer_phone, s.show_id, m.movie_name, s.time, h.hall_name
-        ORDER BY s.time, b.booking_ref
-    """
-
-    results = runQuery(query, (show_date_sql,))
+    results = runQuery(BOOKINGS_BY_DATE_QUERY, (show_date_sql,))
 
     if results is None:
         return render_bulma_notification('Error retrieving booking data.', 'is-danger')
@@ -930,72 +1607,250 @@ def getBookingsByDate():
 
     return render_template('groupedBookings.html', bookings=bookings_formatted, booking_date=show_date_sql)
 
-def db_no_to_seat_code(seat_db_no):
-    if seat_db_no is None:
-        return "N/A"
-
-    seat_class = 'standard'
-    relative_seat_no = seat_db_no
-
+DAILY_SALES_RANGE_QUERY = """
+    SELECT sales_date, bookings, tickets, gold_tickets, standard_tickets, gross, gst
+    FROM daily_sales
+    WHERE sales_date BETWEEN %s AND %s
+    ORDER BY sales_date
+"""
+MOVIE_SALES_RANGE_QUERY = """
+    SELECT movie_id, movie_name, COUNT(*), SUM(tickets), SUM(gross), SUM(gst)
+    FROM show_sales
+    WHERE show_date BETWEEN %s AND %s
+    GROUP BY movie_id, movie_name
+    ORDER BY SUM(gross) DESC
+"""
+SCHEDULED_HALLS_QUERY = """
+    SELECT Date, hall_id, COUNT(*)
+    FROM shows
+    WHERE Date BETWEEN %s AND %s
+    GROUP BY Date, hall_id
+    UNION ALL
+    SELECT Date, hall_id, COUNT(*)
+    FROM shows_archive
+    WHERE Date BETWEEN %s AND %s
+    GROUP BY Date, hall_id
+"""
+
+@app.route('/salesReport', methods=['GET'])
+@login_required(role="manager")
+def salesReport():
+    try:
+        start_date = parse_show_date(request.args.get('start') or '')
+        end_date = parse_show_date(request.args.get('end') or '')
+    except ValueError:
+        return render_bulma_notification('Invalid date range.', 'is-danger')
+    if end_date < start_date:
+        return render_bulma_notification('The end date is before the start date.', 'is-warning')
+    if (end_date - start_date).days >= MAX_REPORT_DAYS:
+        return render_bulma_notification(f'Reports can cover at most {MAX_REPORT_DAYS} days.', 'is-warning')
+
+    days = runQuery(DAILY_SALES_RANGE_QUERY, (start_date, end_date))
+    movies = runQuery(MOVIE_SALES_RANGE_QUERY, (start_date, end_date))
+    scheduled = runQuery(SCHEDULED_HALLS_QUERY, (start_date, end_date, start_date, end_date))
+    if days is None or movies is None or scheduled is None:
+        return render_bulma_notification('Error retrieving sales data.', 'is-danger')
+
+    capacity = {}
+    for show_date, hall_id, show_count in scheduled:
+        layout = hall_layouts.get(hall_id)
+        if layout is not None:
+            capacity[show_date] = capacity.get(show_date, 0) + layout.capacity * show_count
+
+    day_rows = []
+    totals = {"bookings": 0, "tickets": 0, "gold": 0, "standard": 0, "gross": 0, "gst": 0, "capacity": 0}
+    for sales_date, bookings, tickets, gold, standard, gross, gst in days:
+        seats = capacity.get(sales_date)
+        day_rows.append({
+            "date": sales_date.strftime('%Y-%m-%d'),
+            "bookings": bookings,
+            "tickets": tickets,
+            "gold": gold,
+            "standard": standard,
+            "gross": round(float(gross), 2),
+            "gst": round(float(gst), 2),
+            "occupancy": round(tickets * 100 / seats, 1) if seats else None
+        })
+        for key, value in (("bookings", bookings), ("tickets", tickets), ("gold", gold), ("standard", standard), ("gross", float(gross)), ("gst", float(gst))):
+            totals[key] += value
+        totals["capacity"] += seats or 0
+    totals["gross"] = round(totals["gross"], 2)
+    totals["gst"] = round(totals["gst"], 2)
+    totals["occupancy"] = round(totals["tickets"] * 100 / totals["capacity"], 1) if totals["capacity"] else None
+
+    movie_rows = [
+        {"name": movie_name or f"Movie {movie_id}", "shows": show_count, "tickets": tickets, "gross": round(float(gross), 2), "gst": round(float(gst), 2)}
+        for movie_id, movie_name, show_count, tickets, gross, gst in movies
+    ]
+    return render_template('salesReport.html', days=day_rows, movies=movie_rows, totals=totals,
+                           start_date=start_date.strftime('%Y-%m-%d'), end_date=end_date.strftime('%Y-%m-%d'))
+
+TICKET_DETAILS_QUERY = """
+    SELECT
+        bt.ticket_no, bt.seat_no,
+        b.booking_time,
+        c.customer_name, c.customer_phone,
+        s.Date, s.time, s.type as show_type, s.show_id,
+        m.movie_name, m.length,
+        h.hall_id, h.hall_name,
+        s.price_id,
+        bt.booking_ref, b.base_price
+    FROM booked_tickets bt
+    JOIN bookings b ON bt.booking_ref = b.booking_ref
+    JOIN customers c ON b.customer_id = c.customer_id
+    JOIN shows s ON bt.show_id = s.show_id
+    JOIN movies m ON s.movie_id = m.movie_id
+    JOIN halls h ON s.hall_id = h.hall_id
+"""
+ARCHIVED_TICKET_DETAILS_QUERY = """
+    SELECT
+        bt.ticket_no, bt.seat_no,
+        b.booking_time,
+        c.customer_name, c.customer_phone,
+        s.Date, s.time, s.type as show_type, s.show_id,
+        s.movie_name, s.movie_length,
+        h.hall_id, h.hall_name,
+        s.price_id,
+        bt.booking_ref, b.base_price
+    FROM booked_tickets_archive bt
+    JOIN bookings_archive b ON bt.booking_ref = b.booking_ref
+    JOIN customers c ON b.customer_id = c.customer_id
+    JOIN shows_archive s ON bt.show_id = s.show_id
+    JOIN halls h ON s.hall_id = h.hall_id
+"""
+
+def seat_price(base_price, seat_db_no):
+    if base_price is None:
+        return 0
     if seat_db_no > GOLD_SEAT_THRESHOLD:
-        seat_class = 'gold'
-        relative_seat_no = seat_db_no - GOLD_SEAT_THRESHOLD
-
-    if relative_seat_no <= 0:
-        return "Invalid"
-
-    seat_index_0 = relative_seat_no - 1
-
-    row_index = seat_index_0 // SEATS_PER_ROW
-    col_index = seat_index_0 % SEATS_PER_ROW
-
-    row_letter = chr(ord('A') + row_index)
-    col_number = col_index + 1
-
-    return f"{row_letter}{col_number}"
-    
-@app.route('/ticket/<string:booking_ref>')
-@login_required(role="any")
-def show_ticket(booking_ref):
+        return int(base_price * 1.5)
+    return base_price
+
+def gst_breakdown(base_price, pre_tax_total):
+    if base_price is None:
+        return 0, 0, 0, pre_tax_total
+    gst_rate_total = 0.18 if base_price > 100 else 0.12
+    half_rate = gst_rate_total / 2
+    cgst_amount = round(pre_tax_total * half_rate, 2)
+    sgst_amount = round(pre_tax_total * half_rate, 2)
+    return half_rate, cgst_amount, sgst_amount, round(pre_tax_total + cgst_amount + sgst_amount, 2)
+
+# Bookings made before base_price was stored fall back to the show's current price.
+SALE_SHOW_QUERY = """
+    SELECT s.Date, s.time, s.movie_id, m.movie_name, s.hall_id, h.hall_name, COALESCE(b.base_price, p.price)
+    FROM shows s
+    JOIN movies m ON s.movie_id = m.movie_id
+    JOIN halls h ON s.hall_id = h.hall_id
+    JOIN bookings b ON b.booking_ref = %s
+    LEFT JOIN price_listing p ON s.price_id = p.price_id
+    WHERE s.show_id = %s
+"""
+ARCHIVED_SALE_SHOW_QUERY = """
+    SELECT s.Date, s.time, s.movie_id, s.movie_name, s.hall_id, h.hall_name, COALESCE(b.base_price, p.price)
+    FROM shows_archive s
+    JOIN halls h ON s.hall_id = h.hall_id
+    JOIN bookings_archive b ON b.booking_ref = %s
+    LEFT JOIN price_listing p ON s.price_id = p.price_id
+    WHERE s.show_id = %s
+"""
+BOOKING_SALES_INSERT = """
+    INSERT INTO booking_sales
+    (booking_ref, show_id, show_date, show_time, movie_name, hall_name, customer_name, customer_phone, tickets, gold_tickets, standard_tickets, gross, gst)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+SHOW_SALES_UPSERT = """
+    INSERT INTO show_sales
+    (show_id, show_date, movie_id, movie_name, hall_id, bookings, tickets, gold_tickets, standard_tickets, gross, gst)
+    VALUES (%s, %s, %s, %s, %s, 1, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE bookings = bookings + 1, tickets = tickets + VALUES(tickets),
+        gold_tickets = gold_tickets + VALUES(gold_tickets), standard_tickets = standard_tickets + VALUES(standard_tickets),
+        gross = ROUND(gross + VALUES(gross), 2), gst = ROUND(gst + VALUES(gst), 2)
+"""
+DAILY_SALES_UPSERT = """
+    INSERT INTO daily_sales
+    (sales_date, bookings, tickets, gold_tickets, standard_tickets, gross, gst)
+    VALUES (%s, 1, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE bookings = bookings + 1, tickets = tickets + VALUES(tickets),
+        gold_tickets = gold_tickets + VALUES(gold_tickets), standard_tickets = standard_tickets + VALUES(standard_tickets),
+        gross = ROUND(gross + VALUES(gross), 2), gst = ROUND(gst + VALUES(gst), 2)
+"""
+
+def record_booking_sales(tx, booking_ref, show_id, customer_name, customer_phone, seat_nos, show_query=SALE_SHOW_QUERY):
+    show = tx.fetch_one(show_query, (booking_ref, show_id))
+    if show is None:
+        raise BookingError(f'Show {show_id} not found.')
+    show_date, show_time, movie_id, movie_name, hall_id, hall_name, base_price = show
+    gross = sum(seat_price(base_price, seat_no) for seat_no in seat_nos)
+    _, cgst_amount, sgst_amount, _ = gst_breakdown(base_price, gross)
+    gst = round(cgst_amount + sgst_amount, 2)
+    gold = sum(1 for seat_no in seat_nos if seat_no > GOLD_SEAT_THRESHOLD)
+    standard = len(seat_nos) - gold
+    tx.execute(BOOKING_SALES_INSERT, (booking_ref, show_id, show_date, show_time, movie_name, hall_name,
+                                      customer_name, customer_phone, len(seat_nos), gold, standard, gross, gst))
+    tx.execute(SHOW_SALES_UPSERT, (show_id, show_date, movie_id, movie_name, hall_id, len(seat_nos), gold, standard, gross, gst))
+    # The day row is shared by every counter, so it is touched last to keep its lock as short as possible.
+    tx.execute(DAILY_SALES_UPSERT, (show_date, len(seat_nos), gold, standard, gross, gst))
+
+BOOKING_PRICES_BACKFILL = """
+    UPDATE {bookings} SET base_price = (
+        SELECT p.price
+        FROM {tickets} bt
+        JOIN {shows} s ON bt.show_id = s.show_id
+        JOIN price_listing p ON s.price_id = p.price_id
+        WHERE bt.booking_ref = {bookings}.booking_ref
+        LIMIT 1
+    )
+    WHERE base_price IS NULL
+"""
+
+def backfill_booking_prices():
+    # Prices charged before migration 9 weren't kept; the current price list is the best record of them.
+    with transaction() as tx:
+        tx.execute(BOOKING_PRICES_BACKFILL.format(bookings='bookings', tickets='booked_tickets', shows='shows'))
+        tx.execute(BOOKING_PRICES_BACKFILL.format(bookings='bookings_archive', tickets='booked_tickets_archive', shows='shows_archive'))
+
+def rebuild_sales_rollups():
     query = """
-        SELECT
-            bt.ticket_no, bt.seat_no,
-            b.booking_time,
-            c.customer_name, c.customer_phone,
-            s.Date, s.time, s.type as show_type, s.show_id,
-            m.movie_name, m.length,
-            h.hall_id, h.hall_name,
-            pl.price as base_standard_price
-        FROM booked_tickets bt
-        JOIN bookings b ON bt.booking_ref = b.booking_ref
+        SELECT bt.booking_ref, bt.show_id, c.customer_name, c.customer_phone, bt.seat_no
+        FROM {tickets} bt
+        JOIN {bookings} b ON bt.booking_ref = b.booking_ref
         JOIN customers c ON b.customer_id = c.customer_id
-        JOIN shows s ON bt.show_id = s.show_id
-        JOIN movies m ON s.movie_id = m.movie_id
-        JOIN halls h ON s.hall_id = h.hall_id
-        LEFT JOIN price_listing pl ON s.price_id = pl.price_id
-        WHERE bt.booking_ref = %s
-        ORDER BY bt.seat_no
+        ORDER BY bt.booking_ref, bt.seat_no
     """
-
-    results = runQuery(query, (booking_ref,))
-
-    if not results:
-        return render_template('ticket.html', data=None, error="Ticket not found or invalid reference.")
-
+    sources = (
+        ('booked_tickets', 'bookings', SALE_SHOW_QUERY),
+        ('booked_tickets_archive', 'bookings_archive', ARCHIVED_SALE_SHOW_QUERY),
+    )
+    ticket_count = 0
+    with transaction() as tx:
+        for table in ('booking_sales', 'show_sales', 'daily_sales'):
+            tx.execute(f"DELETE FROM {table}")
+        for tickets_table, bookings_table, show_query in sources:
+            rows = tx.fetch_all(query.format(tickets=tickets_table, bookings=bookings_table))
+            for (booking_ref, show_id, customer_name, customer_phone), seats in groupby(rows, key=lambda row: row[:4]):
+                record_booking_sales(tx, booking_ref, show_id, customer_name, customer_phone, [row[4] for row in seats], show_query)
+            ticket_count += len(rows)
+    logging.info(f"Rebuilt sales rollups from {ticket_count} booked ticket(s).")
+
+def price_booking(booking_ref, results, prices):
     ticket_data = {
         "booking_ref": booking_ref,
         "tickets": [],
         "show_info": None,
-        "qr_code_data": None,
+        "qr_code_url": None,
         "pricing_info": None
     }
     total_pre_tax_price = 0
     processed_ticket_nos = set()
-    qr_code_content_list = []
+    layout = hall_layouts.get(results[0][11])
     base_price_for_gst_calc = None
 
     for row in results:
-        (ticket_no, seat_db_no, booking_time, cust_name, cust_phone, show_date, show_time_int, show_type, show_id, movie_name, movie_len, hall_id, hall_name, base_price) = row
+        (ticket_no, seat_db_no, booking_time, cust_name, cust_phone, show_date, show_time_int, show_type, show_id, movie_name, movie_len, hall_id, hall_name, price_id) = row[:14]
+        base_price = row[15]
+        if base_price is None:
+            price_row = prices.get(price_id)
+            base_price = price_row[3] if price_row else None
 
         if ticket_no in processed_ticket_nos:
             continue
@@ -1015,85 +1870,366 @@ def show_ticket(booking_ref):
                  "booking_time": booking_time.strftime('%Y-%m-%d %H:%M:%S') if booking_time else "N/A"
              }
 
-        seat_code_display = db_no_to_seat_code(seat_db_no)
-        seat_class = 'Standard'
-        ticket_pre_tax_price = base_price if base_price is not None else 0
-        if seat_db_no > GOLD_SEAT_THRESHOLD:
-             seat_class = 'Gold'
-             if base_price is not None:
-                ticket_pre_tax_price = int(base_price * 1.5)
+        seat_code_display = layout.seat_code(seat_db_no) if layout else db_no_to_seat_code(seat_db_no)
+        seat_class = 'Gold' if seat_db_no > GOLD_SEAT_THRESHOLD else 'Standard'
+        ticket_pre_tax_price = seat_price(base_price, seat_db_no)
 
-        seat_display_str = f"{seat_code_display}({seat_class[0]})"
         ticket_info = {
             "ticket_no": ticket_no,
             "seat_display": f"{seat_code_display} ({seat_class})",
+            "seat_code": seat_code_display,
             "price": ticket_pre_tax_price,
             "class": seat_class
         }
         ticket_data["tickets"].append(ticket_info)
-        qr_code_content_list.append(f"T{ticket_no}:S-{seat_display_str}")
 
         total_pre_tax_price += ticket_pre_tax_price
         processed_ticket_nos.add(ticket_no)
 
-    cgst_rate = 0
-    sgst_rate = 0
-    cgst_amount = 0
-    sgst_amount = 0
-    final_total_price = total_pre_tax_price
-
-    if base_price_for_gst_calc is not None:
-         if base_price_for_gst_calc > 100:
-             gst_rate_total = 0.18
-         else:
-             gst_rate_total = 0.12
-
-         cgst_rate = gst_rate_total / 2
-         sgst_rate = gst_rate_total / 2
-
-         cgst_amount = round(total_pre_tax_price * cgst_rate, 2)
-         sgst_amount = round(total_pre_tax_price * sgst_rate, 2)
-         final_total_price = round(total_pre_tax_price + cgst_amount + sgst_amount, 2)
+    half_rate, cgst_amount, sgst_amount, final_total_price = gst_breakdown(base_price_for_gst_calc, total_pre_tax_price)
 
     ticket_data["pricing_info"] = {
         "pre_tax_total": round(total_pre_tax_price, 2),
-        "cgst_rate_percent": int(cgst_rate * 100),
+        "cgst_rate_percent": int(half_rate * 100),
         "cgst_amount": cgst_amount,
-        "sgst_rate_percent": int(sgst_rate * 100),
+        "sgst_rate_percent": int(half_rate * 100),
         "sgst_amount": sgst_amount,
         "final_total": final_total_price
     }
+    return ticket_data
 
+def build_ticket_data(booking_ref, results, prices):
+    ticket_data = price_booking(booking_ref, results, prices)
     if ticket_data["show_info"]:
-        qr_data_string = f"Ref:{booking_ref}\n"
-        qr_data_string += f"Show:{ticket_data['show_info']['show_id']}\n"
-        qr_data_string += f"Date:{ticket_data['show_info']['date']}\n"
-        qr_data_string += ";".join(qr_code_content_list)
+        ticket_data["qr_code_url"] = url_for('ticket_qr', booking_ref=booking_ref)
+    return ticket_data
+
+def db_no_to_seat_code(seat_db_no):
+    if seat_db_no is None:
+        return "N/A"
+
+    seat_class = 'standard'
+    relative_seat_no = seat_db_no
+
+    if seat_db_no > GOLD_SEAT_THRESHOLD:
+        seat_class = 'gold'
+        relative_seat_no = seat_db_no - GOLD_SEAT_THRESHOLD
+
+    if relative_seat_no <= 0:
+        return "Invalid"
+
+    seat_index_0 = relative_seat_no - 1
+
+    row_index = seat_index_0 // SEATS_PER_ROW
+    col_index = seat_index_0 % SEATS_PER_ROW
+
+    row_letter = chr(ord('A') + row_index)
+    col_number = col_index + 1
+
+    return f"{row_letter}{col_number}"
+    
+@app.route('/ticket/<string:booking_ref>')
+@login_required(role="any")
+def show_ticket(booking_ref):
+    query = TICKET_DETAILS_QUERY + """
+        WHERE bt.booking_ref = %s
+        ORDER BY bt.seat_no
+    """
+
+    results = runQuery(query, (booking_ref,))
+
+    if not results:
+        return render_template('ticket.html', data=None, error="Ticket not found or invalid reference.")
+    prices = catalog.get('price_listing')
+    if prices is None:
+        return render_template('ticket.html', data=None, error="Error retrieving price information.")
+
+    return render_template('ticket.html', data=build_ticket_data(booking_ref, results, prices))
 
+@app.route('/printTickets', methods=['GET'])
+@login_required(role="any")
+def printTickets():
+    show_id_str = request.args.get('showID')
+    refs_str = request.args.get('bookingRefs', '')
+    booking_refs = [ref.strip() for ref in refs_str.split(',') if ref.strip()]
+    if show_id_str:
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=6,
-                border=4,
-            )
-            qr.add_data(qr_data_string)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill_color="black", back_color="white")
-
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG")
-            buffer.seek(0)
+            show_id = int(show_id_str)
+        except ValueError:
+            return render_template('ticket.html', data=None, error="Invalid Show ID format.")
+        query = TICKET_DETAILS_QUERY + """
+            WHERE bt.show_id = %s
+            ORDER BY bt.booking_ref, bt.seat_no
+        """
+        params = (show_id,)
+        batch_label = f"Show {show_id}"
+    elif booking_refs:
+        if len(booking_refs) > MAX_PRINT_BATCH:
+            return render_template('ticket.html', data=None, error=f"At most {MAX_PRINT_BATCH} bookings can be printed at once.")
+        placeholders = ", ".join(["%s"] * len(booking_refs))
+        query = TICKET_DETAILS_QUERY + f"""
+            WHERE bt.booking_ref IN ({placeholders})
+            ORDER BY bt.booking_ref, bt.seat_no
+        """
+        params = tuple(booking_refs)
+        batch_label = f"{len(booking_refs)} Bookings"
+    else:
+        return render_template('ticket.html', data=None, error="Provide a showID or a comma-separated list of bookingRefs.")
+
+    results = runQuery(query, params)
+    prices = catalog.get('price_listing')
+    if results is None or prices is None:
+        return render_template('ticket.html', data=None, error="Error retrieving ticket data.")
+    if not results:
+        return render_template('ticket.html', data=None, error="No tickets found for this selection.")
 
-            img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            ticket_data["qr_code_data"] = f"data:image/png;base64,{img_base64}"
+    grouped = [(booking_ref, list(rows)) for booking_ref, rows in groupby(results, key=lambda row: row[14])]
+    for booking_ref, rows in grouped:
+        qr_cache.prefetch(booking_ref, payload=build_qr_payload(booking_ref, rows))
 
-        except Exception as e:
-            logging.error(f"Failed to generate QR code for booking {booking_ref}: {e}")
-            ticket_data["qr_code_data"] = None 
+    tickets = (build_ticket_data(booking_ref, rows, prices) for booking_ref, rows in grouped)
+    return Response(stream_with_context(stream_template('batchTickets.html', tickets=tickets, batch_label=batch_label)))
+
+@app.route('/ticket/<string:booking_ref>/qr.png')
+@login_required(role="any")
+def ticket_qr(booking_ref):
+    try:
+        entry = qr_cache.get(booking_ref)
+    except Exception as e:
+        logging.error(f"Failed to generate QR code for booking {booking_ref}: {e}")
+        return "QR code could not be generated.", 500
+    if entry is None:
+        return "Ticket not found.", 404
+    etag, png = entry
+    response = Response(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+# One page of a show date's tickets after the (booking_ref, seat_no) key; a UNION can only be ordered by result
+# position portably.
+EXPORT_PAGE_FILTER = """
+    WHERE s.Date = %s AND (bt.booking_ref > %s OR (bt.booking_ref = %s AND bt.seat_no > %s))
+"""
+EXPORT_QUERY = (TICKET_DETAILS_QUERY + EXPORT_PAGE_FILTER + "UNION ALL" + ARCHIVED_TICKET_DETAILS_QUERY
+                + EXPORT_PAGE_FILTER + "ORDER BY 15, 2 LIMIT %s")
+EXPORT_COLUMNS = (
+    'booking_ref', 'booking_time', 'show_date', 'show_time', 'show_id', 'movie', 'format', 'hall',
+    'customer_name', 'customer_phone', 'line', 'ticket_no', 'seat', 'seat_class', 'rate_percent', 'amount'
+)
+EXPORT_CHUNK_ROWS = 200
+EXPORT_PAGE_ROWS = 1000
+
+def export_rows(start_date, end_date):
+    # Short buffered reads, one keyed page at a time, so a slow download never holds a connection or a cursor.
+    show_date = start_date
+    while show_date <= end_date:
+        booking_ref, seat_no = '', -1
+        while True:
+            key = (show_date, booking_ref, booking_ref, seat_no)
+            with db_pool.connection() as conn:
+                rows = conn.run(EXPORT_QUERY, key + key + (EXPORT_PAGE_ROWS,)).rows
+            yield from rows
+            if len(rows) < EXPORT_PAGE_ROWS:
+                break
+            booking_ref, seat_no = rows[-1][14], rows[-1][1]
+        show_date += timedelta(days=1)
+
+def export_records(start_date, end_date, prices):
+    rows = export_rows(start_date, end_date)
+    for booking_ref, booking_rows in groupby(rows, key=lambda row: row[14]):
+        ticket_data = price_booking(booking_ref, list(booking_rows), prices)
+        show_info, pricing = ticket_data["show_info"], ticket_data["pricing_info"]
+        booking = {
+            "booking_ref": booking_ref,
+            "booking_time": show_info["booking_time"],
+            "show_date": show_info["date"],
+            "show_time": show_info["time"],
+            "show_id": show_info["show_id"],
+            "movie": show_info["movie_name"],
+            "format": show_info["show_type"],
+            "hall": show_info["hall_name"],
+            "customer_name": show_info["customer_name"],
+            "customer_phone": show_info["customer_phone"]
+        }
+        for ticket in ticket_data["tickets"]:
+            yield dict(booking, line='ticket', ticket_no=ticket["ticket_no"], seat=ticket["seat_code"],
+                       seat_class=ticket["class"], rate_percent=None, amount=ticket["price"])
+        yield dict(booking, line='cgst', ticket_no=None, seat=None, seat_class=None,
+                   rate_percent=pricing["cgst_rate_percent"], amount=pricing["cgst_amount"])
+        yield dict(booking, line='sgst', ticket_no=None, seat=None, seat_class=None,
+                   rate_percent=pricing["sgst_rate_percent"], amount=pricing["sgst_amount"])
+
+def export_chunks(records, export_format):
+    buffer = io.StringIO()
+    if export_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        write = lambda record: writer.writerow([record[column] for column in EXPORT_COLUMNS])
+    else:
+        write = lambda record: buffer.write(json.dumps(record, default=str) + '\n')
+    pending = 0
+    for record in records:
+        write(record)
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def parse_export_range(start_str, end_str):
+    start_date = parse_show_date(start_str or '')
+    end_date = parse_show_date(end_str or '')
+    if end_date < start_date:
+        raise ValueError('The end date is before the start date.')
+    if (end_date - start_date).days >= MAX_REPORT_DAYS:
+        raise ValueError(f'Exports can cover at most {MAX_REPORT_DAYS} days.')
+    return start_date, end_date
+
+@app.route('/exportBookings', methods=['GET'])
+@login_required(role="manager")
+def exportBookings():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'jsonl'):
+        return jsonify({"error": "format must be csv or jsonl."}), 400
+    try:
+        start_date, end_date = parse_export_range(request.args.get('start'), request.args.get('end'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    prices = catalog.get('price_listing')
+    if prices is None:
+        return jsonify({"error": "Error retrieving price information."}), 500
 
-    return render_template('ticket.html', data=ticket_data)
+    def generate():
+        try:
+            yield from export_chunks(export_records(start_date, end_date, prices), export_format)
+        except Error as e:
+            # Headers are already sent; re-raising aborts the response so the client sees a failed download, not a short file.
+            logging.error(f"Booking export {start_date}..{end_date} aborted: {e}")
+            raise
+
+    filename = f"bookings_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{export_format}"
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+def archive_old_records(max_seconds=None):
+    cutoff = datetime.now().date() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    report = archiver.run(cutoff, max_seconds)
+    if report["movies"]:
+        catalog.invalidate('movies', 'types')
+        cache_sync.publish('catalog', 'movies,types')
+    return report
+
+def query_plan_checks():
+    today = datetime.now().date()
+    return (
+        ('getMoviesShowingOnDate', MOVIES_ON_DATE_QUERY, (today,)),
+        ('getTimings', TIMINGS_QUERY, (today, 0, '2D')),
+        ('getShowID', SHOW_ID_QUERY, (today, 0, '2D', 0)),
+        ('getDaySchedule', DAY_SCHEDULE_QUERY, (today,)),
+        ('getShowsShowingOnDate', SHOWS_ON_DATE_QUERY, (today,)),
+        ('getBookingsByDate', BOOKINGS_BY_DATE_QUERY, (today,)),
+        ('salesReport', DAILY_SALES_RANGE_QUERY, (today, today)),
+        ('salesReport (movies)', MOVIE_SALES_RANGE_QUERY, (today, today)),
+        ('salesReport (capacity)', SCHEDULED_HALLS_QUERY, (today, today, today, today)),
+        ('exportBookings', EXPORT_QUERY, (today, '', '', -1) * 2 + (EXPORT_PAGE_ROWS,)),
+        ('ticket', TICKET_DETAILS_QUERY + " WHERE bt.booking_ref = %s ORDER BY bt.seat_no", ('',)),
+        ('set_show_price_on_insert', "SELECT price_id FROM price_listing WHERE type = %s AND day = %s LIMIT 1", ('2D', 'Monday')),
+    )
+
+@app.cli.command('migrate')
+@click.option('--status', is_flag=True, help='List pending migrations without applying them.')
+def migrateSchema(status):
+    if status:
+        for migration in pending_migrations(db_pool):
+            click.echo(f"pending {migration.version}: {migration.description}")
+        return
+    applied = migrate(db_pool, backfills={'sales_rollups': rebuild_sales_rollups, 'booking_prices': backfill_booking_prices})
+    for migration in applied:
+        click.echo(f"applied {migration.version}: {migration.description}")
+    if not applied:
+        click.echo("Schema is up to date.")
+
+@app.cli.command('rebuild-sales')
+def rebuildSales():
+    rebuild_sales_rollups()
+    click.echo("Sales rollups rebuilt.")
+
+@app.cli.command('archive-old-records')
+@click.option('--max-seconds', type=float, default=None, help='Stop after this long; the next run picks up where it left off. 0 runs to completion.')
+def archiveOldRecords(max_seconds):
+    report = archive_old_records(max_seconds)
+    click.echo(f"Archived {report['shows']} show(s), {report['tickets']} ticket(s), {report['bookings']} booking(s) "
+               f"and {report['movies']} movie(s) in {report['batches']} batch(es), {report['seconds']}s.")
+    if not report["complete"]:
+        click.echo("Stopped at the time limit; run again to continue.")
+
+@app.cli.command('export-bookings')
+@click.argument('start')
+@click.argument('end')
+@click.option('--format', 'export_format', type=click.Choice(['csv', 'jsonl']), default='csv')
+@click.option('--output', type=click.File('w'), default='-', help='Output file (defaults to stdout).')
+def exportBookingsCommand(start, end, export_format, output):
+    try:
+        start_date, end_date = parse_export_range(start, end)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    prices = catalog.get('price_listing')
+    if prices is None:
+        raise click.ClickException("Could not load the price list.")
+    for chunk in export_chunks(export_records(start_date, end_date, prices), export_format):
+        output.write(chunk)
+
+@app.cli.command('import-schedule')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--dry-run', is_flag=True, help='Validate the file without writing anything.')
+def importScheduleCommand(csv_file, dry_run):
+    try:
+        report = import_schedule(csv_file, dry_run=dry_run)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for error in report["errors"]:
+        click.echo(f"row {error['row']}: {error['error']}", err=True)
+    if report["errors"]:
+        raise click.ClickException(f"{len(report['errors'])} row(s) failed validation; nothing was imported.")
+    verb = "Would import" if dry_run else "Imported"
+    click.echo(f"{verb} {report['movies']} movie(s) and {report['shows']} show(s).")
+    for name, movie_id in report.get("movieIDs", {}).items():
+        click.echo(f"  {movie_id}  {name}")
+
+@app.cli.command('run-job')
+@click.argument('name')
+def runJobCommand(name):
+    job = scheduler.jobs.get(name)
+    if job is None:
+        raise click.ClickException(f"Unknown job '{name}'. Jobs: {', '.join(scheduler.jobs) or 'none'}.")
+    outcome = scheduler.run_now(name)
+    if outcome is None:
+        raise click.ClickException(f"Job '{name}' is already running.")
+    status, detail = outcome
+    if status != 'ok':
+        raise click.ClickException(f"Job '{name}' failed: {detail}")
+    click.echo(detail or 'ok')
+
+@app.cli.command('check-plans')
+def checkQueryPlans():
+    flagged = 0
+    for entry in check_query_plans(db_pool, query_plan_checks()):
+        if entry.get("error"):
+            flagged += 1
+            click.echo(f"ERROR      {entry['name']}: {entry['error']}")
+        elif entry["full_scans"]:
+            flagged += 1
+            click.echo(f"FULL SCAN  {entry['name']}: {', '.join(str(t) for t in entry['full_scans'])}")
+        else:
+            click.echo(f"ok         {entry['name']}")
+    if flagged:
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import logging
+import time
+
+
+# Candidates are read without locks, in idx_shows_date_movie order so the scan stops at the batch size, then
+# locked by primary key with the condition checked again; a locking range read would hold every row it sorted.
+EXPIRED_SHOWS_QUERY = """
+    SELECT show_id FROM shows
+    WHERE Date < %s
+    ORDER BY Date
+    LIMIT %s
+"""
+LOCK_SHOWS_QUERY = "SELECT show_id FROM shows WHERE show_id IN ({ids}) AND Date < %s ORDER BY show_id FOR UPDATE"
+ARCHIVE_SHOWS = """
+    INSERT INTO shows_archive (show_id, movie_id, movie_name, movie_length, hall_id, type, time, Date, price_id)
+    SELECT s.show_id, s.movie_id, m.movie_name, m.length, s.hall_id, s.type, s.time, s.Date, s.price_id
+    FROM shows s
+    LEFT JOIN movies m ON s.movie_id = m.movie_id
+    WHERE s.show_id IN ({ids})
+"""
+BOOKING_REFS_QUERY = "SELECT DISTINCT booking_ref FROM booked_tickets WHERE show_id IN ({ids}) AND booking_ref IS NOT NULL"
+ARCHIVE_TICKETS = """
+    INSERT INTO booked_tickets_archive (ticket_no, show_id, seat_no, booking_ref)
+    SELECT ticket_no, show_id, seat_no, booking_ref FROM booked_tickets
+    WHERE show_id IN ({ids})
+"""
+DELETE_TICKETS = "DELETE FROM booked_tickets WHERE show_id IN ({ids})"
+# A booking only moves once none of its tickets are left behind; deleting it earlier would cascade into them.
+ORPHANED_BOOKINGS = """
+    booking_ref IN ({ids})
+    AND NOT EXISTS (SELECT 1 FROM booked_tickets t WHERE t.booking_ref = bookings.booking_ref)
+"""
+ARCHIVE_BOOKINGS = """
+    INSERT INTO bookings_archive (booking_ref, customer_id, booking_time, base_price)
+    SELECT booking_ref, customer_id, booking_time, base_price FROM bookings WHERE""" + ORPHANED_BOOKINGS
+DELETE_BOOKINGS = "DELETE FROM bookings WHERE" + ORPHANED_BOOKINGS
+DELETE_SHOWS = "DELETE FROM shows WHERE show_id IN ({ids})"
+
+EXPIRED_MOVIES_QUERY = """
+    SELECT movie_id FROM movies
+    WHERE show_end < %s
+    AND NOT EXISTS (SELECT 1 FROM shows s WHERE s.movie_id = movies.movie_id)
+    ORDER BY movie_id
+    LIMIT %s
+"""
+LOCK_MOVIES_QUERY = """
+    SELECT movie_id FROM movies
+    WHERE movie_id IN ({ids}) AND show_end < %s
+    AND NOT EXISTS (SELECT 1 FROM shows s WHERE s.movie_id = movies.movie_id)
+    ORDER BY movie_id
+    FOR UPDATE
+"""
+ARCHIVE_MOVIES = """
+    INSERT INTO movies_archive (movie_id, movie_name, length, language, show_start, show_end, type1, type2, type3)
+    SELECT m.movie_id, m.movie_name, m.length, m.language, m.show_start, m.show_end, t.type1, t.type2, t.type3
+    FROM movies m
+    LEFT JOIN types t ON m.movie_id = t.movie_id
+    WHERE m.movie_id IN ({ids})
+"""
+DELETE_MOVIES = "DELETE FROM movies WHERE movie_id IN ({ids})"
+
+
+def placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+class Archiver:
+    def __init__(self, pool, batch_size=20, pause=0.2, max_seconds=300.0):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_seconds = max_seconds
+
+    def _candidates(self, query, cutoff):
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.run(query, (cutoff, self.batch_size)).rows]
+
+    def _archive_shows(self, cutoff):
+        candidates = self._candidates(EXPIRED_SHOWS_QUERY, cutoff)
+        if not candidates:
+            return None
+        with self.pool.transaction() as tx:
+            show_ids = [row[0] for row in tx.fetch_all(LOCK_SHOWS_QUERY.format(ids=placeholders(candidates)), (*candidates, cutoff))]
+            if not show_ids:
+                return 0, 0, 0
+            ids = placeholders(show_ids)
+            booking_refs = [row[0] for row in tx.fetch_all(BOOKING_REFS_QUERY.format(ids=ids), show_ids)]
+            tx.execute(ARCHIVE_SHOWS.format(ids=ids), show_ids)
+            tickets = tx.execute(ARCHIVE_TICKETS.format(ids=ids), show_ids)
+            tx.execute(DELETE_TICKETS.format(ids=ids), show_ids)
+            bookings = 0
+            if booking_refs:
+                refs = placeholders(booking_refs)
+                bookings = tx.execute(ARCHIVE_BOOKINGS.format(ids=refs), booking_refs)
+                tx.execute(DELETE_BOOKINGS.format(ids=refs), booking_refs)
+            tx.execute(DELETE_SHOWS.format(ids=ids), show_ids)
+        return len(show_ids), tickets, bookings
+
+    def _archive_movies(self, cutoff):
+        candidates = self._candidates(EXPIRED_MOVIES_QUERY, cutoff)
+        if not candidates:
+            return None
+        with self.pool.transaction() as tx:
+            movie_ids = [row[0] for row in tx.fetch_all(LOCK_MOVIES_QUERY.format(ids=placeholders(candidates)), (*candidates, cutoff))]
+            if not movie_ids:
+                return (0,)
+            ids = placeholders(movie_ids)
+            tx.execute(ARCHIVE_MOVIES.format(ids=ids), movie_ids)
+            tx.execute(DELETE_MOVIES.format(ids=ids), movie_ids)
+        return (len(movie_ids),)
+
+    def run(self, cutoff, max_seconds=None):
+        max_seconds = self.max_seconds if max_seconds is None else max_seconds
+        started = time.monotonic()
+        report = {"shows": 0, "tickets": 0, "bookings": 0, "movies": 0, "batches": 0, "complete": False}
+        # Shows go first: a movie can only be archived once none of its shows are left.
+        stages = ((self._archive_shows, ("shows", "tickets", "bookings")), (self._archive_movies, ("movies",)))
+        for archive_batch, keys in stages:
+            while True:
+                # Every batch commits on its own, so a run that stops here (or crashes) resumes from the oldest row left.
+                if max_seconds and time.monotonic() - started >= max_seconds:
+                    return self._finish(report, started)
+                moved = archive_batch(cutoff)
+                if not moved:
+                    break
+                report["batches"] += 1
+                for key, count in zip(keys, moved):
+                    report[key] += count
+                # Yield the locks between batches so live bookings never queue behind a long run.
+                time.sleep(self.pause)
+        report["complete"] = True
+        return self._finish(report, started)
+
+    def _finish(self, report, started):
+        report["seconds"] = round(time.monotonic() - started, 2)
+        state = "finished" if report["complete"] else "paused at its time limit"
+        logging.info(f"Archival {state}: {report['shows']} show(s), {report['tickets']} ticket(s), "
+                     f"{report['bookings']} booking(s), {report['movies']} movie(s) in {report['batches']} batch(es).")
+        return report
@@ -0,0 +1,347 @@
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.cookiejar import CookieJar
+
+
+SEAT_BUTTON_PATTERN = re.compile(r'<button(.*?)>', re.S)
+SEAT_ARGS_PATTERN = re.compile(r"selectSeat\('([^']+)', '([^']+)', (\d+)\)")
+MOVIE_TYPE_PATTERN = re.compile(r"select(?:Show)?Movie\((\d+), '([^']*)'\)")
+TIMING_PATTERN = re.compile(r"selectTiming\((\d+)\)")
+HALL_PATTERN = re.compile(r"selectShowHall\((\d+)\)")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self, warmup_until):
+        self.warmup_until = warmup_until
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._flows = {}
+        self.started = None
+        self.finished = None
+
+    def record(self, endpoint, seconds, outcome):
+        if time.monotonic() < self.warmup_until:
+            return
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {"latencies": [], "errors": 0, "conflicts": 0})
+            entry["latencies"].append(seconds)
+            if outcome == 'error':
+                entry["errors"] += 1
+            elif outcome == 'conflict':
+                entry["conflicts"] += 1
+
+    def flow_done(self, flow, outcome):
+        if time.monotonic() < self.warmup_until:
+            return
+        with self._lock:
+            counts = self._flows.setdefault(flow, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def report(self):
+        elapsed = max(self.finished - max(self.started, self.warmup_until), 1e-9)
+        endpoints = {}
+        with self._lock:
+            for endpoint, entry in sorted(self._endpoints.items()):
+                latencies = sorted(entry["latencies"])
+                n = len(latencies)
+                endpoints[endpoint] = {
+                    "requests": n,
+                    "throughput_rps": round(n / elapsed, 2),
+                    "mean_ms": round(sum(latencies) * 1000 / n, 2) if n else None,
+                    "p50_ms": round(percentile(latencies, 50) * 1000, 2) if n else None,
+                    "p95_ms": round(percentile(latencies, 95) * 1000, 2) if n else None,
+                    "p99_ms": round(percentile(latencies, 99) * 1000, 2) if n else None,
+                    "max_ms": round(latencies[-1] * 1000, 2) if n else None,
+                    "errors": entry["errors"],
+                    "error_rate": round(entry["errors"] / n, 4) if n else 0,
+                    "conflicts": entry["conflicts"],
+                    "conflict_rate": round(entry["conflicts"] / n, 4) if n else 0,
+                }
+            flows = {flow: dict(counts) for flow, counts in self._flows.items()}
+        return {"elapsed_seconds": round(elapsed, 2), "endpoints": endpoints, "flows": flows}
+
+
+class Client:
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def call(self, method, path, form=None, json_body=None, query=None, classify=None):
+        url = self.base_url + path
+        if query:
+            url += '?' + urllib.parse.urlencode(query)
+        data, headers = None, {}
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        started = time.monotonic()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                status, body = resp.status, resp.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read().decode('utf-8', 'replace')
+        except (urllib.error.URLError, OSError) as e:
+            self.recorder.record(f"{method} {path}", time.monotonic() - started, 'error')
+            logging.debug(f"{method} {path} failed: {e}")
+            return None, ''
+        elapsed = time.monotonic() - started
+        outcome = classify(status, body) if classify else ('ok' if status < 400 else 'error')
+        self.recorder.record(f"{method} {path}", elapsed, outcome)
+        return status, body
+
+    def login(self, username, password):
+        failed = lambda status, body: status >= 400 or 'Login Failed' in body
+        status, body = self.call('POST', '/login', form={'username': username, 'password': password},
+                                 classify=lambda status, body: 'error' if failed(status, body) else 'ok')
+        return status is not None and not failed(status, body)
+
+
+def parse_seats(html):
+    seats = []
+    for attrs in SEAT_BUTTON_PATTERN.findall(html):
+        match = SEAT_ARGS_PATTERN.search(attrs)
+        if match and not re.search(r'\sdisabled\b', attrs):
+            seats.append({"code": match.group(1), "class": match.group(2), "db_no": int(match.group(3))})
+    return seats
+
+
+def classify_total(status, body):
+    if status == 409:
+        return 'conflict'
+    return 'ok' if status < 400 else 'error'
+
+
+def classify_booking(status, body):
+    if status >= 400:
+        return 'error'
+    if 'Booking Confirmed' in body:
+        return 'ok'
+    if 'Booking Failed' in body:
+        return 'conflict'
+    return 'error'
+
+
+def classify_insert_show(status, body):
+    if status >= 400:
+        return 'error'
+    if 'Successfully Scheduled' in body:
+        return 'ok'
+    if 'overlapping' in body:
+        return 'conflict'
+    return 'error'
+
+
+def pick_show_legacy(client, show_date, rng):
+    _, body = client.call('POST', '/getMoviesShowingOnDate', form={'date': show_date})
+    movies = MOVIE_TYPE_PATTERN.findall(body or '')
+    if not movies:
+        return None
+    movie_id, movie_type = rng.choice(movies)
+    _, body = client.call('POST', '/getTimings', form={'date': show_date, 'movieID': movie_id, 'type': movie_type})
+    timings = TIMING_PATTERN.findall(body or '')
+    if not timings:
+        return None
+    status, body = client.call('POST', '/getShowID', form={'date': show_date, 'movieID': movie_id, 'type': movie_type, 'time': rng.choice(timings)})
+    if status != 200:
+        return None
+    return json.loads(body).get('showID')
+
+
+def pick_show(client, show_date, rng, contention):
+    status, body = client.call('GET', '/getDaySchedule', query={'date': show_date})
+    if status != 200:
+        return None
+    shows = [show for movie in json.loads(body)["movies"] for fmt in movie["formats"] for show in fmt["shows"]]
+    if not shows:
+        return None
+    if contention:
+        return min(show["showID"] for show in shows)
+    return rng.choice(shows)["showID"]
+
+
+def cashier_flow(client, args, rng):
+    if args.legacy_flow:
+        show_id = pick_show_legacy(client, args.date, rng)
+    else:
+        show_id = pick_show(client, args.date, rng, args.contention)
+    if show_id is None:
+        return 'no_show'
+    _, body = client.call('POST', '/getAvailableSeats', form={'showID': show_id})
+    seats = parse_seats(body or '')
+    if not seats:
+        return 'sold_out'
+    count = min(len(seats), rng.randint(1, args.max_seats))
+    # Under contention everyone fights over the front of the hall; otherwise spread out.
+    pool = seats[:max(count, args.max_seats * 2)] if args.contention else seats
+    chosen = rng.sample(pool, min(count, len(pool)))
+    status, _ = client.call('POST', '/getTotalPrice', json_body={
+        'showID': show_id,
+        'seats': [{'seatCode': s["code"], 'seatClass': s["class"], 'dbNo': s["db_no"]} for s in chosen]
+    }, classify=classify_total)
+    if status == 409:
+        return 'conflict'
+    if status != 200:
+        return 'error'
+    status, body = client.call('POST', '/insertBooking', json_body={
+        'showID': show_id,
+        'selectedSeats': chosen,
+        'customerName': f"Bench {rng.randint(1, 10**6)}",
+        'customerPhone': f"9{rng.randint(10**8, 10**9 - 1)}"
+    }, classify=classify_booking)
+    outcome = classify_booking(status or 500, body)
+    return 'booked' if outcome == 'ok' else outcome
+
+
+def manager_flow(client, args, rng):
+    client.call('POST', '/getShowsShowingOnDate', form={'date': args.date})
+    _, body = client.call('POST', '/getValidMovies', form={'showDate': args.manager_date})
+    movies = MOVIE_TYPE_PATTERN.findall(body or '')
+    if not movies:
+        return 'no_movie'
+    movie_id, types = rng.choice(movies)
+    show_time = rng.randint(9, 22) * 100 + rng.choice((0, 15, 30, 45))
+    _, body = client.call('POST', '/getHallsAvailable', form={'movieID': movie_id, 'showDate': args.manager_date, 'showTime': show_time})
+    halls = HALL_PATTERN.findall(body or '')
+    outcome = 'no_hall'
+    if halls:
+        status, body = client.call('POST', '/insertShow', form={
+            'hallID': rng.choice(halls),
+            'movieID': movie_id,
+            'movieType': types.split()[0] if types.split() else types,
+            'showDate': args.manager_date,
+            'showTime': show_time
+        }, classify=classify_insert_show)
+        result = classify_insert_show(status or 500, body)
+        outcome = 'scheduled' if result == 'ok' else result
+    client.call('POST', '/getBookingsByDate', form={'date': args.date})
+    return outcome
+
+
+def run_user(role, index, args, recorder, deadline):
+    rng = random.Random(args.seed * 1000 + index if args.seed is not None else None)
+    client = Client(args.base_url, recorder, args.timeout)
+    if not client.login(role, getattr(args, f"{role}_password")):
+        logging.error(f"{role} #{index} could not log in; stopping this user.")
+        recorder.flow_done(role, 'login_failed')
+        return
+    flow = cashier_flow if role == 'cashier' else manager_flow
+    while time.monotonic() < deadline:
+        try:
+            outcome = flow(client, args, rng)
+        except Exception as e:
+            logging.debug(f"{role} flow failed: {e}")
+            outcome = 'error'
+        recorder.flow_done(role, outcome)
+        if args.think_time:
+            time.sleep(rng.uniform(0, args.think_time))
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    lines = [f"{'endpoint':40} {'rps':>16} {'p95 ms':>20} {'errors':>8}"]
+    for endpoint, now in current["endpoints"].items():
+        before = previous["endpoints"].get(endpoint)
+        if before is None:
+            lines.append(f"{endpoint:40} {now['throughput_rps']:>16} {now['p95_ms']:>20} {now['error_rate']:>8}")
+            continue
+        lines.append(
+            f"{endpoint:40} {before['throughput_rps']:>7} -> {now['throughput_rps']:<7}"
+            f" {before['p95_ms']:>9} -> {now['p95_ms']:<9} {now['error_rate']:>8}"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay cashier and manager flows against a running TMS instance and report per-endpoint latency.")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--date', default=datetime.now().strftime('%Y/%m/%d'), help="Show date the cashiers book against (yyyy/mm/dd).")
+    parser.add_argument('--manager-date', help="Date managers schedule new shows on; defaults to --date.")
+    parser.add_argument('--cashiers', type=int, default=8)
+    parser.add_argument('--managers', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run, including warm-up.")
+    parser.add_argument('--warmup', type=float, default=5, help="Seconds at the start excluded from the report.")
+    parser.add_argument('--think-time', type=float, default=0, help="Maximum random pause between flows, in seconds.")
+    parser.add_argument('--max-seats', type=int, default=4)
+    parser.add_argument('--contention', action='store_true', help="Send every cashier to the same show and the same block of seats.")
+    parser.add_argument('--legacy-flow', action='store_true', help="Drill down with /getMoviesShowingOnDate, /getTimings and /getShowID instead of /getDaySchedule.")
+    parser.add_argument('--cashier-password', default='cashier')
+    parser.add_argument('--manager-password', default='manager')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+    parser.add_argument('--compare', help="A previous JSON report to print throughput and p95 deltas against.")
+    args = parser.parse_args()
+    args.manager_date = args.manager_date or args.date
+
+    logging.basicConfig(level=logging.INFO)
+    started = time.monotonic()
+    recorder = Recorder(started + args.warmup)
+    recorder.started = started
+    deadline = started + args.duration
+    users = [('cashier', i) for i in range(args.cashiers)] + [('manager', i) for i in range(args.managers)]
+    threads = [threading.Thread(target=run_user, args=(role, i, args, recorder, deadline), daemon=True) for role, i in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    recorder.finished = time.monotonic()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "base_url": args.base_url,
+            "date": args.date,
+            "cashiers": args.cashiers,
+            "managers": args.managers,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "contention": args.contention,
+            "legacy_flow": args.legacy_flow,
+        },
+        **recorder.report()
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        logging.info(f"Wrote benchmark report to {args.output}")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            logging.info(f"Comparison with {args.compare}:\n{compare(json.load(f), report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+from mysql.connector import Error
+
+
+# Databases created before cache sync existed get the table on first use; migration 1 creates the same schema.
+CREATE_TABLE_QUERIES = {
+    'mysql': ("""
+        CREATE TABLE IF NOT EXISTS cache_events (
+            event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            channel VARCHAR(20) NOT NULL,
+            item VARCHAR(64) NOT NULL DEFAULT '',
+            detail TEXT,
+            origin CHAR(32) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX `idx_created_at` (`created_at`)
+        )
+    """,),
+    'sqlite': ("""
+        CREATE TABLE IF NOT EXISTS cache_events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel VARCHAR(20) NOT NULL,
+            item VARCHAR(64) NOT NULL DEFAULT '',
+            detail TEXT,
+            origin CHAR(32) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, "CREATE INDEX IF NOT EXISTS idx_created_at ON cache_events (created_at)"),
+}
+PUBLISH_QUERY = "INSERT INTO cache_events (channel, item, detail, origin) VALUES (%s, %s, %s, %s)"
+LATEST_QUERY = "SELECT COALESCE(MAX(event_id), 0) FROM cache_events"
+POLL_QUERY = """
+    SELECT event_id, channel, item, detail, origin FROM cache_events
+    WHERE event_id > %s ORDER BY event_id LIMIT 500
+"""
+# Concurrent inserts can commit out of id order; ids skipped past are re-checked for a while in case they show up late.
+GAP_QUERY = "SELECT event_id, channel, item, detail, origin FROM cache_events WHERE event_id IN ({ids})"
+GAP_SECONDS = 30.0
+MAX_GAPS = 1000
+PURGE_QUERY = "DELETE FROM cache_events WHERE created_at < NOW() - INTERVAL 1 HOUR"
+
+
+class CacheSync:
+    def __init__(self, pool, interval=2.0, purge_interval=300.0):
+        self.pool = pool
+        self.interval = interval
+        self.purge_interval = purge_interval
+        self.handlers = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._origin = None
+        self._last_event_id = None
+        self._gaps = {}
+        self._last_purge = 0.0
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def on(self, channel, handler):
+        self.handlers[channel] = handler
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Each forked worker needs its own origin tag and poller; threads don't survive fork.
+            self._pid = os.getpid()
+            self._origin = uuid.uuid4().hex
+            self._gaps = {}
+            try:
+                with self.pool.connection() as conn:
+                    for statement in CREATE_TABLE_QUERIES[self.pool.dialect]:
+                        conn.run(statement)
+                    self._last_event_id = conn.run(LATEST_QUERY).rows[0][0]
+            except Error as e:
+                logging.error(f"Cache sync could not read the event log position: {e}")
+                self._last_event_id = None
+            threading.Thread(target=self._run, name='cache-sync', daemon=True).start()
+
+    def publish(self, channel, item='', detail=''):
+        if not self.enabled:
+            return
+        self._ensure_started()
+        try:
+            with self.pool.connection() as conn:
+                conn.run(PUBLISH_QUERY, (channel, str(item), detail, self._origin))
+        except Error as e:
+            logging.error(f"Could not publish cache event {channel}:{item}: {e}")
+
+    def start(self):
+        if self.enabled and self._pid != os.getpid():
+            self._ensure_started()
+
+    def poll(self):
+        with self.pool.connection() as conn:
+            if self._last_event_id is None:
+                self._last_event_id = conn.run(LATEST_QUERY).rows[0][0]
+                return
+            now = time.monotonic()
+            self._gaps = {event_id: seen for event_id, seen in self._gaps.items() if now - seen < GAP_SECONDS}
+            rows = []
+            if self._gaps:
+                ids = ", ".join(["%s"] * len(self._gaps))
+                rows = list(conn.run(GAP_QUERY.format(ids=ids), tuple(self._gaps)).rows)
+            rows += conn.run(POLL_QUERY, (self._last_event_id,)).rows
+            if time.monotonic() - self._last_purge > self.purge_interval:
+                self._last_purge = time.monotonic()
+                conn.run(PURGE_QUERY)
+        for event_id, channel, item, detail, origin in rows:
+            if event_id in self._gaps:
+                del self._gaps[event_id]
+            else:
+                for missing in range(self._last_event_id + 1, min(event_id, self._last_event_id + 1 + MAX_GAPS)):
+                    if len(self._gaps) < MAX_GAPS:
+                        self._gaps[missing] = now
+                self._last_event_id = event_id
+            if origin == self._origin:
+                continue
+            handler = self.handlers.get(channel)
+            if handler is None:
+                continue
+            try:
+                handler(item, detail)
+            except Exception as e:
+                logging.error(f"Cache event {channel}:{item} handler failed: {e}")
+
+    def _run(self):
+        pid = os.getpid()
+        while pid == self._pid:
+            try:
+                self.poll()
+            except Exception as e:
+                logging.error(f"Cache sync poll failed: {e}")
+            time.sleep(self.interval)
@@ -0,0 +1,45 @@
+import logging
+import threading
+
+
+class CatalogCache:
+    def __init__(self, loaders):
+        self.loaders = loaders
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._generations = {name: 0 for name in loaders}
+        self._hits = {name: 0 for name in loaders}
+        self._misses = {name: 0 for name in loaders}
+
+    def get(self, name):
+        with self._lock:
+            if name in self._tables:
+                self._hits[name] += 1
+                return self._tables[name]
+            self._misses[name] += 1
+            generation = self._generations[name]
+        data = self.loaders[name]()
+        if data is None:
+            return None
+        with self._lock:
+            if generation == self._generations[name]:
+                self._tables[name] = data
+        logging.info(f"Catalog table '{name}' loaded.")
+        return data
+
+    def invalidate(self, *names):
+        with self._lock:
+            for name in names or list(self.loaders):
+                self._generations[name] += 1
+                self._tables.pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "hits": self._hits[name],
+                    "misses": self._misses[name],
+                    "loaded": name in self._tables
+                }
+                for name in self.loaders
+            }
@@ -11,6 +11,18 @@ DROP TABLE IF EXISTS halls;
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS customers;
 DROP TABLE IF EXISTS bookings;
+DROP TABLE IF EXISTS id_sequences;
+DROP TABLE IF EXISTS cache_events;
+DROP TABLE IF EXISTS schema_migrations;
+DROP TABLE IF EXISTS booking_sales;
+DROP TABLE IF EXISTS show_sales;
+DROP TABLE IF EXISTS daily_sales;
+DROP TABLE IF EXISTS shows_archive;
+DROP TABLE IF EXISTS booked_tickets_archive;
+DROP TABLE IF EXISTS bookings_archive;
+DROP TABLE IF EXISTS movies_archive;
+DROP TABLE IF EXISTS scheduler_leases;
+DROP TABLE IF EXISTS job_runs;
 DROP TRIGGER IF EXISTS set_show_price_on_insert;
 DROP PROCEDURE IF EXISTS delete_old_records;
 
@@ -36,14 +48,16 @@ CREATE TABLE movies (
     length INT,
     language VARCHAR(10),
     show_start DATE,
-    show_end DATE
+    show_end DATE,
+    INDEX `idx_movies_run` (`show_start`, `show_end`)
 );
 
 CREATE TABLE price_listing (
     price_id INT PRIMARY KEY,
     type VARCHAR(3) NOT NULL,
     day VARCHAR(10) NOT NULL,
-    price INT NOT NULL
+    price INT NOT NULL,
+    INDEX `idx_price_type_day` (`type`, `day`)
 );
 
 CREATE TABLE shows (
@@ -56,7 +70,8 @@ CREATE TABLE shows (
     price_id INT NULL,
     FOREIGN KEY (movie_id) REFERENCES movies(movie_id) ON DELETE CASCADE,
     FOREIGN KEY (hall_id) REFERENCES halls(hall_id),
-    FOREIGN KEY (price_id) REFERENCES price_listing(price_id) ON UPDATE CASCADE ON DELETE SET NULL
+    FOREIGN KEY (price_id) REFERENCES price_listing(price_id) ON UPDATE CASCADE ON DELETE SET NULL,
+    INDEX `idx_shows_date_movie` (`Date`, `movie_id`, `type`, `time`)
 );
 
 CREATE TABLE types (
@@ -85,7 +100,9 @@ CREATE TABLE bookings (
     booking_ref VARCHAR(20) PRIMARY KEY,
     customer_id INT NOT NULL,
     booking_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    base_price INT NULL,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+    INDEX `idx_bookings_customer` (`customer_id`)
 );
 
 CREATE TABLE booked_tickets (
@@ -99,6 +116,125 @@ CREATE TABLE booked_tickets (
     INDEX `idx_booking_ref` (`booking_ref`)
 );
 
+CREATE TABLE id_sequences (
+    name VARCHAR(20) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
+
+CREATE TABLE cache_events (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    channel VARCHAR(20) NOT NULL,
+    item VARCHAR(64) NOT NULL DEFAULT '',
+    detail TEXT,
+    origin CHAR(32) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX `idx_created_at` (`created_at`)
+);
+
+CREATE TABLE booking_sales (
+    booking_ref VARCHAR(20) PRIMARY KEY,
+    show_id INT NOT NULL,
+    show_date DATE NOT NULL,
+    show_time INT,
+    movie_name VARCHAR(40),
+    hall_name VARCHAR(50),
+    customer_name VARCHAR(100),
+    customer_phone VARCHAR(20),
+    tickets INT NOT NULL,
+    gold_tickets INT NOT NULL,
+    standard_tickets INT NOT NULL,
+    gross DECIMAL(12, 2) NOT NULL,
+    gst DECIMAL(12, 2) NOT NULL,
+    INDEX `idx_booking_sales_date` (`show_date`, `show_time`)
+);
+
+CREATE TABLE show_sales (
+    show_id INT PRIMARY KEY,
+    show_date DATE NOT NULL,
+    movie_id INT NOT NULL,
+    movie_name VARCHAR(40),
+    hall_id INT NOT NULL,
+    bookings INT NOT NULL,
+    tickets INT NOT NULL,
+    gold_tickets INT NOT NULL,
+    standard_tickets INT NOT NULL,
+    gross DECIMAL(12, 2) NOT NULL,
+    gst DECIMAL(12, 2) NOT NULL,
+    INDEX `idx_show_sales_date` (`show_date`)
+);
+
+CREATE TABLE daily_sales (
+    sales_date DATE PRIMARY KEY,
+    bookings INT NOT NULL,
+    tickets INT NOT NULL,
+    gold_tickets INT NOT NULL,
+    standard_tickets INT NOT NULL,
+    gross DECIMAL(12, 2) NOT NULL,
+    gst DECIMAL(12, 2) NOT NULL
+);
+
+CREATE TABLE shows_archive (
+    show_id INT PRIMARY KEY,
+    movie_id INT,
+    movie_name VARCHAR(40),
+    movie_length INT,
+    hall_id INT,
+    type VARCHAR(3),
+    time INT,
+    Date DATE,
+    price_id INT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX `idx_shows_archive_date` (`Date`)
+);
+
+CREATE TABLE booked_tickets_archive (
+    ticket_no INT PRIMARY KEY,
+    show_id INT NOT NULL,
+    seat_no INT NOT NULL,
+    booking_ref VARCHAR(20) NULL,
+    INDEX `idx_tickets_archive_show` (`show_id`),
+    INDEX `idx_tickets_archive_booking` (`booking_ref`)
+);
+
+CREATE TABLE bookings_archive (
+    booking_ref VARCHAR(20) PRIMARY KEY,
+    customer_id INT NOT NULL,
+    booking_time TIMESTAMP NULL,
+    base_price INT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE movies_archive (
+    movie_id INT PRIMARY KEY,
+    movie_name VARCHAR(40) NOT NULL,
+    length INT,
+    language VARCHAR(10),
+    show_start DATE,
+    show_end DATE,
+    type1 VARCHAR(3),
+    type2 VARCHAR(3),
+    type3 VARCHAR(3),
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE scheduler_leases (
+    name VARCHAR(20) PRIMARY KEY,
+    holder VARCHAR(100) NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+CREATE TABLE job_runs (
+    run_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    job VARCHAR(40) NOT NULL,
+    worker VARCHAR(100) NOT NULL,
+    started_at DATETIME NOT NULL,
+    duration_ms INT NULL,
+    status VARCHAR(10) NOT NULL,
+    detail TEXT,
+    INDEX `idx_job_runs_job` (`job`, `started_at`),
+    INDEX `idx_job_runs_started` (`started_at`)
+);
+
 INSERT INTO users (user_id, username, password_hash, role) VALUES
 (1, 'cashier', 'scrypt:32768:8:1$xLrcHhakt8JABBCX$cdd37c183dd10698a17f31683fb4630d94d5a185c4e6f2bf9eb313d1d0d9ff25a473771c466918ae0180bfd9d19d58f65ae4c46e222201b7b81d4fe1295a682b', 'cashier'), 
 (2, 'manager', 'scrypt:32768:8:1$a2vR5ywzz5K38sBA$07d2c2bb6f40eb25d519fda46f139f8fd636189b7bd0bdcad059ef6a16ef9268ffbe6e6bc41257040fe05b63015474889e42ba76e0a91b47e1b1517e8cd0e9ee', 'manager'); 
@@ -143,29 +279,4 @@ END;
 DELIMITER ;
 
 
-DELIMITER //
-
-CREATE PROCEDURE delete_old_records()
-BEGIN
-    DECLARE today DATE;
-    SET today = CURDATE();
-
-    DELETE FROM shows
-    WHERE Date < today;
-
-    DELETE FROM shows
-    WHERE movie_id IN (
-        SELECT movie_id
-        FROM movies
-        WHERE show_end < today
-    );
-
-    DELETE FROM movies
-    WHERE show_end < today;
-END;
-//
-
-DELIMITER ;
-
-
 SELECT 'Database schema and base data setup complete.' AS Status;
\ No newline at end of file
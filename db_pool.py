@@ -0,0 +1,240 @@
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+
+QueryResult = namedtuple('QueryResult', ['rows', 'description', 'rowcount', 'lastrowid'])
+
+PREPARABLE_PREFIXES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class PooledConnection:
+    def __init__(self, raw, max_prepared, observers=()):
+        self.raw = raw
+        self.max_prepared = max_prepared
+        self.observers = observers
+        self.last_used = time.monotonic()
+        self._prepared = OrderedDict()
+
+    def _prepared_cursor(self, query):
+        entry = self._prepared.get(query)
+        if entry is not None:
+            self._prepared.move_to_end(query)
+            return entry
+        cursor = self.raw.cursor(prepared=True)
+        # The driver only skips re-preparing when it sees the very same string object.
+        entry = (query, cursor)
+        self._prepared[query] = entry
+        if len(self._prepared) > self.max_prepared:
+            _, (_, evicted) = self._prepared.popitem(last=False)
+            try:
+                evicted.close()
+            except Error:
+                pass
+        return entry
+
+    def run(self, query, params=()):
+        if not self.observers:
+            return self._run(query, params)
+        started = time.perf_counter()
+        try:
+            return self._run(query, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in self.observers:
+                observer.query_finished(query, params, elapsed)
+
+    def _run(self, query, params):
+        if self.max_prepared and query.lstrip().upper().startswith(PREPARABLE_PREFIXES):
+            sql, cursor = self._prepared_cursor(query)
+            try:
+                cursor.execute(sql, params)
+            except Error:
+                self._prepared.pop(query, None)
+                cursor.close()
+                raise
+            rows = cursor.fetchall() if cursor.description else []
+            return QueryResult(rows, cursor.description, cursor.rowcount, cursor.lastrowid)
+        cursor = self.raw.cursor(buffered=True)
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall() if cursor.description else []
+            return QueryResult(rows, cursor.description, cursor.rowcount, cursor.lastrowid)
+        finally:
+            cursor.close()
+
+    def run_many(self, query, seq_params):
+        started = time.perf_counter()
+        cursor = self.raw.cursor()
+        try:
+            cursor.executemany(query, seq_params)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+            elapsed = time.perf_counter() - started
+            for observer in self.observers:
+                observer.query_finished(query, seq_params[:1], elapsed)
+
+    def begin(self):
+        self.raw.start_transaction()
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self):
+        self.raw.ping(reconnect=False)
+
+    def is_connected(self):
+        return self.raw.is_connected()
+
+    def close(self):
+        for _, cursor in self._prepared.values():
+            try:
+                cursor.close()
+            except Error:
+                pass
+        self._prepared.clear()
+        try:
+            self.raw.close()
+        except Error:
+            pass
+
+
+class UnitOfWork:
+    def __init__(self, connection):
+        self.connection = connection
+        self.last_row_id = None
+
+    def execute(self, query, params=None):
+        result = self.connection.run(query, params or ())
+        self.last_row_id = result.lastrowid
+        return result.rowcount
+
+    def execute_many(self, query, seq_params):
+        seq_params = list(seq_params)
+        if not seq_params:
+            return 0
+        return self.connection.run_many(query, seq_params)
+
+    def fetch_one(self, query, params=None):
+        rows = self.connection.run(query, params or ()).rows
+        return rows[0] if rows else None
+
+    def fetch_all(self, query, params=None):
+        return self.connection.run(query, params or ()).rows
+
+
+class ConnectionPool:
+    dialect = 'mysql'
+
+    def __init__(self, pool_size=10, acquire_timeout=5.0, health_check_interval=30.0, max_prepared=64, observers=(), **connect_args):
+        self.pool_size = pool_size
+        self.observers = tuple(observers)
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.max_prepared = max_prepared
+        self.connect_args = connect_args
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _connect(self):
+        raw = mysql.connector.connect(autocommit=True, **self.connect_args)
+        logging.info("Opened new pooled MySQL connection.")
+        return PooledConnection(raw, self.max_prepared, self.observers)
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        try:
+            conn.ping()
+            return True
+        except Error as e:
+            logging.warning(f"Discarding stale pooled connection: {e}")
+            return False
+
+    def acquire(self):
+        started = time.perf_counter()
+        acquired = False
+        try:
+            conn = self._acquire()
+            acquired = True
+            return conn
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in self.observers:
+                observer.connection_acquired(elapsed, acquired)
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PoolError(f"No database connection available within {self.acquire_timeout}s (pool size {self.pool_size}).")
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._is_healthy(conn):
+                    return conn
+                conn.close()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        try:
+            if discard or not conn.is_connected():
+                conn.close()
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except Error:
+            discard = not conn.is_connected()
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            conn.begin()
+            try:
+                yield UnitOfWork(conn)
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Error as e:
+                    logging.error(f"Rollback failed: {e}")
+                raise
+
+    def explain(self, query, params=()):
+        with self.connection() as conn:
+            result = conn.run(f"EXPLAIN {query}", params)
+        columns = [column[0] for column in result.description]
+        return [dict(zip(columns, row)) for row in result.rows]
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,244 @@
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS halls (
+    hall_id INTEGER PRIMARY KEY,
+    hall_name VARCHAR(50) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hall_classes (
+    hall_class_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hall_id INT NOT NULL REFERENCES halls(hall_id) ON DELETE CASCADE,
+    class VARCHAR(10) NOT NULL,
+    no_of_seats INT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hall_class_unique ON hall_classes (hall_id, class);
+
+CREATE TABLE IF NOT EXISTS movies (
+    movie_id INTEGER PRIMARY KEY,
+    movie_name VARCHAR(40) NOT NULL,
+    length INT,
+    language VARCHAR(10),
+    show_start DATE,
+    show_end DATE
+);
+CREATE INDEX IF NOT EXISTS idx_movies_run ON movies (show_start, show_end);
+
+CREATE TABLE IF NOT EXISTS price_listing (
+    price_id INTEGER PRIMARY KEY,
+    type VARCHAR(3) NOT NULL,
+    day VARCHAR(10) NOT NULL,
+    price INT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_type_day ON price_listing (type, day);
+
+CREATE TABLE IF NOT EXISTS shows (
+    show_id INTEGER PRIMARY KEY,
+    movie_id INT REFERENCES movies(movie_id) ON DELETE CASCADE,
+    hall_id INT REFERENCES halls(hall_id),
+    type VARCHAR(3),
+    time INT,
+    Date DATE,
+    price_id INT NULL REFERENCES price_listing(price_id) ON UPDATE CASCADE ON DELETE SET NULL
+);
+CREATE INDEX IF NOT EXISTS idx_shows_date_movie ON shows (Date, movie_id, type, time);
+
+CREATE TABLE IF NOT EXISTS types (
+    movie_id INTEGER PRIMARY KEY REFERENCES movies(movie_id) ON DELETE CASCADE,
+    type1 VARCHAR(3),
+    type2 VARCHAR(3),
+    type3 VARCHAR(3)
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_name VARCHAR(100) NOT NULL,
+    customer_phone VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS customer_phone ON customers (customer_phone);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_ref VARCHAR(20) PRIMARY KEY,
+    customer_id INT NOT NULL REFERENCES customers(customer_id),
+    booking_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    base_price INT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_customer ON bookings (customer_id);
+
+CREATE TABLE IF NOT EXISTS booked_tickets (
+    ticket_no INTEGER PRIMARY KEY,
+    show_id INT NOT NULL REFERENCES shows(show_id) ON DELETE CASCADE,
+    seat_no INT NOT NULL,
+    booking_ref VARCHAR(20) NULL REFERENCES bookings(booking_ref) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX IF NOT EXISTS unique_show_seat ON booked_tickets (show_id, seat_no);
+CREATE INDEX IF NOT EXISTS idx_booking_ref ON booked_tickets (booking_ref);
+
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name VARCHAR(20) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel VARCHAR(20) NOT NULL,
+    item VARCHAR(64) NOT NULL DEFAULT '',
+    detail TEXT,
+    origin CHAR(32) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_created_at ON cache_events (created_at);
+
+CREATE TABLE IF NOT EXISTS booking_sales (
+    booking_ref VARCHAR(20) PRIMARY KEY,
+    show_id INT NOT NULL,
+    show_date DATE NOT NULL,
+    show_time INT,
+    movie_name VARCHAR(40),
+    hall_name VARCHAR(50),
+    customer_name VARCHAR(100),
+    customer_phone VARCHAR(20),
+    tickets INT NOT NULL,
+    gold_tickets INT NOT NULL,
+    standard_tickets INT NOT NULL,
+    gross DECIMAL(12, 2) NOT NULL,
+    gst DECIMAL(12, 2) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_booking_sales_date ON booking_sales (show_date, show_time);
+
+CREATE TABLE IF NOT EXISTS show_sales (
+    show_id INT PRIMARY KEY,
+    show_date DATE NOT NULL,
+    movie_id INT NOT NULL,
+    movie_name VARCHAR(40),
+    hall_id INT NOT NULL,
+    bookings INT NOT NULL,
+    tickets INT NOT NULL,
+    gold_tickets INT NOT NULL,
+    standard_tickets INT NOT NULL,
+    gross DECIMAL(12, 2) NOT NULL,
+    gst DECIMAL(12, 2) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_show_sales_date ON show_sales (show_date);
+
+CREATE TABLE IF NOT EXISTS daily_sales (
+    sales_date DATE PRIMARY KEY,
+    bookings INT NOT NULL,
+    tickets INT NOT NULL,
+    gold_tickets INT NOT NULL,
+    standard_tickets INT NOT NULL,
+    gross DECIMAL(12, 2) NOT NULL,
+    gst DECIMAL(12, 2) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS shows_archive (
+    show_id INT PRIMARY KEY,
+    movie_id INT,
+    movie_name VARCHAR(40),
+    movie_length INT,
+    hall_id INT,
+    type VARCHAR(3),
+    time INT,
+    Date DATE,
+    price_id INT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_shows_archive_date ON shows_archive (Date);
+
+CREATE TABLE IF NOT EXISTS booked_tickets_archive (
+    ticket_no INT PRIMARY KEY,
+    show_id INT NOT NULL,
+    seat_no INT NOT NULL,
+    booking_ref VARCHAR(20) NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_archive_show ON booked_tickets_archive (show_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_archive_booking ON booked_tickets_archive (booking_ref);
+
+CREATE TABLE IF NOT EXISTS bookings_archive (
+    booking_ref VARCHAR(20) PRIMARY KEY,
+    customer_id INT NOT NULL,
+    booking_time TIMESTAMP NULL,
+    base_price INT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS movies_archive (
+    movie_id INT PRIMARY KEY,
+    movie_name VARCHAR(40) NOT NULL,
+    length INT,
+    language VARCHAR(10),
+    show_start DATE,
+    show_end DATE,
+    type1 VARCHAR(3),
+    type2 VARCHAR(3),
+    type3 VARCHAR(3),
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name VARCHAR(20) PRIMARY KEY,
+    holder VARCHAR(100) NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job VARCHAR(40) NOT NULL,
+    worker VARCHAR(100) NOT NULL,
+    started_at DATETIME NOT NULL,
+    duration_ms INT NULL,
+    status VARCHAR(10) NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs (job, started_at);
+CREATE INDEX IF NOT EXISTS idx_job_runs_started ON job_runs (started_at);
+
+-- MySQL's trigger overwrites NEW.price_id before the insert; SQLite can only patch the row afterwards.
+CREATE TRIGGER IF NOT EXISTS set_show_price_on_insert
+AFTER INSERT ON shows
+FOR EACH ROW
+BEGIN
+    UPDATE shows SET price_id = (
+        SELECT price_id
+        FROM price_listing
+        WHERE type = NEW.type AND day = CASE strftime('%w', NEW.Date)
+            WHEN '0' THEN 'Sunday' WHEN '1' THEN 'Monday' WHEN '2' THEN 'Tuesday'
+            WHEN '3' THEN 'Wednesday' WHEN '4' THEN 'Thursday' WHEN '5' THEN 'Friday'
+            ELSE 'Saturday' END
+        LIMIT 1
+    )
+    WHERE show_id = NEW.show_id;
+END;
+
+INSERT OR IGNORE INTO users (user_id, username, password_hash, role) VALUES
+(1, 'cashier', 'scrypt:32768:8:1$xLrcHhakt8JABBCX$cdd37c183dd10698a17f31683fb4630d94d5a185c4e6f2bf9eb313d1d0d9ff25a473771c466918ae0180bfd9d19d58f65ae4c46e222201b7b81d4fe1295a682b', 'cashier'), 
+(2, 'manager', 'scrypt:32768:8:1$a2vR5ywzz5K38sBA$07d2c2bb6f40eb25d519fda46f139f8fd636189b7bd0bdcad059ef6a16ef9268ffbe6e6bc41257040fe05b63015474889e42ba76e0a91b47e1b1517e8cd0e9ee', 'manager'); 
+
+INSERT OR IGNORE INTO halls (hall_id, hall_name) VALUES
+(1, 'Audi 1'),
+(2, 'Audi 2'),
+(3, 'Audi 3');
+
+INSERT OR IGNORE INTO hall_classes (hall_id, class, no_of_seats) VALUES
+(1, 'gold', 35),
+(1, 'standard', 75),
+(2, 'gold', 27),
+(2, 'standard', 97),
+(3, 'gold', 26),
+(3, 'standard', 98);
+
+INSERT OR IGNORE INTO price_listing (price_id, type, day, price) VALUES
+(1, '2D', 'Monday', 210), (2, '3D', 'Monday', 295), (3, '4DX', 'Monday', 380),
+(4, '2D', 'Tuesday', 210), (5, '3D', 'Tuesday', 295), (6, '4DX', 'Tuesday', 380),
+(7, '2D', 'Wednesday', 210), (8, '3D', 'Wednesday', 295), (9, '4DX', 'Wednesday', 380),
+(10, '2D', 'Thursday', 210), (11, '3D', 'Thursday', 295), (12, '4DX', 'Thursday', 380),
+(13, '2D', 'Friday', 320), (14, '3D', 'Friday', 335), (15, '4DX', 'Friday', 495),
+(16, '2D', 'Saturday', 320), (17, '3D', 'Saturday', 335), (18, '4DX', 'Saturday', 495),
+(19, '2D', 'Sunday', 320), (20, '3D', 'Sunday', 335), (21, '4DX', 'Sunday', 495);
@@ -0,0 +1,35 @@
+import multiprocessing
+
+from dotenv import dotenv_values
+
+
+env_config = dotenv_values(".env")
+
+worker_class = env_config.get('WORKER_CLASS', 'gevent')
+if worker_class == 'gevent':
+    # The app is preloaded in the master, so patch before it creates any locks or sockets.
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"{env_config.get('HOST', '0.0.0.0')}:{env_config.get('PORT', 5000)}"
+workers = int(env_config.get('WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(env_config.get('WORKER_THREADS', 8))
+worker_connections = int(env_config.get('ASYNC_MAX_CONNECTIONS', 1000))
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+max_requests = int(env_config.get('MAX_REQUESTS', 5000))
+max_requests_jitter = 500
+accesslog = '-'
+wsgi_app = 'app:app'
+
+
+def on_starting(server):
+    if not env_config.get('SECRET_KEY'):
+        raise RuntimeError("SECRET_KEY must be set in .env before running multiple workers.")
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        from serve_async import enable_async_mode
+        enable_async_mode()
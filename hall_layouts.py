@@ -0,0 +1,60 @@
+import threading
+
+
+class HallLayout:
+    def __init__(self, hall_id, gold_seats, standard_seats, seats_per_row, gold_offset):
+        self.hall_id = hall_id
+        self.gold_seats = gold_seats
+        self.standard_seats = standard_seats
+        self.seats_per_row = seats_per_row
+        self.gold_offset = gold_offset
+        self.codes = {}
+        self.gold_rows = self._build_rows(gold_seats, gold_offset + 1, 'gold')
+        self.standard_rows = self._build_rows(standard_seats, 1, 'standard')
+
+    @property
+    def capacity(self):
+        return self.gold_seats + self.standard_seats
+
+    def _build_rows(self, total_seats, start_db_no, seat_class):
+        rows_data = []
+        for row_start in range(0, max(total_seats, 0), self.seats_per_row):
+            row_letter = chr(ord('A') + row_start // self.seats_per_row)
+            row_seats = []
+            for s in range(min(self.seats_per_row, total_seats - row_start)):
+                db_no = start_db_no + row_start + s
+                display_code = f"{row_letter}{s + 1}"
+                self.codes[db_no] = display_code
+                row_seats.append({"code": display_code, "db_no": db_no, "class": seat_class})
+            rows_data.append({"letter": row_letter, "seats": tuple(row_seats)})
+        return tuple(rows_data)
+
+    def seat_class(self, db_no):
+        return 'gold' if db_no > self.gold_offset else 'standard'
+
+    def seat_code(self, db_no):
+        return self.codes.get(db_no, "Invalid")
+
+
+class HallLayoutRegistry:
+    def __init__(self, loader):
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._layouts = {}
+
+    def get(self, hall_id):
+        layout = self._layouts.get(hall_id)
+        if layout is not None:
+            return layout
+        layout = self.loader(hall_id)
+        if layout is None or not layout.capacity:
+            return layout
+        with self._lock:
+            return self._layouts.setdefault(hall_id, layout)
+
+    def invalidate(self, hall_id=None):
+        with self._lock:
+            if hall_id is None:
+                self._layouts.clear()
+            else:
+                self._layouts.pop(hall_id, None)
@@ -0,0 +1,97 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+
+def time_to_minutes(time_int):
+    return (time_int // 100) * 60 + (time_int % 100)
+
+
+class HallDay:
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def overlaps(self, start_min, end_min):
+        # Shows in one hall never overlap, so ends are sorted along with starts.
+        i = bisect_left(self.starts, end_min)
+        return i > 0 and self.ends[i - 1] > start_min
+
+    def add(self, start_min, end_min):
+        i = bisect_left(self.starts, start_min)
+        self.starts.insert(i, start_min)
+        self.ends.insert(i, end_min)
+
+    @classmethod
+    def from_intervals(cls, intervals):
+        day = cls()
+        for start_min, end_min in sorted(intervals):
+            day.starts.append(start_min)
+            if day.ends and day.ends[-1] > end_min:
+                # Legacy data may already contain overlaps; keep ends monotonic so lookups stay conservative.
+                end_min = day.ends[-1]
+            day.ends.append(end_min)
+        return day
+
+
+class HallScheduleIndex:
+    def __init__(self, loader, max_dates=60):
+        self.loader = loader
+        self.max_dates = max_dates
+        self._lock = threading.Lock()
+        self._dates = OrderedDict()
+        self._generation = 0
+
+    def _day_index(self, show_date):
+        with self._lock:
+            entry = self._dates.get(show_date)
+            if entry is not None:
+                self._dates.move_to_end(show_date)
+                return entry
+            generation = self._generation
+        loaded = self.loader(show_date)
+        if loaded is None:
+            return None
+        halls, intervals = loaded
+        by_hall = {}
+        for hall_id, start_min, end_min in intervals:
+            by_hall.setdefault(hall_id, []).append((start_min, end_min))
+        entry = (halls, {hall_id: HallDay.from_intervals(iv) for hall_id, iv in by_hall.items()})
+        with self._lock:
+            if generation != self._generation:
+                # A show was added or a day invalidated while we were reading; serve this copy but don't keep it.
+                return entry
+            entry = self._dates.setdefault(show_date, entry)
+            while len(self._dates) > self.max_dates:
+                self._dates.popitem(last=False)
+        return entry
+
+    def free_halls(self, show_date, start_min, end_min):
+        entry = self._day_index(show_date)
+        if entry is None:
+            return None
+        halls, days = entry
+        free = []
+        for hall_id, hall_name in halls:
+            day = days.get(hall_id)
+            if day is None or not day.overlaps(start_min, end_min):
+                free.append((hall_id, hall_name))
+        return free
+
+    def warm(self, show_date):
+        return self._day_index(show_date) is not None
+
+    def add_show(self, show_date, hall_id, start_min, end_min):
+        with self._lock:
+            self._generation += 1
+            entry = self._dates.get(show_date)
+            if entry is not None:
+                entry[1].setdefault(hall_id, HallDay()).add(start_min, end_min)
+
+    def invalidate(self, show_date=None):
+        with self._lock:
+            self._generation += 1
+            if show_date is None:
+                self._dates.clear()
+            else:
+                self._dates.pop(show_date, None)
@@ -0,0 +1,55 @@
+import logging
+import os
+import threading
+
+
+# Databases created before the allocator existed get the table on first use rather than failing every insert.
+CREATE_TABLE_QUERY = "CREATE TABLE IF NOT EXISTS id_sequences (name VARCHAR(20) PRIMARY KEY, next_value BIGINT NOT NULL)"
+RESERVE_BLOCK_QUERY = """
+    INSERT INTO id_sequences (name, next_value) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE next_value = LAST_INSERT_ID(next_value + %s)
+"""
+
+
+class IdAllocator:
+    def __init__(self, pool, block_size=100, start_value=10_000_000):
+        self.pool = pool
+        self.block_size = block_size
+        self.start_value = start_value
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+        self._table_checked = False
+
+    def _reserve(self, name, count):
+        with self.pool.connection() as conn:
+            if not self._table_checked:
+                conn.run(CREATE_TABLE_QUERY)
+                self._table_checked = True
+            result = conn.run(RESERVE_BLOCK_QUERY, (name, self.start_value + count, count))
+        if result.rowcount == 1:
+            block_end = self.start_value + count
+        else:
+            block_end = result.lastrowid
+        logging.info(f"Reserved {name} IDs {block_end - count}..{block_end - 1}.")
+        return [block_end - count, block_end]
+
+    def take(self, name, count=1):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Blocks inherited across a fork would hand the same IDs to two workers.
+                self._blocks.clear()
+                self._pid = os.getpid()
+            ids = []
+            while len(ids) < count:
+                block = self._blocks.get(name)
+                if block is None or block[0] >= block[1]:
+                    block = self._reserve(name, max(self.block_size, count - len(ids)))
+                    self._blocks[name] = block
+                n = min(count - len(ids), block[1] - block[0])
+                ids.extend(range(block[0], block[0] + n))
+                block[0] += n
+            return ids
+
+    def next_id(self, name):
+        return self.take(name, 1)[0]
@@ -0,0 +1,148 @@
+import threading
+import time
+from bisect import bisect_left
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels=''):
+        lines = []
+        cumulative = 0
+        sep = ',' if labels else ''
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {self.total:.6f}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.time()
+        self._requests = {}
+        self._request_queries = {}
+        self._request_db_seconds = {}
+        self._statuses = {}
+        self._queries = Histogram()
+        self._acquire = Histogram()
+        self._acquire_timeouts = 0
+        self._cache_sources = {}
+        self._jobs = {}
+        self._job_runs = {}
+        self._leader = 0
+
+    def add_cache_source(self, name, stats_fn):
+        self._cache_sources[name] = stats_fn
+
+    def begin_request(self):
+        self._local.queries = 0
+        self._local.db_seconds = 0.0
+        self._local.started = time.perf_counter()
+
+    def end_request(self, route, method, status):
+        started = getattr(self._local, 'started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        queries, db_seconds = self._local.queries, self._local.db_seconds
+        self._local.started = None
+        key = (route, method)
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram()
+                self._request_queries[key] = Histogram((0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+                self._request_db_seconds[key] = Histogram()
+            histogram.observe(elapsed)
+            self._request_queries[key].observe(queries)
+            self._request_db_seconds[key].observe(db_seconds)
+            status_key = (route, method, status)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def query_finished(self, query, params, seconds):
+        if getattr(self._local, 'started', None) is not None:
+            self._local.queries += 1
+            self._local.db_seconds += seconds
+        with self._lock:
+            self._queries.observe(seconds)
+
+    def connection_acquired(self, seconds, acquired):
+        with self._lock:
+            self._acquire.observe(seconds)
+            if not acquired:
+                self._acquire_timeouts += 1
+
+    def job_finished(self, name, seconds, status):
+        with self._lock:
+            histogram = self._jobs.get(name)
+            if histogram is None:
+                histogram = self._jobs[name] = Histogram(JOB_BUCKETS)
+            histogram.observe(seconds)
+            self._job_runs[(name, status)] = self._job_runs.get((name, status), 0) + 1
+
+    def scheduler_leader(self, leader):
+        self._leader = 1 if leader else 0
+
+    def render(self):
+        lines = [
+            '# TYPE tms_uptime_seconds gauge',
+            f'tms_uptime_seconds {time.time() - self._started:.0f}',
+        ]
+        with self._lock:
+            lines.append('# TYPE tms_request_duration_seconds histogram')
+            for (route, method), histogram in sorted(self._requests.items()):
+                lines.extend(histogram.render('tms_request_duration_seconds', f'route="{route}",method="{method}"'))
+            lines.append('# TYPE tms_request_db_queries histogram')
+            for (route, method), histogram in sorted(self._request_queries.items()):
+                lines.extend(histogram.render('tms_request_db_queries', f'route="{route}",method="{method}"'))
+            lines.append('# TYPE tms_request_db_seconds histogram')
+            for (route, method), histogram in sorted(self._request_db_seconds.items()):
+                lines.extend(histogram.render('tms_request_db_seconds', f'route="{route}",method="{method}"'))
+            lines.append('# TYPE tms_requests_total counter')
+            for (route, method, status), n in sorted(self._statuses.items()):
+                lines.append(f'tms_requests_total{{route="{route}",method="{method}",status="{status}"}} {n}')
+            lines.append('# TYPE tms_db_query_duration_seconds histogram')
+            lines.extend(self._queries.render('tms_db_query_duration_seconds'))
+            lines.append('# TYPE tms_db_pool_acquire_seconds histogram')
+            lines.extend(self._acquire.render('tms_db_pool_acquire_seconds'))
+            lines.append('# TYPE tms_db_pool_acquire_timeouts_total counter')
+            lines.append(f'tms_db_pool_acquire_timeouts_total {self._acquire_timeouts}')
+            lines.append('# TYPE tms_scheduler_leader gauge')
+            lines.append(f'tms_scheduler_leader {self._leader}')
+            lines.append('# TYPE tms_job_duration_seconds histogram')
+            for name, histogram in sorted(self._jobs.items()):
+                lines.extend(histogram.render('tms_job_duration_seconds', f'job="{name}"'))
+            lines.append('# TYPE tms_job_runs_total counter')
+            for (name, status), n in sorted(self._job_runs.items()):
+                lines.append(f'tms_job_runs_total{{job="{name}",status="{status}"}} {n}')
+        cache_stats = [
+            (source, table, stats)
+            for source, stats_fn in sorted(self._cache_sources.items())
+            for table, stats in sorted(stats_fn().items())
+        ]
+        for counter in ('hits', 'misses'):
+            lines.append(f'# TYPE tms_cache_{counter}_total counter')
+            for source, table, stats in cache_stats:
+                lines.append(f'tms_cache_{counter}_total{{cache="{source}",table="{table}"}} {stats[counter]}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,341 @@
+import logging
+from collections import namedtuple
+
+from mysql.connector import Error
+
+
+Migration = namedtuple('Migration', ['version', 'description', 'steps', 'backfill'], defaults=(None,))
+
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        description VARCHAR(100) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+APPLIED_QUERY = "SELECT version FROM schema_migrations"
+RECORD_QUERY = "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)"
+
+TABLE_QUERIES = {
+    'mysql': "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+    'sqlite': "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = %s",
+}
+MYSQL_COLUMN_QUERY = """
+    SELECT COUNT(*) FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+"""
+MYSQL_INDEX_QUERY = """
+    SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    ORDER BY INDEX_NAME, SEQ_IN_INDEX
+"""
+
+
+class SchemaInspector:
+    def __init__(self, conn, dialect):
+        self.conn = conn
+        self.dialect = dialect
+
+    def execute(self, statement):
+        self.conn.run(statement)
+
+    def has_table(self, table):
+        return self.conn.run(TABLE_QUERIES[self.dialect], (table,)).rows[0][0] > 0
+
+    def has_column(self, table, column):
+        if self.dialect == 'sqlite':
+            return any(row[1].lower() == column.lower() for row in self.conn.run(f"PRAGMA table_info('{table}')").rows)
+        return self.conn.run(MYSQL_COLUMN_QUERY, (table, column)).rows[0][0] > 0
+
+    def indexes(self, table):
+        if self.dialect == 'sqlite':
+            return {
+                row[1]: tuple(info[2].lower() for info in self.conn.run(f"PRAGMA index_info('{row[1]}')").rows)
+                for row in self.conn.run(f"PRAGMA index_list('{table}')").rows
+            }
+        indexes = {}
+        for name, column in self.conn.run(MYSQL_INDEX_QUERY, (table,)).rows:
+            indexes[name] = indexes.get(name, ()) + (column.lower(),)
+        return indexes
+
+    def has_index(self, table, name, columns):
+        wanted = tuple(c.lower() for c in columns)
+        # Any index that leads with the same columns serves the same lookups, e.g. the one InnoDB adds for a foreign key.
+        return any(n == name or cols[:len(wanted)] == wanted for n, cols in self.indexes(table).items())
+
+
+class CreateTable:
+    def __init__(self, table, ddl):
+        self.table = table
+        self.ddl = ddl
+
+    def apply(self, schema):
+        if schema.has_table(self.table):
+            return False
+        schema.execute(self.ddl[schema.dialect] if isinstance(self.ddl, dict) else self.ddl)
+        return True
+
+    def __str__(self):
+        return f"table {self.table}"
+
+
+class CreateIndex:
+    def __init__(self, table, name, columns):
+        self.table = table
+        self.name = name
+        self.columns = columns
+
+    def apply(self, schema):
+        if schema.has_index(self.table, self.name, self.columns):
+            return False
+        schema.execute(f"CREATE INDEX {self.name} ON {self.table} ({', '.join(self.columns)})")
+        return True
+
+    def __str__(self):
+        return f"index {self.name} on {self.table} ({', '.join(self.columns)})"
+
+
+class AddColumn:
+    def __init__(self, table, column, definition):
+        self.table = table
+        self.column = column
+        self.definition = definition
+
+    def apply(self, schema):
+        if schema.has_column(self.table, self.column):
+            return False
+        schema.execute(f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self.definition}")
+        return True
+
+    def __str__(self):
+        return f"column {self.column} on {self.table}"
+
+
+MIGRATIONS = (
+    Migration(1, 'ID allocator and cache event tables', (
+        CreateTable('id_sequences', "CREATE TABLE id_sequences (name VARCHAR(20) PRIMARY KEY, next_value BIGINT NOT NULL)"),
+        CreateTable('cache_events', {
+            'mysql': """
+                CREATE TABLE cache_events (
+                    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    channel VARCHAR(20) NOT NULL,
+                    item VARCHAR(64) NOT NULL DEFAULT '',
+                    detail TEXT,
+                    origin CHAR(32) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """,
+            'sqlite': """
+                CREATE TABLE cache_events (
+                    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel VARCHAR(20) NOT NULL,
+                    item VARCHAR(64) NOT NULL DEFAULT '',
+                    detail TEXT,
+                    origin CHAR(32) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """,
+        }),
+        CreateIndex('cache_events', 'idx_created_at', ('created_at',)),
+    )),
+    Migration(2, 'Index shows by date, movie, format and time', (
+        CreateIndex('shows', 'idx_shows_date_movie', ('Date', 'movie_id', 'type', 'time')),
+    )),
+    Migration(3, 'Index movies by run dates', (
+        CreateIndex('movies', 'idx_movies_run', ('show_start', 'show_end')),
+    )),
+    Migration(4, 'Index price listing by format and day', (
+        CreateIndex('price_listing', 'idx_price_type_day', ('type', 'day')),
+    )),
+    Migration(5, 'Index bookings by customer', (
+        CreateIndex('bookings', 'idx_bookings_customer', ('customer_id',)),
+    )),
+    Migration(6, 'Booking, show and daily sales rollups', (
+        CreateTable('booking_sales', """
+            CREATE TABLE booking_sales (
+                booking_ref VARCHAR(20) PRIMARY KEY,
+                show_id INT NOT NULL,
+                show_date DATE NOT NULL,
+                show_time INT,
+                movie_name VARCHAR(40),
+                hall_name VARCHAR(50),
+                customer_name VARCHAR(100),
+                customer_phone VARCHAR(20),
+                tickets INT NOT NULL,
+                gold_tickets INT NOT NULL,
+                standard_tickets INT NOT NULL,
+                gross DECIMAL(12, 2) NOT NULL,
+                gst DECIMAL(12, 2) NOT NULL
+            )
+        """),
+        CreateIndex('booking_sales', 'idx_booking_sales_date', ('show_date', 'show_time')),
+        CreateTable('show_sales', """
+            CREATE TABLE show_sales (
+                show_id INT PRIMARY KEY,
+                show_date DATE NOT NULL,
+                movie_id INT NOT NULL,
+                movie_name VARCHAR(40),
+                hall_id INT NOT NULL,
+                bookings INT NOT NULL,
+                tickets INT NOT NULL,
+                gold_tickets INT NOT NULL,
+                standard_tickets INT NOT NULL,
+                gross DECIMAL(12, 2) NOT NULL,
+                gst DECIMAL(12, 2) NOT NULL
+            )
+        """),
+        CreateIndex('show_sales', 'idx_show_sales_date', ('show_date',)),
+        CreateTable('daily_sales', """
+            CREATE TABLE daily_sales (
+                sales_date DATE PRIMARY KEY,
+                bookings INT NOT NULL,
+                tickets INT NOT NULL,
+                gold_tickets INT NOT NULL,
+                standard_tickets INT NOT NULL,
+                gross DECIMAL(12, 2) NOT NULL,
+                gst DECIMAL(12, 2) NOT NULL
+            )
+        """),
+    )),
+    Migration(7, 'Archive tables for past shows, tickets, bookings and movies', (
+        CreateTable('shows_archive', """
+            CREATE TABLE shows_archive (
+                show_id INT PRIMARY KEY,
+                movie_id INT,
+                movie_name VARCHAR(40),
+                movie_length INT,
+                hall_id INT,
+                type VARCHAR(3),
+                time INT,
+                Date DATE,
+                price_id INT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+        CreateIndex('shows_archive', 'idx_shows_archive_date', ('Date',)),
+        CreateTable('booked_tickets_archive', """
+            CREATE TABLE booked_tickets_archive (
+                ticket_no INT PRIMARY KEY,
+                show_id INT NOT NULL,
+                seat_no INT NOT NULL,
+                booking_ref VARCHAR(20) NULL
+            )
+        """),
+        CreateIndex('booked_tickets_archive', 'idx_tickets_archive_show', ('show_id',)),
+        CreateIndex('booked_tickets_archive', 'idx_tickets_archive_booking', ('booking_ref',)),
+        CreateTable('bookings_archive', """
+            CREATE TABLE bookings_archive (
+                booking_ref VARCHAR(20) PRIMARY KEY,
+                customer_id INT NOT NULL,
+                booking_time TIMESTAMP NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+        CreateTable('movies_archive', """
+            CREATE TABLE movies_archive (
+                movie_id INT PRIMARY KEY,
+                movie_name VARCHAR(40) NOT NULL,
+                length INT,
+                language VARCHAR(10),
+                show_start DATE,
+                show_end DATE,
+                type1 VARCHAR(3),
+                type2 VARCHAR(3),
+                type3 VARCHAR(3),
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """),
+    )),
+    Migration(8, 'Scheduler lease and job run history', (
+        CreateTable('scheduler_leases', """
+            CREATE TABLE scheduler_leases (
+                name VARCHAR(20) PRIMARY KEY,
+                holder VARCHAR(100) NOT NULL,
+                expires_at DATETIME NOT NULL
+            )
+        """),
+        CreateTable('job_runs', {
+            'mysql': """
+                CREATE TABLE job_runs (
+                    run_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    job VARCHAR(40) NOT NULL,
+                    worker VARCHAR(100) NOT NULL,
+                    started_at DATETIME NOT NULL,
+                    duration_ms INT NULL,
+                    status VARCHAR(10) NOT NULL,
+                    detail TEXT
+                )
+            """,
+            'sqlite': """
+                CREATE TABLE job_runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job VARCHAR(40) NOT NULL,
+                    worker VARCHAR(100) NOT NULL,
+                    started_at DATETIME NOT NULL,
+                    duration_ms INT NULL,
+                    status VARCHAR(10) NOT NULL,
+                    detail TEXT
+                )
+            """,
+        }),
+        CreateIndex('job_runs', 'idx_job_runs_job', ('job', 'started_at')),
+        CreateIndex('job_runs', 'idx_job_runs_started', ('started_at',)),
+    )),
+    Migration(9, 'Base price charged per booking', (
+        AddColumn('bookings', 'base_price', 'INT NULL'),
+        AddColumn('bookings_archive', 'base_price', 'INT NULL'),
+    ), backfill='booking_prices'),
+    # The rebuild reads the archive tables (7) and bookings.base_price (9), so it runs once everything it reads exists.
+    Migration(10, 'Fill sales rollups from live and archived bookings', (), backfill='sales_rollups'),
+)
+
+
+def applied_versions(pool):
+    with pool.connection() as conn:
+        conn.run(MIGRATIONS_TABLE)
+        return {row[0] for row in conn.run(APPLIED_QUERY).rows}
+
+
+def pending_migrations(pool, migrations=MIGRATIONS):
+    applied = applied_versions(pool)
+    return [m for m in sorted(migrations, key=lambda m: m.version) if m.version not in applied]
+
+
+def migrate(pool, migrations=MIGRATIONS, backfills=None):
+    applied = []
+    for migration in pending_migrations(pool, migrations):
+        # MySQL commits DDL implicitly, so each step re-checks the live schema rather than relying on a rollback.
+        with pool.connection() as conn:
+            schema = SchemaInspector(conn, pool.dialect)
+            for step in migration.steps:
+                if step.apply(schema):
+                    logging.info(f"Migration {migration.version}: created {step}.")
+                else:
+                    logging.info(f"Migration {migration.version}: {step} already present.")
+        if migration.backfill:
+            # Backfills are supplied by the app because they need its business rules (e.g. seat pricing).
+            backfill = (backfills or {}).get(migration.backfill)
+            if backfill is None:
+                raise RuntimeError(f"Migration {migration.version} needs the '{migration.backfill}' backfill.")
+            backfill()
+            logging.info(f"Migration {migration.version}: ran {migration.backfill} backfill.")
+        with pool.connection() as conn:
+            conn.run(RECORD_QUERY, (migration.version, migration.description))
+        applied.append(migration)
+    return applied
+
+
+def check_query_plans(pool, checks):
+    report = []
+    for name, query, params in checks:
+        try:
+            plan = pool.explain(query, params)
+        except Error as e:
+            report.append({"name": name, "error": str(e), "full_scans": []})
+            continue
+        report.append({
+            "name": name,
+            "plan": plan,
+            "full_scans": [row.get("table") or row.get("detail") for row in plan if row.get("type") == 'ALL']
+        })
+    return report
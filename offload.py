@@ -0,0 +1,12 @@
+_runner = None
+
+
+def set_cpu_runner(runner):
+    global _runner
+    _runner = runner
+
+
+def run_cpu_bound(fn, *args):
+    if _runner is None:
+        return fn(*args)
+    return _runner(fn, *args)
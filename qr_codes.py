@@ -0,0 +1,93 @@
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import qrcode
+
+from offload import run_cpu_bound
+
+
+def render_qr_png(data):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=6,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class QRCodeCache:
+    def __init__(self, payload_loader, max_entries=1000, workers=2):
+        self.payload_loader = payload_loader
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._hits = 0
+        self._misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='qr')
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _generate(self, key, payload=None):
+        try:
+            if payload is None:
+                payload = self.payload_loader(key)
+            if payload is None:
+                return None
+            etag = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+            entry = (etag, run_cpu_bound(render_qr_png, payload))
+            self._store(key, entry)
+            return entry
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _submit(self, key, payload=None):
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._generate, key, payload)
+                self._pending[key] = future
+            return future
+
+    def prefetch(self, key, payload=None):
+        if key in self._entries:
+            return
+        future = self._submit(key, payload)
+        future.add_done_callback(lambda f: f.exception() and logging.error(f"Background QR generation failed for {key}: {f.exception()}"))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+            self._misses += 1
+        return self._submit(key).result()
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries)}
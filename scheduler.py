@@ -0,0 +1,299 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from mysql.connector import Error
+
+
+LEASE_NAME = 'scheduler'
+# Lease times come from the database clock only, so workers on hosts with skewed clocks still agree on expiry.
+LEASE_UPSERT = """
+    INSERT INTO scheduler_leases (name, holder, expires_at) VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+    ON DUPLICATE KEY UPDATE
+        holder = CASE WHEN holder = VALUES(holder) OR expires_at < NOW() THEN VALUES(holder) ELSE holder END,
+        expires_at = CASE WHEN holder = VALUES(holder) OR expires_at < NOW() THEN VALUES(expires_at) ELSE expires_at END
+"""
+LEASE_QUERY = "SELECT holder FROM scheduler_leases WHERE name = %s AND expires_at >= NOW()"
+LEASE_RELEASE = "DELETE FROM scheduler_leases WHERE name = %s AND holder = %s"
+LAST_RUN_QUERY = "SELECT started_at FROM job_runs WHERE job = %s ORDER BY started_at DESC LIMIT 1"
+RUN_START = "INSERT INTO job_runs (job, worker, started_at, status) VALUES (%s, %s, %s, 'running')"
+RUN_FINISH = "UPDATE job_runs SET duration_ms = %s, status = %s, detail = %s WHERE run_id = %s"
+RECENT_RUNS_QUERY = """
+    SELECT run_id, job, worker, started_at, duration_ms, status, detail
+    FROM job_runs
+    ORDER BY started_at DESC, run_id DESC
+    LIMIT %s
+"""
+PURGE_RUNS = "DELETE FROM job_runs WHERE started_at < %s"
+
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+
+def parse_cron_field(field, low, high):
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_str = part.split('/', 1)
+            step = int(step_str)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(value) for value in part.split('-', 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Cron field '{field}' is outside {low}-{high}.")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"Cron expression '{expression}' needs minute, hour, day, month and weekday fields.")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_cron_field(field, low, high) for field, (_, low, high) in zip(fields, CRON_FIELDS)
+        )
+        # Cron counts weekdays from Sunday (0 or 7); Python counts from Monday.
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def _day_matches(self, moment):
+        in_month = moment.day in self.days
+        in_week = moment.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        # Like cron, a day-of-month and a weekday restriction together match either.
+        return in_month or in_week
+
+    def next_after(self, moment):
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression '{self.expression}' never matches.")
+
+    def __str__(self):
+        return f"cron {self.expression}"
+
+
+class IntervalSchedule:
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive.")
+        self.seconds = seconds
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+class Job:
+    def __init__(self, name, schedule, func):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.next_run = None
+        self.running = False
+
+
+class Scheduler:
+    def __init__(self, pool, metrics=None, lease_seconds=30.0, tick=1.0, history_days=14, enabled=True):
+        self.pool = pool
+        self.metrics = metrics
+        self.lease_seconds = lease_seconds
+        self.tick = tick
+        self.history_days = history_days
+        self.enabled = enabled
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._holder = None
+        self._leader = False
+        self._lease_checked = 0.0
+        self._last_purge = 0.0
+
+    def cron(self, name, expression, func):
+        self.jobs[name] = Job(name, CronSchedule(expression), func)
+
+    def every(self, name, seconds, func):
+        self.jobs[name] = Job(name, IntervalSchedule(seconds), func)
+
+    @property
+    def is_leader(self):
+        return self._leader and self._pid == os.getpid()
+
+    def start(self):
+        if not self.enabled or not self.jobs or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Like the cache poller, each forked worker competes for the lease with its own identity and thread.
+            self._pid = os.getpid()
+            self._holder = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+            self._leader = False
+            self._lease_checked = 0.0
+            threading.Thread(target=self._run, name='scheduler', daemon=True).start()
+
+    def _acquire(self, name, holder):
+        with self.pool.connection() as conn:
+            conn.run(LEASE_UPSERT, (name, holder, self.lease_seconds))
+            row = conn.run(LEASE_QUERY, (name,)).rows
+        return bool(row) and row[0][0] == holder
+
+    def _renew_lease(self):
+        return self._acquire(LEASE_NAME, self._holder)
+
+    def _plan_runs(self):
+        now = datetime.now()
+        with self.pool.connection() as conn:
+            for job in self.jobs.values():
+                rows = conn.run(LAST_RUN_QUERY, (job.name,)).rows
+                # Plan from the last recorded run so a restart or a new leader neither repeats nor skips a job;
+                # a run missed while no worker was leading is caught up once.
+                job.next_run = job.schedule.next_after(rows[0][0] if rows else now)
+
+    def _check_leadership(self):
+        try:
+            leader = self._renew_lease()
+            if leader and not self._leader:
+                self._plan_runs()
+                logging.info(f"Scheduler: {self._holder} is now the leader.")
+            elif self._leader and not leader:
+                logging.warning(f"Scheduler: {self._holder} lost the leader lease.")
+        except Error as e:
+            logging.error(f"Scheduler could not renew its lease: {e}")
+            leader = False
+        self._leader = leader
+        if self.metrics is not None:
+            self.metrics.scheduler_leader(leader)
+
+    def _purge_history(self):
+        try:
+            with self.pool.connection() as conn:
+                conn.run(PURGE_RUNS, (datetime.now() - timedelta(days=self.history_days),))
+        except Error as e:
+            logging.error(f"Scheduler could not purge old job runs: {e}")
+
+    def _run(self):
+        pid = os.getpid()
+        while pid == self._pid:
+            try:
+                if time.monotonic() - self._lease_checked >= self.lease_seconds / 3:
+                    self._lease_checked = time.monotonic()
+                    self._check_leadership()
+                if self._leader:
+                    if time.monotonic() - self._last_purge > 3600:
+                        self._last_purge = time.monotonic()
+                        self._purge_history()
+                    self._dispatch(datetime.now())
+            except Exception as e:
+                logging.error(f"Scheduler tick failed: {e}")
+            time.sleep(self.tick)
+
+    def _dispatch(self, now):
+        for job in self.jobs.values():
+            if job.running or job.next_run is None or job.next_run > now:
+                continue
+            job.running = True
+            job.next_run = job.schedule.next_after(now)
+            # Jobs run on their own threads so a long one can't hold up the lease renewals.
+            threading.Thread(target=self._execute, args=(job,), name=f'job-{job.name}', daemon=True).start()
+
+    def _hold_job(self, job, holder, done):
+        # Renewed while the job runs, so a crashed run frees the job within one lease period.
+        lease = f"job:{job.name}"
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                self._acquire(lease, holder)
+            except Error as e:
+                logging.error(f"Could not renew the lease of job {job.name}: {e}")
+        try:
+            with self.pool.connection() as conn:
+                conn.run(LEASE_RELEASE, (lease, holder))
+        except Error as e:
+            logging.error(f"Could not release the lease of job {job.name}: {e}")
+
+    def _execute(self, job, holder=None):
+        holder = holder or self._holder
+        # A per-job lease keeps a scheduled run and a manual `run-job` from overlapping, in any process.
+        try:
+            acquired = self._acquire(f"job:{job.name}", holder)
+        except Error as e:
+            logging.error(f"Could not take the lease of job {job.name}: {e}")
+            acquired = False
+        if not acquired:
+            job.running = False
+            logging.warning(f"Job {job.name} skipped: it is already running elsewhere.")
+            return None
+        done = threading.Event()
+        threading.Thread(target=self._hold_job, args=(job, holder, done), name=f'lease-{job.name}', daemon=True).start()
+        run_id = None
+        try:
+            with self.pool.connection() as conn:
+                run_id = conn.run(RUN_START, (job.name, holder, datetime.now())).lastrowid
+        except Error as e:
+            logging.error(f"Could not record the start of job {job.name}: {e}")
+        started = time.perf_counter()
+        status, detail = 'ok', ''
+        try:
+            result = job.func()
+            if result is not None:
+                detail = json.dumps(result, default=str)
+        except Exception as e:
+            status, detail = 'failed', str(e)
+            logging.error(f"Job {job.name} failed: {e}")
+        finally:
+            seconds = time.perf_counter() - started
+            job.running = False
+            done.set()
+        if self.metrics is not None:
+            self.metrics.job_finished(job.name, seconds, status)
+        logging.info(f"Job {job.name} finished ({status}) in {seconds:.2f}s.")
+        if run_id is not None:
+            try:
+                with self.pool.connection() as conn:
+                    conn.run(RUN_FINISH, (int(seconds * 1000), status, detail[:2000], run_id))
+            except Error as e:
+                logging.error(f"Could not record the end of job {job.name}: {e}")
+        return status, detail
+
+    def run_now(self, name):
+        job = self.jobs[name]
+        if job.running:
+            return None
+        job.running = True
+        return self._execute(job, f"{socket.gethostname()}:{os.getpid()}:manual")
+
+    def leader(self):
+        with self.pool.connection() as conn:
+            rows = conn.run(LEASE_QUERY, (LEASE_NAME,)).rows
+        return rows[0][0] if rows else None
+
+    def recent_runs(self, limit=50):
+        with self.pool.connection() as conn:
+            rows = conn.run(RECENT_RUNS_QUERY, (limit,)).rows
+        columns = ('run_id', 'job', 'worker', 'started_at', 'duration_ms', 'status', 'detail')
+        return [dict(zip(columns, row)) for row in rows]
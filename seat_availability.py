@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+
+class ShowAvailability:
+    __slots__ = ('hall_id', 'gold_seats', 'standard_seats', 'gold_offset', 'booked_gold', 'booked_standard', '_bits')
+
+    def __init__(self, hall_id, gold_seats, standard_seats, gold_offset, booked_seat_nos=()):
+        self.hall_id = hall_id
+        self.gold_seats = gold_seats
+        self.standard_seats = standard_seats
+        self.gold_offset = gold_offset
+        self.booked_gold = 0
+        self.booked_standard = 0
+        self._bits = bytearray((gold_offset + gold_seats) // 8 + 1)
+        self.mark_booked(booked_seat_nos)
+
+    @property
+    def capacity(self):
+        return self.gold_seats + self.standard_seats
+
+    @property
+    def available_gold(self):
+        return self.gold_seats - self.booked_gold
+
+    @property
+    def available_standard(self):
+        return self.standard_seats - self.booked_standard
+
+    def _in_range(self, seat_no):
+        if seat_no > self.gold_offset:
+            return seat_no <= self.gold_offset + self.gold_seats
+        return 1 <= seat_no <= self.standard_seats
+
+    def is_booked(self, seat_no):
+        if not self._in_range(seat_no):
+            return False
+        return bool(self._bits[seat_no >> 3] & (1 << (seat_no & 7)))
+
+    def _set(self, seat_no, booked):
+        if not self._in_range(seat_no) or self.is_booked(seat_no) == booked:
+            return
+        self._bits[seat_no >> 3] ^= 1 << (seat_no & 7)
+        delta = 1 if booked else -1
+        if seat_no > self.gold_offset:
+            self.booked_gold += delta
+        else:
+            self.booked_standard += delta
+
+    def mark_booked(self, seat_nos):
+        for seat_no in seat_nos:
+            self._set(seat_no, True)
+
+    def mark_released(self, seat_nos):
+        for seat_no in seat_nos:
+            self._set(seat_no, False)
+
+
+class SeatAvailabilityCache:
+    def __init__(self, loader, max_shows=512):
+        self.loader = loader
+        self.max_shows = max_shows
+        self._lock = threading.Lock()
+        self._shows = OrderedDict()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, show_id):
+        with self._lock:
+            availability = self._shows.get(show_id)
+            if availability is not None:
+                self._shows.move_to_end(show_id)
+                self._hits += 1
+                return availability
+            self._misses += 1
+            generation = self._generation
+        availability = self.loader(show_id)
+        if availability is None or not availability.capacity:
+            return availability
+        with self._lock:
+            if generation != self._generation:
+                # A booking landed while we were reading; serve this copy but don't keep it.
+                return availability
+            self._shows[show_id] = availability
+            self._shows.move_to_end(show_id)
+            while len(self._shows) > self.max_shows:
+                self._shows.popitem(last=False)
+        return availability
+
+    def peek(self, show_id):
+        with self._lock:
+            return self._shows.get(show_id)
+
+    def mark_booked(self, show_id, seat_nos):
+        with self._lock:
+            self._generation += 1
+            availability = self._shows.get(show_id)
+            if availability is not None:
+                availability.mark_booked(seat_nos)
+
+    def mark_released(self, show_id, seat_nos):
+        with self._lock:
+            self._generation += 1
+            availability = self._shows.get(show_id)
+            if availability is not None:
+                availability.mark_released(seat_nos)
+
+    def invalidate(self, show_id=None):
+        with self._lock:
+            self._generation += 1
+            if show_id is None:
+                self._shows.clear()
+            else:
+                self._shows.pop(show_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._shows)}
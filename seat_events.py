@@ -0,0 +1,69 @@
+import itertools
+import queue
+import threading
+
+
+class SeatEventStream:
+    def __init__(self, show_id, owner, max_pending):
+        self.show_id = show_id
+        self.owner = owner
+        self.overflowed = False
+        self._queue = queue.Queue(max_pending)
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client can't catch up from deltas; tell it to reload the seat map instead.
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SeatEventBroker:
+    def __init__(self, max_streams=500, max_pending=256):
+        self.max_streams = max_streams
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._count = 0
+        self._event_ids = itertools.count(1)
+
+    def subscribe(self, show_id, owner):
+        with self._lock:
+            if self._count >= self.max_streams:
+                return None
+            stream = SeatEventStream(show_id, owner, self.max_pending)
+            self._streams.setdefault(show_id, set()).add(stream)
+            self._count += 1
+            return stream
+
+    def unsubscribe(self, stream):
+        with self._lock:
+            streams = self._streams.get(stream.show_id)
+            if streams is None or stream not in streams:
+                return
+            streams.discard(stream)
+            self._count -= 1
+            if not streams:
+                del self._streams[stream.show_id]
+
+    def publish(self, show_id, kind, seat_nos, owner=None):
+        seat_nos = sorted(seat_nos)
+        if not seat_nos:
+            return
+        with self._lock:
+            streams = list(self._streams.get(show_id, ()))
+            event = (next(self._event_ids), kind, seat_nos)
+        for stream in streams:
+            if owner is not None and stream.owner == owner:
+                continue
+            stream.put(event)
+
+    def stream_count(self):
+        with self._lock:
+            return self._count
@@ -0,0 +1,136 @@
+import heapq
+import threading
+import time
+
+
+class SeatHoldRegistry:
+    def __init__(self, ttl_seconds=300, listener=None, publisher=None):
+        self.ttl_seconds = ttl_seconds
+        self.listener = listener
+        self.publisher = publisher
+        self._lock = threading.Lock()
+        self._holds = {}
+        self._by_owner = {}
+        self._expiry_heap = []
+
+    def _notify(self, event, changes):
+        if self.listener is None:
+            return
+        for (show_id, owner), seat_nos in changes.items():
+            if seat_nos:
+                self.listener(show_id, event, seat_nos, owner)
+
+    def _publish(self, show_id, owner, seat_nos):
+        # Other workers mirror each owner's full hold set; expiry is left to each worker so it never echoes back.
+        if self.publisher is not None:
+            self.publisher(show_id, owner, sorted(seat_nos))
+
+    def _purge_expired(self, now, released):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, show_id, seat_no, owner = heapq.heappop(self._expiry_heap)
+            key = (show_id, seat_no)
+            current = self._holds.get(key)
+            if current is not None and current == (owner, expires_at):
+                self._drop(key, owner)
+                released.setdefault((show_id, owner), []).append(seat_no)
+
+    def _drop(self, key, owner):
+        del self._holds[key]
+        owner_key = (owner, key[0])
+        seats = self._by_owner.get(owner_key)
+        if seats is not None:
+            seats.discard(key[1])
+            if not seats:
+                del self._by_owner[owner_key]
+
+    def holder(self, show_id, seat_no):
+        hold = self._holds.get((show_id, seat_no))
+        if hold is None or hold[1] <= time.monotonic():
+            return None
+        return hold[0]
+
+    def is_held_by_other(self, show_id, seat_no, owner):
+        current = self.holder(show_id, seat_no)
+        return current is not None and current != owner
+
+    def purge_expired(self):
+        released = {}
+        with self._lock:
+            self._purge_expired(time.monotonic(), released)
+        self._notify('released', released)
+
+    def held_seats(self, show_id, owner):
+        released = {}
+        with self._lock:
+            self._purge_expired(time.monotonic(), released)
+            held = set(self._by_owner.get((owner, show_id), ()))
+        self._notify('released', released)
+        return held
+
+    def _replace(self, show_id, owner, seat_nos, released, acquired):
+        wanted = set(seat_nos)
+        conflicts = set()
+        now = time.monotonic()
+        self._purge_expired(now, released)
+        expires_at = now + self.ttl_seconds
+        dropped = self._by_owner.get((owner, show_id), set()) - wanted
+        for seat_no in dropped:
+            self._drop((show_id, seat_no), owner)
+        released.setdefault((show_id, owner), []).extend(dropped)
+        for seat_no in wanted:
+            key = (show_id, seat_no)
+            current = self._holds.get(key)
+            if current is not None and current[0] != owner:
+                conflicts.add(seat_no)
+                continue
+            if current is None:
+                acquired.append(seat_no)
+            self._holds[key] = (owner, expires_at)
+            self._by_owner.setdefault((owner, show_id), set()).add(seat_no)
+            heapq.heappush(self._expiry_heap, (expires_at, show_id, seat_no, owner))
+        return conflicts
+
+    def sync(self, show_id, owner, seat_nos):
+        released = {}
+        acquired = []
+        with self._lock:
+            conflicts = self._replace(show_id, owner, seat_nos, released, acquired)
+            held = set(self._by_owner.get((owner, show_id), ()))
+        self._notify('released', released)
+        self._notify('held', {(show_id, owner): acquired})
+        if held or released.get((show_id, owner)):
+            self._publish(show_id, owner, held)
+        return conflicts
+
+    def apply_remote(self, show_id, owner, seat_nos):
+        # Seats another worker already holds for someone else here stay with the local holder.
+        released = {}
+        acquired = []
+        with self._lock:
+            self._replace(show_id, owner, seat_nos, released, acquired)
+        self._notify('released', released)
+        self._notify('held', {(show_id, owner): acquired})
+
+    def release(self, show_id, owner, seat_nos=None):
+        with self._lock:
+            held = self._by_owner.get((owner, show_id), set())
+            dropped = list(held if seat_nos is None else held & set(seat_nos))
+            for seat_no in dropped:
+                self._drop((show_id, seat_no), owner)
+            held = set(self._by_owner.get((owner, show_id), ()))
+        self._notify('released', {(show_id, owner): dropped})
+        if dropped:
+            self._publish(show_id, owner, held)
+
+    def release_owner(self, owner):
+        released = {}
+        with self._lock:
+            for owner_key in [k for k in self._by_owner if k[0] == owner]:
+                show_id = owner_key[1]
+                dropped = list(self._by_owner.get(owner_key, ()))
+                for seat_no in dropped:
+                    self._drop((show_id, seat_no), owner)
+                released[(show_id, owner)] = dropped
+        self._notify('released', released)
+        for show_id, _ in released:
+            self._publish(show_id, owner, ())
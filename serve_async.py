@@ -0,0 +1,39 @@
+from gevent import monkey
+monkey.patch_all()
+
+import logging
+
+from dotenv import dotenv_values
+from gevent import get_hub
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+import offload
+from app import app, db_pool
+
+
+config = dotenv_values(".env")
+
+HOST = config.get('HOST', '0.0.0.0')
+PORT = int(config.get('PORT', 5000))
+ASYNC_MAX_CONNECTIONS = int(config.get('ASYNC_MAX_CONNECTIONS', 1000))
+ASYNC_CPU_THREADS = int(config.get('ASYNC_CPU_THREADS', 4))
+
+
+def run_in_native_thread(fn, *args):
+    # Password hashing and PNG encoding would stall every greenlet on the hub, so they run on real OS threads.
+    return get_hub().threadpool.apply(fn, args)
+
+
+def enable_async_mode():
+    get_hub().threadpool.maxsize = ASYNC_CPU_THREADS
+    offload.set_cpu_runner(run_in_native_thread)
+    # The C extension does its socket I/O outside Python, where gevent can't switch greenlets.
+    db_pool.connect_args['use_pure'] = True
+
+
+if __name__ == "__main__":
+    enable_async_mode()
+    server = WSGIServer((HOST, PORT), app, spawn=Pool(ASYNC_MAX_CONNECTIONS))
+    logging.info(f"Serving on {HOST}:{PORT} with up to {ASYNC_MAX_CONNECTIONS} concurrent connections.")
+    server.serve_forever()
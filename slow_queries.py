@@ -0,0 +1,134 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+
+
+EXPLAINABLE_PREFIXES = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def normalize_query(query):
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+def sample_params(params, max_items=10, max_len=64):
+    if not params:
+        return []
+    return [repr(p)[:max_len] for p in list(params)[:max_items]]
+
+
+class SlowQueryLog:
+    def __init__(self, explain_loader, route_getter, threshold_ms=200, log_path='slow_queries.log',
+                 max_bytes=5_000_000, backup_count=5, max_fingerprints=500, explain_ttl=600, max_pending=100):
+        self.explain_loader = explain_loader
+        self.route_getter = route_getter
+        self.threshold = threshold_ms / 1000.0
+        self.max_fingerprints = max_fingerprints
+        self.explain_ttl = explain_ttl
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._plans = OrderedDict()
+        self._pending = 0
+        self._dropped = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='explain')
+        self._logger = logging.getLogger('slow_queries')
+        self._logger.propagate = False
+        if log_path and not self._logger.handlers:
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+            self._logger.setLevel(logging.INFO)
+
+    def connection_acquired(self, seconds, acquired):
+        pass
+
+    def query_finished(self, query, params, seconds):
+        if seconds < self.threshold or query.lstrip()[:7].upper() == 'EXPLAIN':
+            return
+        fingerprint = normalize_query(query)
+        route = self.route_getter()
+        sample = sample_params(params)
+        with self._lock:
+            entry = self._stats.get(fingerprint)
+            if entry is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    del self._stats[min(self._stats, key=lambda k: self._stats[k]["total"])]
+                entry = self._stats[fingerprint] = {"count": 0, "total": 0.0, "max": 0.0}
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["route"] = route
+            entry["params"] = sample
+            if self._pending >= self.max_pending:
+                self._dropped += 1
+                return
+            self._pending += 1
+        record = {
+            "at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "duration_ms": round(seconds * 1000, 2),
+            "route": route,
+            "sql": fingerprint,
+            "params": sample
+        }
+        explain_params = params if isinstance(params, (tuple, dict)) or params is None else None
+        self._executor.submit(self._write, record, query, explain_params)
+
+    def _plan_for(self, fingerprint, query, params):
+        # Only the single explain thread touches _plans; it is kept as an LRU of max_fingerprints entries.
+        cached = self._plans.get(fingerprint)
+        if cached is not None and time.monotonic() - cached[0] < self.explain_ttl:
+            self._plans.move_to_end(fingerprint)
+            return cached[1]
+        if not fingerprint.upper().startswith(EXPLAINABLE_PREFIXES) or (params is None and '%s' in query):
+            return None
+        try:
+            plan = self.explain_loader(query, params or ())
+        except Exception as e:
+            logging.warning(f"EXPLAIN failed for slow query: {e}")
+            plan = None
+        self._plans[fingerprint] = (time.monotonic(), plan)
+        self._plans.move_to_end(fingerprint)
+        while len(self._plans) > self.max_fingerprints:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _write(self, record, query, params):
+        try:
+            plan = self._plan_for(record["sql"], query, params)
+            record["explain"] = plan
+            with self._lock:
+                if record["sql"] in self._stats:
+                    self._stats[record["sql"]]["explain"] = plan
+            self._logger.info(json.dumps(record, default=str))
+        except Exception as e:
+            logging.error(f"Could not record slow query: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def top(self, limit=20):
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda item: item[1]["total"], reverse=True)[:limit]
+            return [
+                {
+                    "sql": sql,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total"] * 1000, 1),
+                    "avg_ms": round(entry["total"] * 1000 / entry["count"], 1),
+                    "max_ms": round(entry["max"] * 1000, 1),
+                    "route": entry.get("route"),
+                    "params": entry.get("params"),
+                    "explain": entry.get("explain"),
+                    "full_scan": any(row.get("type") == 'ALL' for row in entry.get("explain") or ())
+                }
+                for sql, entry in ranked
+            ]
+
+    def dropped(self):
+        with self._lock:
+            return self._dropped
@@ -0,0 +1,191 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+
+from mysql.connector import errorcode, errors
+
+from db_pool import ConnectionPool, QueryResult
+
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_sqlite.sql')
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+UPSERT_PATTERN = re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', re.I)
+REWRITES = (
+    (re.compile(r'\s+(FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE)\b', re.I), ''),
+    (re.compile(r'NOW\(\)\s*-\s*INTERVAL\s+(\d+)\s+(SECOND|MINUTE|HOUR|DAY)', re.I), r"datetime('now', '-\1 \2')"),
+    (re.compile(r'NOW\(\)\s*([+-])\s*INTERVAL\s+%s\s+(SECOND|MINUTE|HOUR|DAY)', re.I), r"datetime('now', '\1' || %s || ' \2')"),
+    (re.compile(r'\bNOW\(\)', re.I), "datetime('now')"),
+    (re.compile(r'\bCURDATE\(\)', re.I), "date('now', 'localtime')"),
+    (re.compile(r'%s'), '?'),
+)
+
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('DATE', lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter('DATETIME', lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+def translate_query(query):
+    match = UPSERT_PATTERN.search(query)
+    if match:
+        # ON CONFLICT without a target matches any unique key, like ON DUPLICATE KEY does.
+        update = re.sub(r'\bVALUES\((\w+)\)', r'excluded.\1', query[match.end():])
+        query = query[:match.start()] + 'ON CONFLICT DO UPDATE SET' + update
+    for pattern, replacement in REWRITES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def day_name(value):
+    if value is None:
+        return None
+    return DAY_NAMES[date.fromisoformat(str(value)[:10]).weekday()]
+
+
+class SqliteConnection:
+    def __init__(self, path, busy_timeout, observers=()):
+        self.raw = sqlite3.connect(path, timeout=busy_timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                                   isolation_level=None, check_same_thread=False)
+        self.raw.execute("PRAGMA foreign_keys = ON")
+        self.raw.execute("PRAGMA synchronous = NORMAL")
+        self.raw.create_function('DAYNAME', 1, day_name, deterministic=True)
+        self.raw.create_function('LAST_INSERT_ID', 1, self._capture_insert_id)
+        self.observers = observers
+        self.last_used = time.monotonic()
+        self._translated = {}
+        self._captured_id = None
+        self._unique_keys = self._load_unique_keys()
+        self._open = True
+
+    def _capture_insert_id(self, value):
+        self._captured_id = value
+        return value
+
+    def _load_unique_keys(self):
+        keys = {}
+        tables = [row[0] for row in self.raw.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            for _, name, unique, origin, _ in self.raw.execute(f"PRAGMA index_list('{table}')"):
+                if not unique:
+                    continue
+                columns = tuple(f"{table}.{row[2]}" for row in self.raw.execute(f"PRAGMA index_info('{name}')"))
+                keys[columns] = 'PRIMARY' if origin == 'pk' else name
+        return keys
+
+    def _translate_error(self, e):
+        message = str(e)
+        if isinstance(e, sqlite3.IntegrityError):
+            if message.startswith('UNIQUE constraint failed: '):
+                columns = tuple(c.strip() for c in message.split(': ', 1)[1].split(','))
+                key = self._unique_keys.get(columns, 'PRIMARY')
+                return errors.IntegrityError(msg=f"Duplicate entry for key '{key}'", errno=errorcode.ER_DUP_ENTRY)
+            return errors.IntegrityError(msg=message)
+        if isinstance(e, sqlite3.OperationalError):
+            return errors.OperationalError(msg=message)
+        return errors.DatabaseError(msg=message)
+
+    def _sql(self, query):
+        sql = self._translated.get(query)
+        if sql is None:
+            sql = self._translated[query] = translate_query(query)
+        return sql
+
+    def run(self, query, params=()):
+        if not self.observers:
+            return self._run(query, params)
+        started = time.perf_counter()
+        try:
+            return self._run(query, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in self.observers:
+                observer.query_finished(query, params, elapsed)
+
+    def _run(self, query, params):
+        self._captured_id = None
+        try:
+            cursor = self.raw.execute(self._sql(query), params or ())
+            rows = cursor.fetchall() if cursor.description else []
+        except sqlite3.Error as e:
+            raise self._translate_error(e) from e
+        if self._captured_id is not None:
+            # MySQL reports an upsert that took the UPDATE path as two affected rows.
+            return QueryResult(rows, cursor.description, 2, self._captured_id)
+        rowcount = len(rows) if cursor.description else cursor.rowcount
+        return QueryResult(rows, cursor.description, rowcount, cursor.lastrowid)
+
+    def run_many(self, query, seq_params):
+        started = time.perf_counter()
+        try:
+            return self.raw.executemany(self._sql(query), seq_params).rowcount
+        except sqlite3.Error as e:
+            raise self._translate_error(e) from e
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in self.observers:
+                observer.query_finished(query, seq_params[:1], elapsed)
+
+    def begin(self):
+        # Take the write lock up front so two transactions can't deadlock upgrading from a read.
+        self.raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def ping(self):
+        pass
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        self._open = False
+        try:
+            self.raw.close()
+        except sqlite3.Error:
+            pass
+
+
+class SqlitePool(ConnectionPool):
+    dialect = 'sqlite'
+
+    def __init__(self, path, pool_size=4, acquire_timeout=5.0, busy_timeout=5.0, observers=(), schema_path=SCHEMA_PATH):
+        super().__init__(pool_size=pool_size, acquire_timeout=acquire_timeout, max_prepared=0, observers=observers)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._initialize(schema_path)
+
+    def _initialize(self, schema_path):
+        raw = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        try:
+            raw.execute("PRAGMA journal_mode = WAL")
+            if raw.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'halls'").fetchone() is None:
+                with open(schema_path) as f:
+                    raw.executescript(f.read())
+                logging.info(f"Created SQLite database at {self.path}.")
+        finally:
+            raw.close()
+
+    def _connect(self):
+        return SqliteConnection(self.path, self.busy_timeout, self.observers)
+
+    def explain(self, query, params=()):
+        with self.connection() as conn:
+            result = conn.run(f"EXPLAIN QUERY PLAN {query}", params)
+        plan = []
+        for row in result.rows:
+            detail = row[-1]
+            full_scan = detail.startswith('SCAN') and 'INDEX' not in detail
+            plan.append({"id": row[0], "detail": detail, "type": 'ALL' if full_scan else 'index'})
+        return plan
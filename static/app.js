@@ -22,18 +22,58 @@ function logoutUser() {
     window.location.href = '/logout';
 }
 
+let daySchedules = {};
+let seatEventSource = null;
+
+function escapeHtml(text) {
+    return $('<div>').text(text).html();
+}
+
+function findMovieFormat(movID, mtype) {
+    const schedule = daySchedules[date];
+    if (!schedule) return null;
+    const movie = schedule.movies.find(m => m.id === movID);
+    if (!movie) return null;
+    const format = movie.formats.find(f => f.type === mtype);
+    return format ? { movie: movie, format: format } : null;
+}
+
+function renderMoviesOnDate(schedule) {
+    if (schedule.movies.length === 0) {
+        $('#movies-on-date').html(createNotification('No Movies Showing on this Date', 'is-info'));
+        return;
+    }
+    let html = '<h4 class="title is-4 has-text-centered mb-4 mt-4">Movies Showing</h4><div class="buttons is-centered is-multiline mt-4 mb-4">';
+    schedule.movies.forEach(function(movie) {
+        movie.formats.forEach(function(format) {
+            html += `<button onclick="selectMovie(${movie.id}, '${escapeHtml(format.type)}')">${escapeHtml(movie.name)} (${escapeHtml(format.type)})</button>`;
+        });
+    });
+    html += '</div>';
+    $('#movies-on-date').html(html);
+    $('#movies-on-date button').addClass('button is-link m-1');
+}
+
 function getMoviesShowingOnDate(mdate) {
     date = mdate;
-    console.log("Fetching movies for date:", date);
+    console.log("Fetching schedule for date:", date);
     $('#movies-on-date').html('<progress class="progress is-small is-info" max="100">15%</progress>');
 
     $.ajax({
-        type: 'POST',
-        url: '/getMoviesShowingOnDate',
+        type: 'GET',
+        url: '/getDaySchedule',
         data: { 'date': date },
-        success: function(response) {
-            $('#movies-on-date').html(response);
-            $('#movies-on-date button').addClass('button is-link m-1');
+        dataType: 'json',
+        ifModified: true,
+        success: function(response, textStatus) {
+            if (textStatus !== 'notmodified' || !daySchedules[mdate]) {
+                daySchedules[mdate] = response;
+            }
+            if (daySchedules[mdate]) {
+                renderMoviesOnDate(daySchedules[mdate]);
+            } else {
+                $('#movies-on-date').html(createNotification('Could not load movies. Please try again.', 'is-warning'));
+            }
         },
         error: function(jqXHR, textStatus, errorThrown) {
             console.error("getMoviesShowingOnDate AJAX error:", textStatus, errorThrown);
@@ -46,31 +86,32 @@ function selectMovie(movID, mtype) {
     movieID = movID;
     type = mtype;
     console.log("Selected Movie:", movieID, "Type:", type, "Date:", date);
-    $('#timings-for-movie').html('<progress class="progress is-small is-info" max="100">15%</progress>');
 
-    $.ajax({
-        type: 'POST',
-        url: '/getTimings',
-        data: {
-            'date': date,
-            'movieID': movieID,
-            'type': type
-        },
-        success: function(response) {
-            $('#movies-on-date button');
-            $('#timings-for-movie').html(response);
-            $('#timings-for-movie button').addClass('button is-primary m-1');
-        },
-        error: function(jqXHR, textStatus, errorThrown) {
-            console.error("selectMovie AJAX error:", textStatus, errorThrown);
-            $('#timings-for-movie').html(createNotification('Could not load timings. Please try again.', 'is-warning'));
-        }
+    const entry = findMovieFormat(movieID, type);
+    if (!entry) {
+        $('#timings-for-movie').html(createNotification('Could not load timings. Please try again.', 'is-warning'));
+        return;
+    }
+    let html = '<h4 class="title is-4 has-text-centered mb-4">Available Timings</h4><div class="buttons is-centered is-multiline mb-5">';
+    entry.format.shows.forEach(function(show) {
+        const remaining = show.remaining === null ? '' : ` (${show.remaining} left)`;
+        html += `<button onclick="selectTiming(${show.time}, ${show.showID})" title="${escapeHtml(show.hall)}"${show.remaining === 0 ? ' disabled' : ''}>${show.label}${remaining}</button>`;
     });
+    html += '</div>';
+    $('#timings-for-movie').html(html);
+    $('#timings-for-movie button').addClass('button is-primary m-1');
 }
 
-function selectTiming(mtime) {
+function selectTiming(mtime, mshowID) {
     movieTime = mtime;
     console.log("Selected Timing:", movieTime, "for Show:", movieID, type, date);
+
+    if (mshowID) {
+        showID = mshowID;
+        getSeats();
+        return;
+    }
+
     $('#available-seats').html('<progress class="progress is-small is-info" max="100">15%</progress>');
 
     $.ajax({
@@ -85,7 +126,6 @@ function selectTiming(mtime) {
         },
         success: function(response) {
             if (response && response.showID) {
-                $('#timings-for-movie button');
                 showID = response.showID;
                 console.log("Got showID:", showID);
                 getSeats();
@@ -118,6 +158,8 @@ function getSeats() {
             $('#available-seats .seat-button').addClass('button m-1 is-small');
             $('#available-seats .seat-available').addClass('is-outlined is-primary');
             $('#available-seats .seat-booked').addClass('is-danger');
+            $('#available-seats .seat-held').addClass('is-dark');
+            watchSeatEvents(showID);
         },
         error: function(jqXHR, textStatus, errorThrown) {
             console.error("getSeats AJAX error:", textStatus, errorThrown);
@@ -126,6 +168,69 @@ function getSeats() {
     });
 }
 
+function watchSeatEvents(watchedShowID) {
+    if (seatEventSource) {
+        seatEventSource.close();
+        seatEventSource = null;
+    }
+    if (!window.EventSource) return;
+
+    let lostConnection = false;
+    seatEventSource = new EventSource(`/seatEvents/${watchedShowID}`);
+    seatEventSource.onerror = function() {
+        lostConnection = true;
+    };
+    seatEventSource.onopen = function() {
+        if (lostConnection && watchedShowID === showID) {
+            // Deltas sent while we were disconnected are gone; reload the seat map.
+            getSeats();
+        }
+    };
+    ['booked', 'held', 'released'].forEach(function(kind) {
+        seatEventSource.addEventListener(kind, function(event) {
+            if (watchedShowID === showID) {
+                applySeatEvent(kind, JSON.parse(event.data).seats);
+            }
+        });
+    });
+    seatEventSource.addEventListener('resync', function() {
+        if (watchedShowID === showID) {
+            getSeats();
+        }
+    });
+}
+
+function applySeatEvent(kind, dbNos) {
+    const selectedBefore = selectedSeats.length;
+    if (kind === 'released') {
+        dbNos.forEach(function(dbNo) {
+            $(`#available-seats .seat-held[data-dbno="${dbNo}"]`)
+                .removeClass('seat-held is-dark')
+                .removeAttr('title')
+                .prop('disabled', false);
+        });
+        return;
+    }
+    if (kind === 'held') {
+        markSeatsHeld(dbNos);
+    } else {
+        markSeatsBooked(dbNos);
+    }
+    if (selectedSeats.length !== selectedBefore) {
+        updatePriceAndConfirmButton();
+    }
+}
+
+function markSeatsBooked(dbNos) {
+    dbNos.forEach(function(dbNo) {
+        selectedSeats = selectedSeats.filter(seat => seat.db_no !== dbNo);
+        $(`#available-seats .seat-button[data-dbno="${dbNo}"]`)
+            .removeClass('seat-held is-dark is-success is-light')
+            .addClass('seat-booked is-danger')
+            .prop('disabled', true);
+    });
+}
+
 function selectSeat(seatCode, seatClass, seatDbNo) {
     const seatIndex = selectedSeats.findIndex(seat => seat.db_no === seatDbNo);
     const seatButton = document.getElementById(`seat-${seatClass}-${seatCode}`);
@@ -150,11 +255,29 @@ function selectSeat(seatCode, seatClass, seatDbNo) {
     updatePriceAndConfirmButton();
 }
 
+function markSeatsHeld(dbNos) {
+    dbNos.forEach(function(dbNo) {
+        selectedSeats = selectedSeats.filter(seat => seat.db_no !== dbNo);
+        $(`#available-seats .seat-button[data-dbno="${dbNo}"]`)
+            .removeClass('is-success is-light is-warning is-info')
+            .addClass('seat-held is-dark')
+            .prop('disabled', true);
+    });
+}
+
 function updatePriceAndConfirmButton() {
     $('#price-and-confirm').html('<progress class="progress is-small is-info" max="100">15%</progress>');
 
     if (selectedSeats.length === 0) {
          $('#price-and-confirm').html('<p class="has-text-centered">Please select one or more seats.</p>');
+         if (showID) {
+             $.ajax({
+                 type: 'POST',
+                 url: '/releaseHolds',
+                 contentType: 'application/json',
+                 data: JSON.stringify({ 'showID': showID })
+             });
+         }
          return;
     }
     if (!showID){
@@ -168,7 +291,7 @@ function updatePriceAndConfirmButton() {
         contentType: 'application/json',
         data: JSON.stringify({
             'showID': showID,
-            'seats':  selectedSeats.map(s => ({ seatCode: s.code, seatClass: s.class }))
+            'seats':  selectedSeats.map(s => ({ seatCode: s.code, seatClass: s.class, dbNo: s.db_no }))
         }),
         success: function(response) {
             $('#price-and-confirm').html(response);
@@ -182,6 +305,9 @@ function updatePriceAndConfirmButton() {
             if (jqXHR.responseJSON && jqXHR.responseJSON.error) {
                 errorMsg = jqXHR.responseJSON.error;
             }
+            if (jqXHR.status === 409 && jqXHR.responseJSON && jqXHR.responseJSON.heldSeats) {
+                markSeatsHeld(jqXHR.responseJSON.heldSeats);
+            }
             $('#price-and-confirm').html(createNotification(errorMsg, 'is-warning'));
         }
     });
@@ -211,7 +337,9 @@ function confirmBooking() {
             'customerPhone': customerPhone
         }),
         success: function(response) {
-             $('#available-seats button');
+            if ($('<div>').html(response).find('.notification.is-success').length) {
+                markSeatsBooked(selectedSeats.map(seat => seat.db_no));
+            }
             $('#price-and-confirm').html(response);
         },
         error: function(jqXHR, textStatus, errorThrown) {
@@ -668,6 +796,111 @@ function alterPricing() {
     $('#manager-dynamic-1').closest('.section').removeClass('is-hidden');
 }
 
+function viewSalesReport() {
+    console.log("Manager action: View Sales Report");
+    $('#manager-dynamic-1, #manager-dynamic-2, #manager-dynamic-3, #manager-dynamic-4, #manager-dynamic-5').html('');
+    $('#options button.is-info').removeClass('is-info').addClass('is-light');
+    $('#manager-dynamic-1').html(`
+        <div class="box">
+            <h4 class="title is-5 mb-4 has-text-light">Sales Report</h4>
+            <div class="columns">
+                <div class="column">
+                    <div class="field">
+                        <label class="label has-text-light" for="datepicker-report-start">From</label>
+                        <div class="control has-icons-left">
+                            <input class="input" id="datepicker-report-start" placeholder="Pick a start date">
+                            <span class="icon is-small is-left"><i class="fas fa-calendar-alt"></i></span>
+                        </div>
+                    </div>
+                </div>
+                <div class="column">
+                    <div class="field">
+                        <label class="label has-text-light" for="datepicker-report-end">To</label>
+                        <div class="control has-icons-left">
+                            <input class="input" id="datepicker-report-end" placeholder="Pick an end date">
+                            <span class="icon is-small is-left"><i class="fas fa-calendar-alt"></i></span>
+                        </div>
+                    </div>
+                </div>
+            </div>
+            <p class="help has-text-grey-light">Revenue, GST and occupancy for shows between the two dates.</p>
+        </div>`);
+
+    const pickerOptions = {
+        formatSubmit: 'yyyy/mm/dd',
+        format: 'd mmmm, yyyy',
+        hiddenName: true,
+        klass: { input: 'input' },
+        onSet: function(event) {
+            if (event.select) {
+                const start = $('#datepicker-report-start').pickadate('picker').get('select', 'yyyy/mm/dd');
+                const end = $('#datepicker-report-end').pickadate('picker').get('select', 'yyyy/mm/dd');
+                if (start && end) {
+                    fetchSalesReport(start, end);
+                }
+            }
+        }
+    };
+    $('#datepicker-report-start').pickadate(pickerOptions);
+    $('#datepicker-report-end').pickadate(pickerOptions);
+}
+
+function fetchSalesReport(start, end) {
+    console.log("Manager: Fetching sales report from", start, "to", end);
+    $('#manager-dynamic-2').html('<progress class="progress is-small is-info" max="100">15%</progress>');
+
+    $.ajax({
+        type: 'GET',
+        url: '/salesReport',
+        data: { 'start': start, 'end': end },
+        success: function(response) {
+            $('#manager-dynamic-2').html(response);
+        },
+        error: function(jqXHR, textStatus, errorThrown) {
+            console.error("fetchSalesReport AJAX error:", textStatus, errorThrown);
+            $('#manager-dynamic-2').html(createNotification('Could not load the sales report.', 'is-warning'));
+        }
+    });
+}
+
+function viewSlowQueries() {
+    console.log("Manager action: View Slow Queries");
+    $('#options button.is-info').removeClass('is-info').addClass('is-light');
+    $('#manager-dynamic-1').html('<progress class="progress is-small is-info" max="100">15%</progress>');
+
+    $.ajax({
+        type: 'GET',
+        url: '/slowQueries',
+        success: function(response) {
+            $('#manager-dynamic-1').html('<div class="box">' + response + '</div>');
+        },
+        error: function(jqXHR, textStatus, errorThrown) {
+            console.error("viewSlowQueries AJAX error:", textStatus, errorThrown);
+            $('#manager-dynamic-1').html(createNotification('Could not load the slow query report.', 'is-warning'));
+        }
+    });
+    $('#manager-dynamic-2, #manager-dynamic-3, #manager-dynamic-4, #manager-dynamic-5').html('');
+}
+
+function viewJobs() {
+    console.log("Manager action: View Background Jobs");
+    $('#options button.is-info').removeClass('is-info').addClass('is-light');
+    $('#manager-dynamic-1').html('<progress class="progress is-small is-info" max="100">15%</progress>');
+
+    $.ajax({
+        type: 'GET',
+        url: '/jobs',
+        success: function(response) {
+            $('#manager-dynamic-1').html('<div class="box">' + response + '</div>');
+        },
+        error: function(jqXHR, textStatus, errorThrown) {
+            console.error("viewJobs AJAX error:", textStatus, errorThrown);
+            $('#manager-dynamic-1').html(createNotification('Could not load the background jobs.', 'is-warning'));
+        }
+    });
+    $('#manager-dynamic-2, #manager-dynamic-3, #manager-dynamic-4, #manager-dynamic-5').html('');
+}
+
 function alterPrice(mpriceID) {
     priceID = mpriceID;
     console.log("Manager: Altering price for priceID:", priceID);
@@ -0,0 +1,76 @@
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from sqlite_backend import SCHEMA_PATH
+
+
+# Everything the backlog added on top of the original schema; dropping it leaves a baseline-shaped database.
+ADDED_TABLES = ('id_sequences', 'cache_events', 'booking_sales', 'show_sales', 'daily_sales', 'shows_archive',
+                'booked_tickets_archive', 'bookings_archive', 'movies_archive', 'scheduler_leases', 'job_runs')
+ADDED_INDEXES = ('idx_shows_date_movie', 'idx_movies_run', 'idx_price_type_day', 'idx_bookings_customer')
+
+
+def create_baseline_database(path):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    for table in ADDED_TABLES:
+        conn.execute(f"DROP TABLE {table}")
+    for index in ADDED_INDEXES:
+        conn.execute(f"DROP INDEX {index}")
+    conn.execute("ALTER TABLE bookings DROP COLUMN base_price")
+    conn.execute("INSERT INTO movies VALUES (1, 'Baseline', 100, 'EN', date('now'), date('now', '+10 day'))")
+    conn.execute("INSERT INTO shows (show_id, movie_id, hall_id, type, time, Date) VALUES (1, 1, 1, '2D', 1800, date('now', '+1 day'))")
+    conn.execute("INSERT INTO customers (customer_name, customer_phone) VALUES ('Customer', '5550100')")
+    conn.execute("INSERT INTO bookings (booking_ref, customer_id) VALUES ('B1', 1)")
+    conn.execute("INSERT INTO booked_tickets VALUES (1, 1, 3, 'B1')")
+    conn.execute("INSERT INTO booked_tickets VALUES (2, 1, 1001, 'B1')")
+    conn.commit()
+    conn.close()
+
+
+class MigrateBaselineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.TemporaryDirectory()
+        cls.previous_cwd = os.getcwd()
+        os.chdir(cls.workdir.name)
+        with open('.env', 'w') as f:
+            f.write("DB_BACKEND=sqlite\nSQLITE_PATH=tms.db\nCACHE_SYNC_INTERVAL=0\nSCHEDULER_ENABLED=0\n")
+        create_baseline_database('tms.db')
+        # app reads .env and opens its pool at import time, so it is imported once the database is in place.
+        cls.app = importlib.import_module('app')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app.db_pool.close_all()
+        os.chdir(cls.previous_cwd)
+        cls.workdir.cleanup()
+
+    def test_migrate_fills_rollups_for_existing_bookings(self):
+        result = self.app.app.test_cli_runner().invoke(args=['migrate'])
+        self.assertIsNone(result.exception, result.output)
+        self.assertIn("applied 10:", result.output)
+
+        rows = self.app.runQuery("SELECT base_price FROM bookings WHERE booking_ref = 'B1'")
+        base_price = rows[0][0]
+        self.assertIsNotNone(base_price)
+        gross = base_price + int(base_price * 1.5)
+        sales = self.app.runQuery("SELECT tickets, gold_tickets, standard_tickets, gross FROM booking_sales WHERE booking_ref = 'B1'")
+        self.assertEqual([(2, 1, 1, gross)], [tuple(row) for row in sales])
+        daily = self.app.runQuery("SELECT bookings, tickets, gross FROM daily_sales")
+        self.assertEqual([(1, 2, gross)], [tuple(row) for row in daily])
+
+        result = self.app.app.test_cli_runner().invoke(args=['migrate'])
+        self.assertIn("Schema is up to date.", result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()